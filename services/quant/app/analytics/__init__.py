@@ -1,5 +1,19 @@
-from .factors import factor_regression
-from .metrics import annualize_return, annualize_volatility, drawdown_curve, max_drawdown, sharpe_ratio
+from .covariance import FactorCovariance, estimate_covariance
+from .factors import (
+    FactorModelFit,
+    factor_regression,
+    fit_factor_model,
+    rolling_factor_betas,
+    unknown_factors,
+)
+from .metrics import (
+    annualize_return,
+    annualize_volatility,
+    drawdown_curve,
+    max_drawdown,
+    performance_summary,
+    sharpe_ratio,
+)
 from .risk import (
     historical_cvar,
     historical_var,
@@ -7,13 +21,19 @@ from .risk import (
     parametric_var,
     rolling_sharpe,
     rolling_vol,
+    tail_risk,
 )
+from .rolling import RollingAnalytics, rolling_analytics
+from .scenarios import ScenarioRisk, simulate_tail_risk
 
 __all__ = [
+    "FactorCovariance",
+    "estimate_covariance",
     "annualize_return",
     "annualize_volatility",
     "drawdown_curve",
     "max_drawdown",
+    "performance_summary",
     "sharpe_ratio",
     "historical_var",
     "historical_cvar",
@@ -21,5 +41,14 @@ __all__ = [
     "parametric_cvar",
     "rolling_vol",
     "rolling_sharpe",
+    "tail_risk",
+    "RollingAnalytics",
+    "rolling_analytics",
+    "ScenarioRisk",
+    "simulate_tail_risk",
     "factor_regression",
+    "FactorModelFit",
+    "fit_factor_model",
+    "rolling_factor_betas",
+    "unknown_factors",
 ]
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Literal, Union
+
+import numpy as np
+import pandas as pd
+
+CovarianceMethod = Literal["sample", "ledoit_wolf", "oas", "ewma", "factor"]
+
+
+@dataclass
+class FactorCovariance:
+    """Covariance in factor form: ``loadings @ loadings.T + diag(specific)``.
+
+    ``loadings`` is (n_assets, n_factors) and ``specific`` holds the idiosyncratic
+    variances, so storage and products scale with factors x assets.
+    """
+
+    loadings: np.ndarray
+    specific: np.ndarray
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        n_assets = self.loadings.shape[0]
+        return n_assets, n_assets
+
+    @property
+    def n_factors(self) -> int:
+        return self.loadings.shape[1]
+
+    def to_dense(self) -> np.ndarray:
+        return self.loadings @ self.loadings.T + np.diag(self.specific)
+
+    def dot(self, weights: np.ndarray) -> np.ndarray:
+        return self.loadings @ (self.loadings.T @ weights) + self.specific * weights
+
+    def scaled(self, factor: float) -> "FactorCovariance":
+        return FactorCovariance(self.loadings * np.sqrt(factor), self.specific * factor)
+
+    def solve(self, rhs: np.ndarray) -> np.ndarray:
+        """``inv(cov) @ rhs`` through the Woodbury identity."""
+        inv_specific = 1.0 / self.specific
+        scaled_loadings = self.loadings * inv_specific[:, None]
+        capacitance = np.eye(self.n_factors) + self.loadings.T @ scaled_loadings
+        scaled_rhs = rhs * (inv_specific if rhs.ndim == 1 else inv_specific[:, None])
+        correction = scaled_loadings @ np.linalg.solve(capacitance, self.loadings.T @ scaled_rhs)
+        return scaled_rhs - correction
+
+
+Covariance = Union[np.ndarray, FactorCovariance]
+
+
+def as_dense(cov: Covariance | pd.DataFrame) -> np.ndarray:
+    if isinstance(cov, FactorCovariance):
+        return cov.to_dense()
+    if isinstance(cov, pd.DataFrame):
+        return cov.values
+    return np.asarray(cov)
+
+
+def scale_covariance(cov: Covariance, factor: float) -> Covariance:
+    if isinstance(cov, FactorCovariance):
+        return cov.scaled(factor)
+    return cov * factor
+
+
+def portfolio_variance(cov: Covariance | pd.DataFrame, weights: np.ndarray) -> float:
+    if isinstance(cov, FactorCovariance):
+        exposures = cov.loadings.T @ weights
+        return float(exposures @ exposures + cov.specific @ (weights**2))
+    return float(weights.T @ as_dense(cov) @ weights)
+
+
+def _complete_rows(returns: pd.DataFrame | np.ndarray) -> np.ndarray:
+    values = np.asarray(returns, dtype=float)
+    return values[np.isfinite(values).all(axis=1)]
+
+
+def _shrink_to_identity(emp_cov: np.ndarray, shrinkage: float) -> np.ndarray:
+    mu = np.trace(emp_cov) / emp_cov.shape[0]
+    shrunk = (1.0 - shrinkage) * emp_cov
+    shrunk.flat[:: emp_cov.shape[0] + 1] += shrinkage * mu
+    return shrunk
+
+
+def ledoit_wolf(values: np.ndarray) -> np.ndarray:
+    """Ledoit-Wolf shrinkage of the (biased) sample covariance towards a scaled identity."""
+    n_samples, n_features = values.shape
+    x = values - values.mean(axis=0)
+    emp_cov = x.T @ x / n_samples
+    x2 = x**2
+    emp_cov_trace = x2.sum(axis=0) / n_samples
+    mu = emp_cov_trace.sum() / n_features
+    beta_ = (x2.T @ x2).sum()
+    delta_ = ((x.T @ x) ** 2).sum() / n_samples**2
+    beta = (beta_ / n_samples - delta_) / (n_features * n_samples)
+    delta = (delta_ - 2.0 * mu * emp_cov_trace.sum() + n_features * mu**2) / n_features
+    beta = min(beta, delta)
+    shrinkage = 0.0 if beta == 0 else beta / delta
+    return _shrink_to_identity(emp_cov, shrinkage)
+
+
+def oas(values: np.ndarray) -> np.ndarray:
+    """Oracle approximating shrinkage towards a scaled identity."""
+    n_samples, n_features = values.shape
+    x = values - values.mean(axis=0)
+    emp_cov = x.T @ x / n_samples
+    mu = np.trace(emp_cov) / n_features
+    alpha = np.mean(emp_cov**2)
+    numerator = alpha + mu**2
+    denominator = (n_samples + 1.0) * (alpha - mu**2 / n_features)
+    shrinkage = 1.0 if denominator == 0 else min(numerator / denominator, 1.0)
+    return _shrink_to_identity(emp_cov, shrinkage)
+
+
+def ewma_covariance(values: np.ndarray, halflife: float = 63.0) -> np.ndarray:
+    """Exponentially weighted covariance; the most recent row has the largest weight."""
+    n_samples = values.shape[0]
+    decay = 0.5 ** (1.0 / halflife)
+    weights = decay ** np.arange(n_samples - 1, -1, -1, dtype=float)
+    weights /= weights.sum()
+    x = values - weights @ values
+    cov = (x * weights[:, None]).T @ x
+    # Reliability-weights correction, the weighted analogue of ddof=1.
+    return cov / (1.0 - weights @ weights)
+
+
+def statistical_factor_model(values: np.ndarray, n_factors: int | None = None) -> FactorCovariance:
+    """Principal-component factor model of the sample covariance."""
+    n_samples, n_assets = values.shape
+    k = n_factors or min(5, n_assets - 1, n_samples - 1)
+    k = max(1, min(k, n_assets))
+    x = values - values.mean(axis=0)
+    emp_cov = x.T @ x / (n_samples - 1)
+    eigvals, eigvecs = np.linalg.eigh(emp_cov)
+    top = np.argsort(eigvals)[::-1][:k]
+    loadings = eigvecs[:, top] * np.sqrt(np.clip(eigvals[top], 0, None))
+    floor = 1e-8 * max(float(np.mean(np.diag(emp_cov))), 1e-12)
+    specific = np.clip(np.diag(emp_cov) - (loadings**2).sum(axis=1), floor, None)
+    return FactorCovariance(loadings=loadings, specific=specific)
+
+
+def estimate_covariance(
+    returns: pd.DataFrame | np.ndarray,
+    method: CovarianceMethod = "sample",
+    halflife: float = 63.0,
+    n_factors: int | None = None,
+) -> Covariance:
+    """Estimate the covariance of ``returns`` (dates x assets).
+
+    ``sample`` is the pairwise sample covariance, as ``DataFrame.cov``. The other
+    estimators use rows where every asset is observed and fall back to ``sample``
+    when fewer than two such rows exist. ``factor`` returns a :class:`FactorCovariance`.
+    """
+    frame = returns if isinstance(returns, pd.DataFrame) else pd.DataFrame(returns)
+    if method == "sample":
+        return frame.cov().values
+
+    values = _complete_rows(frame)
+    if values.shape[0] < 2:
+        return frame.cov().values
+    if method == "ledoit_wolf":
+        return ledoit_wolf(values)
+    if method == "oas":
+        return oas(values)
+    if method == "ewma":
+        return ewma_covariance(values, halflife=halflife)
+    if method == "factor":
+        return statistical_factor_model(values, n_factors=n_factors)
+    raise ValueError(f"Unknown covariance method: {method}")
@@ -1,26 +1,196 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
+from typing import Literal, Sequence
+
+import numpy as np
 import pandas as pd
-import statsmodels.api as sm
+
+DEFAULT_FACTORS = ("Mkt-RF", "SMB", "HML")
+FactorCovarianceType = Literal["ols", "hac"]
+
+
+@dataclass
+class FactorModelFit:
+    """Factor regressions of many return columns, one column of estimates each.
+
+    ``coefficients`` and ``tstats`` are ``(len(regressors), n_columns)`` with the
+    intercept first under the name ``const``.
+    """
+
+    regressors: list[str]
+    columns: pd.Index
+    coefficients: np.ndarray
+    tstats: np.ndarray
+    r2: np.ndarray
+    n_obs: np.ndarray
+
+    def result(self, column: int = 0) -> dict:
+        return {
+            "coefficients": dict(zip(self.regressors, self.coefficients[:, column].tolist())),
+            "tstats": dict(zip(self.regressors, self.tstats[:, column].tolist())),
+            "r2": float(self.r2[column]),
+        }
+
+
+def newey_west_lags(n_obs: int) -> int:
+    """Newey-West (1994) rule of thumb for the HAC bandwidth."""
+    return int(np.floor(4 * (n_obs / 100) ** (2 / 9)))
+
+
+def _design(
+    returns: pd.DataFrame, factors: pd.DataFrame, names: Sequence[str]
+) -> tuple[np.ndarray, np.ndarray, pd.Index]:
+    """Excess returns and ``[1, factors]`` on the dates both cover."""
+    index = returns.index.intersection(factors.index)
+    factor_values = factors.loc[index, list(names)].to_numpy(dtype=float)
+    complete = np.isfinite(factor_values).all(axis=1)
+    if "RF" in factors.columns:
+        risk_free = factors.loc[index, "RF"].to_numpy(dtype=float)
+        complete &= np.isfinite(risk_free)
+    else:
+        risk_free = np.zeros(len(index))
+    index = index[complete]
+    y = returns.loc[index].to_numpy(dtype=float) - risk_free[complete, None]
+    x = np.column_stack([np.ones(len(index)), factor_values[complete]])
+    return y, x, index
+
+
+def _hac_meat(scores: np.ndarray, lags: int) -> np.ndarray:
+    """Bartlett-weighted long-run covariance of ``scores`` (T, p, M) -> (M, p, p)."""
+    meat = np.einsum("tpm,tqm->mpq", scores, scores)
+    for lag in range(1, min(lags, len(scores) - 1) + 1):
+        gamma = np.einsum("tpm,tqm->mpq", scores[lag:], scores[:-lag])
+        meat += (1 - lag / (lags + 1)) * (gamma + gamma.transpose(0, 2, 1))
+    return meat
+
+
+def _fit_block(
+    y: np.ndarray, x: np.ndarray, cov_type: FactorCovarianceType, lags: int | None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """One least-squares solve for every column of ``y`` sharing the design ``x``."""
+    n_obs, n_regressors = x.shape
+    q, r = np.linalg.qr(x)
+    coefficients = np.linalg.solve(r, q.T @ y)
+    residuals = y - x @ coefficients
+    dof = max(n_obs - n_regressors, 1)
+    r_inv = np.linalg.inv(r)
+    bread = r_inv @ r_inv.T
+    if cov_type == "hac":
+        lags = newey_west_lags(n_obs) if lags is None else lags
+        scores = x[:, :, None] * residuals[:, None, :]
+        meat = _hac_meat(scores, lags)
+        variance = np.einsum("pq,mqr,rs->mps", bread, meat, bread)
+        standard_errors = np.sqrt(np.einsum("mpp->pm", variance))
+    else:
+        scale = (residuals**2).sum(axis=0) / dof
+        standard_errors = np.sqrt(np.outer(np.diag(bread), scale))
+
+    centered = y - y.mean(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tstats = coefficients / standard_errors
+        r2 = 1 - (residuals**2).sum(axis=0) / (centered**2).sum(axis=0)
+    return coefficients, tstats, r2
+
+
+def unknown_factors(factors: pd.DataFrame, factor_names: Sequence[str]) -> list[str]:
+    return [name for name in factor_names if name not in factors.columns]
+
+
+def _factor_names(factors: pd.DataFrame, factor_names: Sequence[str] | None) -> list[str]:
+    """Requested regressors; defaults to those of ``DEFAULT_FACTORS`` the frame has."""
+    if factor_names is None:
+        return [name for name in DEFAULT_FACTORS if name in factors.columns]
+    unknown = unknown_factors(factors, factor_names)
+    if unknown:
+        raise ValueError(f"Unknown factors: {', '.join(unknown)}")
+    return list(factor_names)
+
+
+def fit_factor_model(
+    returns: pd.DataFrame | pd.Series,
+    factors: pd.DataFrame,
+    factor_names: Sequence[str] | None = None,
+    cov_type: FactorCovarianceType = "ols",
+    lags: int | None = None,
+) -> FactorModelFit:
+    """Regress the excess returns of every column on a factor set in one solve.
+
+    Excess returns subtract ``RF`` when the factor frame has it. Columns are grouped
+    by which dates they have returns for and each group shares one QR
+    factorization, so a panel with no gaps is a single solve. ``cov_type="hac"``
+    gives Newey-West t-stats with ``lags`` lags (rule of thumb by default), matching
+    statsmodels' ``HAC`` without small-sample correction.
+    """
+    frame = returns.to_frame() if isinstance(returns, pd.Series) else returns
+    names = _factor_names(factors, factor_names)
+    y, x, _ = _design(frame, factors, names)
+
+    n_regressors = len(names) + 1
+    n_columns = y.shape[1]
+    coefficients = np.full((n_regressors, n_columns), np.nan)
+    tstats = np.full((n_regressors, n_columns), np.nan)
+    r2 = np.full(n_columns, np.nan)
+    observed = np.isfinite(y)
+    n_obs = observed.sum(axis=0)
+    patterns, group = np.unique(observed, axis=1, return_inverse=True)
+    for pattern_id, rows in enumerate(patterns.T):
+        columns = np.flatnonzero(group.ravel() == pattern_id)
+        if rows.sum() <= n_regressors:
+            continue
+        block = _fit_block(y[rows][:, columns], x[rows], cov_type, lags)
+        coefficients[:, columns], tstats[:, columns], r2[columns] = block
+    return FactorModelFit(["const", *names], frame.columns, coefficients, tstats, r2, n_obs)
+
+
+def rolling_factor_betas(
+    returns: pd.DataFrame | pd.Series,
+    factors: pd.DataFrame,
+    window: int = 126,
+    factor_names: Sequence[str] | None = None,
+) -> dict[str, pd.DataFrame]:
+    """Rolling OLS coefficients, one frame (dates x columns) per regressor.
+
+    ``X'X`` and ``X'y`` of every window are differences of prefix sums, so each
+    step costs O(1) in the window length; all windows are then solved together.
+    Windows containing a missing return are NaN for that column.
+    """
+    frame = returns.to_frame() if isinstance(returns, pd.Series) else returns
+    names = _factor_names(factors, factor_names)
+    y, x, index = _design(frame, factors, names)
+    regressors = ["const", *names]
+    n_obs, n_regressors = x.shape
+    empty = np.full((n_obs, y.shape[1]), np.nan)
+    if n_obs < window or window <= n_regressors:
+        return {
+            name: pd.DataFrame(empty, index=index, columns=frame.columns) for name in regressors
+        }
+
+    missing = ~np.isfinite(y)
+    y = np.where(missing, 0.0, y)
+
+    def window_sums(values: np.ndarray) -> np.ndarray:
+        prefix = np.concatenate([np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)])
+        return prefix[window:] - prefix[:-window]
+
+    xtx = window_sums(x[:, :, None] * x[:, None, :])
+    xty = window_sums(x[:, :, None] * y[:, None, :])
+    gaps = window_sums(missing.astype(float)) > 0.5
+    betas = np.linalg.solve(xtx, xty)
+    betas[np.broadcast_to(gaps[:, None, :], betas.shape)] = np.nan
+
+    output = {}
+    for position, name in enumerate(regressors):
+        values = empty.copy()
+        values[window - 1 :] = betas[:, position, :]
+        output[name] = pd.DataFrame(values, index=index, columns=frame.columns)
+    return output
 
 
 def factor_regression(returns: pd.Series, factors: pd.DataFrame) -> dict:
     if returns.empty or factors.empty:
         return {}
-
-    aligned = pd.concat([returns.rename("portfolio"), factors], axis=1, join="inner").dropna()
-    if aligned.empty:
+    fit = fit_factor_model(returns.rename("portfolio"), factors)
+    if not np.isfinite(fit.r2[0]):
         return {}
-
-    y = aligned["portfolio"] - aligned.get("RF", 0)
-    factor_cols = [col for col in ["Mkt-RF", "SMB", "HML"] if col in aligned.columns]
-    X = sm.add_constant(aligned[factor_cols])
-    model = sm.OLS(y, X).fit()
-
-    coefficients = model.params.to_dict()
-    tstats = model.tvalues.to_dict()
-    return {
-        "coefficients": coefficients,
-        "tstats": tstats,
-        "r2": float(model.rsquared),
-    }
+    return fit.result()
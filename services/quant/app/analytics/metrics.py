@@ -39,3 +39,18 @@ def max_drawdown(drawdown: pd.Series) -> float:
     if drawdown.empty:
         return 0.0
     return float(drawdown.min())
+
+
+def performance_summary(
+    returns: pd.Series, equity: pd.Series, risk_free: float = 0.0
+) -> dict[str, float]:
+    drawdown = drawdown_curve(equity)
+    cagr = float(annualize_return(returns))
+    max_dd = max_drawdown(drawdown)
+    return {
+        "cagr": cagr,
+        "vol": float(annualize_volatility(returns)),
+        "sharpe": float(sharpe_ratio(returns, risk_free=risk_free)),
+        "max_drawdown": max_dd,
+        "calmar": cagr / abs(max_dd) if max_dd != 0 else 0.0,
+    }
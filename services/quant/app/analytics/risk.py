@@ -1,24 +1,132 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Sequence
+
 import numpy as np
 import pandas as pd
-from scipy.stats import norm
+
+from .rolling import rolling_analytics
+
+# The stdlib normal gives the same quantiles as scipy.stats.norm without importing scipy.stats.
+_NORMAL = NormalDist()
+
+
+@dataclass
+class TailRisk:
+    """VaR and CVaR with one row per portfolio and one column per confidence level.
+
+    Values are returns, so losses are negative, matching the single-series helpers.
+    """
+
+    alphas: np.ndarray
+    hist_var: np.ndarray
+    hist_cvar: np.ndarray
+    param_var: np.ndarray
+    param_cvar: np.ndarray
+
+
+def tail_risk(
+    returns: pd.DataFrame | np.ndarray,
+    weights: np.ndarray | None = None,
+    alphas: Sequence[float] = (0.95,),
+) -> TailRisk:
+    """Historical and parametric VaR/CVaR of many portfolios at many levels in one pass.
+
+    ``returns`` is a ``(T, N)`` matrix of asset returns and ``weights`` a ``(P, N)``
+    matrix of portfolios; without weights every column of ``returns`` is taken as a
+    portfolio. Historical VaR matches ``np.quantile`` (linear interpolation) but
+    selects the needed order statistics with one ``np.partition`` for all levels,
+    and CVaR averages the returns at or below VaR from prefix sums of that partition.
+    """
+    values = np.asarray(returns, dtype=float)
+    if weights is not None:
+        # Missing asset returns contribute nothing, as in the backtest engine.
+        values = np.nan_to_num(values) @ np.atleast_2d(np.asarray(weights, dtype=float)).T
+    alphas = np.atleast_1d(np.asarray(alphas, dtype=float))
+    horizon, n_portfolios = values.shape
+    if horizon == 0:
+        zeros = np.zeros((n_portfolios, len(alphas)))
+        return TailRisk(alphas, zeros, zeros.copy(), zeros.copy(), zeros.copy())
+
+    position = (1 - alphas) * (horizon - 1)
+    lower = np.floor(position).astype(int)
+    upper = np.minimum(lower + 1, horizon - 1)
+    fraction = position - lower
+    ordered = np.partition(values, np.union1d(lower, upper), axis=0)
+    low, high = ordered[lower], ordered[upper]
+    var = low + fraction[:, None] * (high - low)
+
+    # The first ``lower + 1`` entries are the smallest returns, all at or below VaR.
+    prefix = np.cumsum(ordered, axis=0)
+    tail_sum = prefix[lower]
+    tail_count = np.broadcast_to((lower + 1)[:, None], var.shape).astype(float)
+    # Entries past ``lower`` are at least ``high``; only ties with VaR can join the tail.
+    ties = high <= var
+    for level, column in zip(*np.nonzero(ties)):
+        rest = ordered[lower[level] + 1 :, column]
+        joined = rest[rest <= var[level, column]]
+        tail_sum[level, column] += joined.sum()
+        tail_count[level, column] += len(joined)
+    cvar = tail_sum / tail_count
+
+    mu = values.mean(axis=0)
+    sigma = values.std(axis=0, ddof=1) if horizon > 1 else np.full(n_portfolios, np.nan)
+    z = np.array([_NORMAL.inv_cdf(1 - alpha) for alpha in alphas])
+    density = np.array([_NORMAL.pdf(value) for value in z])
+    param_var = mu[:, None] + sigma[:, None] * z
+    param_cvar = mu[:, None] - sigma[:, None] * density / (1 - alphas)
+    return TailRisk(alphas, var.T, cvar.T, param_var, param_cvar)
+
+
+def tail_size(n_observations: int, alphas: Sequence[float]) -> int:
+    """How many of the smallest observations :func:`tail_from_smallest` needs."""
+    position = (1 - min(alphas)) * (n_observations - 1)
+    return min(n_observations, int(np.floor(position)) + 2)
+
+
+def tail_from_smallest(
+    smallest: np.ndarray,
+    n_observations: int,
+    alphas: Sequence[float],
+    ties: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Historical VaR and CVaR from only the smallest observations of a sample.
+
+    ``smallest`` holds, sorted ascending along the first axis, at least
+    :func:`tail_size` of the lowest values out of ``n_observations``; this is what
+    streaming estimators keep instead of the whole sample. ``ties`` counts the
+    observations left out that equal the largest kept value. Returns arrays shaped
+    ``(len(alphas), *smallest.shape[1:])`` that agree with :func:`tail_risk`.
+    """
+    alphas = np.atleast_1d(np.asarray(alphas, dtype=float))
+    position = (1 - alphas) * (n_observations - 1)
+    lower = np.floor(position).astype(int)
+    upper = np.minimum(lower + 1, n_observations - 1)
+    fraction = (position - lower).reshape((-1,) + (1,) * (smallest.ndim - 1))
+    var = smallest[lower] + fraction * (smallest[upper] - smallest[lower])
+    in_tail = smallest[None] <= var[:, None]
+    tail_sum = np.where(in_tail, smallest[None], 0.0).sum(axis=1)
+    tail_count = in_tail.sum(axis=1)
+    if ties is not None:
+        largest = smallest[-1]
+        joined = np.where(largest[None] <= var, ties[None], 0)
+        tail_sum = tail_sum + joined * largest[None]
+        tail_count = tail_count + joined
+    return var, tail_sum / tail_count
 
 
 def historical_var(returns: pd.Series, alpha: float = 0.95) -> float:
     if returns.empty:
         return 0.0
-    return float(np.quantile(returns, 1 - alpha))
+    return float(tail_risk(returns.to_numpy()[:, None], alphas=[alpha]).hist_var[0, 0])
 
 
 def historical_cvar(returns: pd.Series, alpha: float = 0.95) -> float:
     if returns.empty:
         return 0.0
-    var = historical_var(returns, alpha)
-    tail = returns[returns <= var]
-    if tail.empty:
-        return var
-    return float(tail.mean())
+    return float(tail_risk(returns.to_numpy()[:, None], alphas=[alpha]).hist_cvar[0, 0])
 
 
 def parametric_var(returns: pd.Series, alpha: float = 0.95) -> float:
@@ -26,7 +134,7 @@ def parametric_var(returns: pd.Series, alpha: float = 0.95) -> float:
         return 0.0
     mu = returns.mean()
     sigma = returns.std(ddof=1)
-    return float(mu + sigma * norm.ppf(1 - alpha))
+    return float(mu + sigma * _NORMAL.inv_cdf(1 - alpha))
 
 
 def parametric_cvar(returns: pd.Series, alpha: float = 0.95) -> float:
@@ -34,18 +142,17 @@ def parametric_cvar(returns: pd.Series, alpha: float = 0.95) -> float:
         return 0.0
     mu = returns.mean()
     sigma = returns.std(ddof=1)
-    z = norm.ppf(1 - alpha)
-    return float(mu - sigma * norm.pdf(z) / (1 - alpha))
+    z = _NORMAL.inv_cdf(1 - alpha)
+    return float(mu - sigma * _NORMAL.pdf(z) / (1 - alpha))
 
 
 def rolling_vol(returns: pd.Series, window: int = 63) -> pd.Series:
-    return returns.rolling(window=window).std(ddof=1)
+    vol = rolling_analytics(returns, [window]).frame("vol", window).iloc[:, 0]
+    return vol.rename(returns.name)
 
 
 def rolling_sharpe(returns: pd.Series, window: int = 63, risk_free: float = 0.0) -> pd.Series:
     if returns.empty:
         return pd.Series(dtype=float)
-    excess = returns - risk_free / 252
-    vol = excess.rolling(window=window).std(ddof=1)
-    mean = excess.rolling(window=window).mean()
-    return mean / vol * np.sqrt(252)
+    analytics = rolling_analytics(returns, [window], risk_free=risk_free)
+    return analytics.frame("sharpe", window).iloc[:, 0].rename(returns.name)
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+STATISTICS = ("mean", "vol", "sharpe", "downside", "sortino", "beta")
+
+
+@dataclass
+class RollingAnalytics:
+    """Rolling statistics of many return columns for several windows.
+
+    Windowed arrays are shaped ``(len(windows), T, n_columns)`` and are NaN until
+    a window holds ``window`` observations, as with ``pandas.rolling``. ``mean``,
+    ``vol`` and ``downside`` are per-period; ``sharpe`` and ``sortino`` are
+    annualized. ``drawdown`` is measured from the running peak since the first row.
+    """
+
+    index: pd.Index
+    columns: pd.Index
+    windows: tuple[int, ...]
+    mean: np.ndarray
+    vol: np.ndarray
+    sharpe: np.ndarray
+    downside: np.ndarray
+    sortino: np.ndarray
+    beta: np.ndarray | None
+    drawdown: np.ndarray
+
+    def frame(self, statistic: str, window: int | None = None) -> pd.DataFrame:
+        values = getattr(self, statistic)
+        if statistic != "drawdown":
+            values = values[self.windows.index(window)]
+        return pd.DataFrame(values, index=self.index, columns=self.columns)
+
+
+def _rolling_sums_loop(features: np.ndarray, window: int) -> np.ndarray:
+    """Sliding-window sums with one add and one subtract per step."""
+    n_features, n_rows, n_columns = features.shape
+    sums = np.empty((n_features, n_rows - window + 1, n_columns))
+    for feature in range(n_features):
+        for column in range(n_columns):
+            total = 0.0
+            for row in range(n_rows):
+                total += features[feature, row, column]
+                if row >= window:
+                    total -= features[feature, row - window, column]
+                if row >= window - 1:
+                    sums[feature, row - window + 1, column] = total
+    return sums
+
+
+@lru_cache(maxsize=1)
+def _rolling_sums_kernel():
+    """``_rolling_sums_loop`` compiled by numba, imported on first use, or ``None``."""
+    try:
+        import numba
+    except Exception:  # pragma: no cover - optional accelerator
+        return None
+    return numba.njit(cache=True)(_rolling_sums_loop)
+
+
+def _window_sums(features: np.ndarray, prefix: np.ndarray | None, window: int) -> np.ndarray:
+    if prefix is None:
+        return _rolling_sums_kernel()(features, window)
+    return prefix[:, window:] - prefix[:, :-window]
+
+
+def rolling_analytics(
+    returns: pd.DataFrame | pd.Series,
+    windows: Sequence[int] = (63,),
+    benchmark: pd.Series | None = None,
+    risk_free: float = 0.0,
+    periods_per_year: int = 252,
+) -> RollingAnalytics:
+    """Rolling mean, volatility, Sharpe, downside deviation, Sortino and beta in one pass.
+
+    Every statistic is a function of a few per-column running sums (of returns,
+    squared returns, squared shortfalls below the risk-free rate and, with a
+    benchmark, cross-products). Their prefix sums are taken once, so each window
+    costs O(1) per row and further windows reuse them. With numba installed the
+    sums come from a compiled sliding loop instead, which skips the prefix
+    buffer. With a benchmark, rows where it is missing count as missing.
+    """
+    frame = returns.to_frame() if isinstance(returns, pd.Series) else returns
+    values = np.ascontiguousarray(frame.to_numpy(dtype=np.float64))
+    valid = np.isfinite(values)
+    if benchmark is not None:
+        bench = benchmark.reindex(frame.index).to_numpy(dtype=np.float64)
+        valid &= np.isfinite(bench)[:, None]
+
+    excess = np.where(valid, values - risk_free / periods_per_year, 0.0)
+    counts = valid.sum(axis=0)
+    # Centering on the column means keeps the running sums of squares well conditioned.
+    shift = np.divide(excess.sum(axis=0), counts, out=np.zeros(len(counts)), where=counts > 0)
+    centered = np.where(valid, excess - shift, 0.0)
+    features = [valid.astype(np.float64), centered, centered**2, np.minimum(excess, 0.0) ** 2]
+    if benchmark is not None:
+        bench_valid = np.where(valid, bench[:, None], 0.0)
+        bench_shift = np.divide(
+            bench_valid.sum(axis=0), counts, out=np.zeros(len(counts)), where=counts > 0
+        )
+        bench_centered = np.where(valid, bench_valid - bench_shift, 0.0)
+        features += [bench_centered, bench_centered**2, centered * bench_centered]
+    features = np.ascontiguousarray(np.stack(features))
+
+    prefix = None
+    if _rolling_sums_kernel() is None:
+        prefix = np.zeros((features.shape[0], features.shape[1] + 1, features.shape[2]))
+        np.cumsum(features, axis=1, out=prefix[:, 1:])
+
+    windows = tuple(int(window) for window in windows)
+    shape = (len(windows),) + values.shape
+    stats = {name: np.full(shape, np.nan) for name in STATISTICS}
+    annualize = np.sqrt(periods_per_year)
+    for slot, window in enumerate(windows):
+        if window > len(values) or window < 2:
+            continue
+        sums = _window_sums(features, prefix, window)
+        full = sums[0] > window - 0.5
+        mean_centered = sums[1] / window
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(np.clip(sums[2] - window * mean_centered**2, 0.0, None) / (window - 1))
+            downside = np.sqrt(sums[3] / window)
+            mean_excess = mean_centered + shift
+            rows = slice(window - 1, None)
+            mean = mean_excess + risk_free / periods_per_year
+            stats["mean"][slot, rows] = np.where(full, mean, np.nan)
+            stats["vol"][slot, rows] = np.where(full, std, np.nan)
+            stats["sharpe"][slot, rows] = np.where(full, mean_excess / std * annualize, np.nan)
+            stats["downside"][slot, rows] = np.where(full, downside, np.nan)
+            stats["sortino"][slot, rows] = np.where(
+                full, mean_excess / downside * annualize, np.nan
+            )
+            if benchmark is not None:
+                bench_mean = sums[4] / window
+                covariance = sums[6] - window * mean_centered * bench_mean
+                variance = sums[5] - window * bench_mean**2
+                stats["beta"][slot, rows] = np.where(full, covariance / variance, np.nan)
+
+    growth = np.cumprod(1.0 + np.where(np.isfinite(values), values, 0.0), axis=0)
+    drawdown = growth / np.maximum.accumulate(growth, axis=0) - 1.0
+    return RollingAnalytics(
+        index=frame.index,
+        columns=frame.columns,
+        windows=windows,
+        mean=stats["mean"],
+        vol=stats["vol"],
+        sharpe=stats["sharpe"],
+        downside=stats["downside"],
+        sortino=stats["sortino"],
+        beta=stats["beta"] if benchmark is not None else None,
+        drawdown=drawdown,
+    )
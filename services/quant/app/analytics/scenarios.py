@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Literal, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..workers import scenario_pool
+from .covariance import CovarianceMethod, as_dense, estimate_covariance
+from .risk import tail_from_smallest, tail_size
+
+ScenarioMethod = Literal["bootstrap", "normal", "student_t"]
+
+# Upper bound on simulated values (scenarios x days x portfolios) held per chunk.
+_CHUNK_ELEMENTS = 1 << 21
+
+
+@dataclass
+class ScenarioRisk:
+    """Forward P&L statistics with one row per portfolio and one column per horizon.
+
+    ``var`` and ``cvar`` carry a trailing axis over ``alphas``; like the historical
+    measures they are returns, so losses are negative.
+    """
+
+    horizons: np.ndarray
+    alphas: np.ndarray
+    n_scenarios: int
+    mean: np.ndarray
+    volatility: np.ndarray
+    var: np.ndarray
+    cvar: np.ndarray
+
+
+@dataclass
+class _ScenarioModel:
+    """Everything a worker needs to draw portfolio paths, in portfolio space."""
+
+    method: ScenarioMethod
+    horizons: np.ndarray
+    portfolio_returns: np.ndarray | None = None
+    mean: np.ndarray | None = None
+    scale: np.ndarray | None = None
+    block_length: float = 10.0
+    dof: float = 5.0
+
+
+@dataclass
+class _TailAccumulator:
+    """Streaming reduction of horizon P&L: moments plus the lowest ``keep`` values.
+
+    ``ties`` counts the values dropped although equal to the largest kept one;
+    bootstrap draws repeat historical values, so they are common and belong in
+    the CVaR average whenever that value is the VaR.
+    """
+
+    keep: int
+    count: int = 0
+    total: np.ndarray | None = None
+    squares: np.ndarray | None = None
+    smallest: np.ndarray | None = None
+    ties: np.ndarray | None = None
+
+    def add(self, pnl: np.ndarray) -> None:
+        self.count += len(pnl)
+        self.total = pnl.sum(axis=0) + (0.0 if self.total is None else self.total)
+        squares = np.square(pnl).sum(axis=0)
+        self.squares = squares + (0.0 if self.squares is None else self.squares)
+        parts = [(pnl, None)]
+        if self.smallest is not None:
+            parts.insert(0, (self.smallest, self.ties))
+        self._keep_smallest(parts)
+
+    def merge(self, other: _TailAccumulator) -> None:
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.total, self.squares = other.count, other.total, other.squares
+            self.smallest, self.ties = other.smallest, other.ties
+            return
+        self.count += other.count
+        self.total = self.total + other.total
+        self.squares = self.squares + other.squares
+        self._keep_smallest([(self.smallest, self.ties), (other.smallest, other.ties)])
+
+    def _keep_smallest(self, parts: list[tuple[np.ndarray, np.ndarray | None]]) -> None:
+        candidates = np.concatenate([values for values, _ in parts])
+        ties = np.zeros(candidates.shape[1:], dtype=np.int64)
+        if len(candidates) > self.keep:
+            ordered = np.partition(candidates, self.keep - 1, axis=0)
+            cutoff = ordered[self.keep - 1]
+            ties += (ordered[self.keep :] == cutoff).sum(axis=0)
+            # A part's earlier ties equal its largest value; they still tie if that is the cutoff.
+            for values, dropped in parts:
+                if dropped is not None:
+                    ties += np.where(values.max(axis=0) == cutoff, dropped, 0)
+            candidates = ordered[: self.keep]
+        self.smallest, self.ties = candidates, ties
+
+
+def _bootstrap_days(
+    rng: np.random.Generator, n_paths: int, n_days: int, history: int, block_length: float
+) -> np.ndarray:
+    """Row indices of a stationary block bootstrap (Politis-Romano), one path per row.
+
+    Each day starts a new block with probability ``1 / block_length``; otherwise
+    the path moves on to the next day of history, wrapping around at the end.
+    """
+    starts = rng.integers(history, size=(n_paths, n_days))
+    new_block = rng.random((n_paths, n_days)) < 1.0 / block_length
+    new_block[:, 0] = True
+    days = np.arange(n_days)
+    block_start = np.maximum.accumulate(np.where(new_block, days, 0), axis=1)
+    first = np.take_along_axis(starts, block_start, axis=1)
+    return (first + days - block_start) % history
+
+
+def _draw_returns(model: _ScenarioModel, rng: np.random.Generator, n_paths: int) -> np.ndarray:
+    n_days = int(model.horizons.max())
+    if model.method == "bootstrap":
+        history = len(model.portfolio_returns)
+        rows = _bootstrap_days(rng, n_paths, n_days, history, model.block_length)
+        return model.portfolio_returns[rows]
+
+    shocks = rng.standard_normal((n_paths, n_days, len(model.mean))) @ model.scale.T
+    if model.method == "student_t":
+        # Scaled so the simulated covariance matches the estimate.
+        mixing = rng.chisquare(model.dof, size=(n_paths, n_days, 1)) / (model.dof - 2)
+        shocks /= np.sqrt(mixing)
+    return shocks + model.mean
+
+
+def _simulate_chunk(
+    model: _ScenarioModel, seed: int, chunk: int, n_paths: int, accumulator: _TailAccumulator
+) -> None:
+    # Each chunk owns a child stream, so results do not depend on how chunks are split.
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk,)))
+    daily = _draw_returns(model, rng, n_paths)
+    growth = np.cumprod(1.0 + daily, axis=1)
+    accumulator.add(growth[:, model.horizons - 1, :] - 1.0)
+
+
+def _simulate_chunks(
+    model: _ScenarioModel, seed: int, chunks: list[tuple[int, int]], keep: int
+) -> _TailAccumulator:
+    accumulator = _TailAccumulator(keep)
+    for chunk, n_paths in chunks:
+        _simulate_chunk(model, seed, chunk, n_paths, accumulator)
+    return accumulator
+
+
+def _scenario_model(
+    returns: np.ndarray,
+    weights: np.ndarray,
+    horizons: np.ndarray,
+    method: ScenarioMethod,
+    cov_estimator: CovarianceMethod,
+    block_length: float,
+    dof: float,
+) -> _ScenarioModel:
+    model = _ScenarioModel(method, horizons, block_length=block_length, dof=dof)
+    if method == "bootstrap":
+        # Constant weights make portfolio P&L linear in asset returns, so paths are
+        # drawn for the portfolios directly rather than for every asset.
+        model.portfolio_returns = np.nan_to_num(returns) @ weights.T
+        return model
+
+    complete = returns[np.isfinite(returns).all(axis=1)]
+    cov = weights @ as_dense(estimate_covariance(complete, cov_estimator)) @ weights.T
+    eigenvalues, eigenvectors = np.linalg.eigh(cov)
+    model.mean = weights @ complete.mean(axis=0)
+    model.scale = eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+    return model
+
+
+def simulate_tail_risk(
+    returns: pd.DataFrame | np.ndarray,
+    weights: np.ndarray,
+    horizons: Sequence[int] = (1, 5, 20),
+    alphas: Sequence[float] = (0.95, 0.99),
+    method: ScenarioMethod = "bootstrap",
+    n_scenarios: int = 100_000,
+    seed: int = 0,
+    block_length: float = 10.0,
+    dof: float = 5.0,
+    cov_estimator: CovarianceMethod = "sample",
+    chunk_size: int | None = None,
+    max_workers: int | None = None,
+) -> ScenarioRisk:
+    """Forward VaR/CVaR of constant-weight portfolios from simulated return paths.
+
+    ``method`` is a stationary block bootstrap of history or a multivariate normal
+    or Student-t (``dof`` degrees of freedom) fit to its mean and covariance. Paths
+    are drawn in chunks of ``chunk_size`` scenarios and each chunk is reduced to
+    moments and its lowest tail before the next one is drawn, so memory is bounded
+    by the chunk and the tail, not by ``n_scenarios``. Chunks are split into up to
+    ``max_workers`` groups run in the shared scenario process pool (sized by
+    ``settings.scenario_workers``); a given ``seed`` and ``chunk_size`` reproduce
+    the same scenarios however many workers run.
+    """
+    values = np.asarray(returns, dtype=float)
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    horizons = np.asarray(sorted(set(horizons)), dtype=int)
+    alphas = np.asarray(alphas, dtype=float)
+    model = _scenario_model(values, weights, horizons, method, cov_estimator, block_length, dof)
+
+    n_portfolios = len(weights)
+    if chunk_size is None:
+        chunk_size = max(1, _CHUNK_ELEMENTS // (int(horizons.max()) * n_portfolios))
+    chunks = [
+        (chunk, min(chunk_size, n_scenarios - first))
+        for chunk, first in enumerate(range(0, n_scenarios, chunk_size))
+    ]
+    keep = tail_size(n_scenarios, alphas)
+    workers = min(max_workers or scenario_pool.workers, len(chunks))
+    groups = [chunks[worker::workers] for worker in range(workers)]
+
+    if workers <= 1:
+        partials = [_simulate_chunks(model, seed, chunks, keep)]
+    else:
+        partials = scenario_pool.map(
+            _simulate_chunks, [model] * workers, [seed] * workers, groups, [keep] * workers
+        )
+
+    accumulator = _TailAccumulator(keep)
+    for partial in partials:
+        accumulator.merge(partial)
+    count = accumulator.count
+    mean = accumulator.total / count
+    variance = (accumulator.squares - count * np.square(mean)) / max(count - 1, 1)
+    # The tail arrives as (scenario, horizon, portfolio); results are (portfolio, horizon).
+    var, cvar = tail_from_smallest(
+        np.sort(accumulator.smallest, axis=0), count, alphas, ties=accumulator.ties
+    )
+    return ScenarioRisk(
+        horizons=horizons,
+        alphas=alphas,
+        n_scenarios=n_scenarios,
+        mean=mean.T,
+        volatility=np.sqrt(np.clip(variance, 0.0, None)).T,
+        var=var.transpose(2, 1, 0),
+        cvar=cvar.transpose(2, 1, 0),
+    )
@@ -1,3 +1,26 @@
-from .engine import BacktestOutput, run_backtest
+from .continuation import BacktestCheckpoint, continue_backtest, run_resumable_backtest
+from .engine import (
+    BacktestOutput,
+    ProgressCallback,
+    WeightSchedule,
+    apply_weight_schedule,
+    compute_weight_schedule,
+    run_backtest,
+)
+from .grid import GridCell, GridResult, build_grid, run_backtest_grid
 
-__all__ = ["BacktestOutput", "run_backtest"]
+__all__ = [
+    "BacktestCheckpoint",
+    "BacktestOutput",
+    "GridCell",
+    "GridResult",
+    "ProgressCallback",
+    "WeightSchedule",
+    "apply_weight_schedule",
+    "build_grid",
+    "compute_weight_schedule",
+    "continue_backtest",
+    "run_backtest",
+    "run_backtest_grid",
+    "run_resumable_backtest",
+]
@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import math
+from dataclasses import asdict, dataclass, replace
+
+import numpy as np
+import pandas as pd
+
+from .. import telemetry
+from ..analytics.covariance import CovarianceMethod
+from ..data.panels import select_field
+from .engine import (
+    MAX_VOL_SCALE,
+    VOL_EWMA_ALPHA,
+    BacktestOutput,
+    ProgressCallback,
+    Strategy,
+    WeightSchedule,
+    _apply_schedule,
+    _finalize,
+    _rebalance_positions,
+    _simple_returns,
+    compute_weight_schedule,
+    daily_vol_target,
+)
+
+
+@dataclass
+class EwmaVolState:
+    """Running state of ``Series.ewm(alpha=VOL_EWMA_ALPHA, adjust=False).std()``.
+
+    Follows pandas' recursion step for step, so a series fed through
+    :meth:`update` one value at a time gives bit-identical volatilities.
+    """
+
+    mean: float = math.nan
+    cov: float = 0.0
+    sum_wt: float = 1.0
+    sum_wt2: float = 1.0
+    old_wt: float = 1.0
+    nobs: int = 0
+
+    def update(self, value: float) -> float:
+        """Add the next value; returns the volatility including it (NaN while undefined)."""
+        # pandas stores the decay as a center of mass and converts it back.
+        alpha = 1.0 / (1.0 + (1 - VOL_EWMA_ALPHA) / VOL_EWMA_ALPHA)
+        decay = 1.0 - alpha
+        observed = value == value
+        self.nobs += observed
+        if self.mean == self.mean:
+            self.sum_wt *= decay
+            self.sum_wt2 *= decay * decay
+            self.old_wt *= decay
+            if observed:
+                old_mean = self.mean
+                if self.mean != value:
+                    self.mean = (self.old_wt * old_mean + alpha * value) / (self.old_wt + alpha)
+                drift = old_mean - self.mean
+                deviation = value - self.mean
+                self.cov = (
+                    self.old_wt * (self.cov + drift * drift) + alpha * (deviation * deviation)
+                ) / (self.old_wt + alpha)
+                self.sum_wt += alpha
+                self.sum_wt2 += alpha * alpha
+                self.old_wt += alpha
+                self.sum_wt /= self.old_wt
+                self.sum_wt2 /= self.old_wt * self.old_wt
+                self.old_wt = 1.0
+        elif observed:
+            self.mean = value
+        if self.nobs < 1:
+            return math.nan
+        numerator = self.sum_wt * self.sum_wt
+        denominator = numerator - self.sum_wt2
+        if denominator <= 0:
+            return math.nan
+        return math.sqrt(max((numerator / denominator) * self.cov, 0.0))
+
+
+@dataclass
+class BacktestCheckpoint:
+    """Engine state after the last bar of a run, enough to extend it over later bars.
+
+    Rebalance dates are the period ends that fall on a bar, so appending bars
+    never changes the rebalances a run already made and a continuation only
+    computes what follows ``last_date``. ``window_start`` is the first bar the
+    lookback window of the next rebalance reads.
+    """
+
+    last_date: pd.Timestamp
+    last_rebalance: pd.Timestamp
+    window_start: pd.Timestamp
+    tickers: list[str]
+    # Weights held at the close of the last bar, and the equity level there.
+    weights: np.ndarray
+    equity: float
+    # Vol-target overlay state after the last bar; None without an overlay.
+    vol: EwmaVolState | None = None
+    # Turnover and costs accumulated over the whole run.
+    turnover: float = 0.0
+    costs: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "last_date": self.last_date.isoformat(),
+            "last_rebalance": self.last_rebalance.isoformat(),
+            "window_start": self.window_start.isoformat(),
+            "tickers": list(self.tickers),
+            "weights": self.weights.tolist(),
+            "equity": self.equity,
+            "vol": asdict(self.vol) if self.vol is not None else None,
+            "turnover": self.turnover,
+            "costs": self.costs,
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> BacktestCheckpoint:
+        vol = payload.get("vol")
+        return cls(
+            last_date=pd.Timestamp(payload["last_date"]),
+            last_rebalance=pd.Timestamp(payload["last_rebalance"]),
+            window_start=pd.Timestamp(payload["window_start"]),
+            tickers=list(payload["tickers"]),
+            weights=np.asarray(payload["weights"], dtype=float),
+            equity=float(payload["equity"]),
+            vol=EwmaVolState(**vol) if vol is not None else None,
+            turnover=float(payload.get("turnover", 0.0)),
+            costs=float(payload.get("costs", 0.0)),
+        )
+
+
+def _vol_state(values: np.ndarray, state: EwmaVolState | None = None) -> EwmaVolState:
+    state = replace(state) if state is not None else EwmaVolState()
+    for value in values:
+        state.update(value)
+    return state
+
+
+def _checkpoint(
+    prices: pd.DataFrame,
+    output: BacktestOutput,
+    last_rebalance: pd.Timestamp,
+    lookback: int,
+    vol: EwmaVolState | None,
+    turnover: float,
+    costs: float,
+) -> BacktestCheckpoint:
+    last = len(prices) - 1
+    return BacktestCheckpoint(
+        last_date=prices.index[last],
+        last_rebalance=last_rebalance,
+        # compute_weight_schedule reads lookback + 21 bars up to each rebalance.
+        window_start=prices.index[max(0, last - (lookback + 21))],
+        tickers=[str(ticker) for ticker in prices.columns],
+        weights=output.weights.iloc[-1].to_numpy(dtype=float),
+        equity=float(output.equity_curve.iloc[-1]),
+        vol=vol,
+        turnover=turnover,
+        costs=costs,
+    )
+
+
+def run_resumable_backtest(
+    ohlcv: pd.DataFrame,
+    strategy: Strategy,
+    rebalance: str = "M",
+    transaction_cost_bps: float = 5.0,
+    slippage_bps: float = 2.0,
+    lookback: int = 126,
+    max_weight: float | None = None,
+    vol_target: float | None = None,
+    cov_estimator: CovarianceMethod = "sample",
+    progress: ProgressCallback | None = None,
+) -> tuple[BacktestOutput, BacktestCheckpoint | None]:
+    """:func:`app.backtest.run_backtest` (vectorized), plus a checkpoint to extend it from.
+
+    The checkpoint is ``None`` when there are no returns to backtest.
+    """
+    with telemetry.stage("align"):
+        prices = select_field(ohlcv)
+        returns = _simple_returns(prices)
+    if returns.empty:
+        empty = pd.Series(dtype=float)
+        return BacktestOutput(empty, empty, pd.DataFrame(), empty, empty), None
+
+    schedule = compute_weight_schedule(
+        prices, returns, strategy, rebalance, lookback, max_weight, cov_estimator, progress
+    )
+    with telemetry.stage("apply"):
+        gross, weights, turnover, costs = _apply_schedule(
+            prices, returns, schedule, transaction_cost_bps, slippage_bps
+        )
+        output = _finalize(
+            gross,
+            weights,
+            turnover,
+            costs,
+            strategy,
+            vol_target,
+            rebalance_dates=prices.index[schedule.positions],
+        )
+        vol = None
+        if daily_vol_target(strategy, vol_target) is not None:
+            vol = _vol_state(gross.values)
+    checkpoint = _checkpoint(
+        prices,
+        output,
+        output.rebalance_dates[-1],
+        lookback,
+        vol,
+        float(np.nansum(turnover.values)),
+        float(np.nansum(costs.values)),
+    )
+    return output, checkpoint
+
+
+def continue_backtest(
+    prior: BacktestOutput,
+    checkpoint: BacktestCheckpoint,
+    ohlcv: pd.DataFrame,
+    strategy: Strategy,
+    rebalance: str = "M",
+    transaction_cost_bps: float = 5.0,
+    slippage_bps: float = 2.0,
+    lookback: int = 126,
+    max_weight: float | None = None,
+    vol_target: float | None = None,
+    cov_estimator: CovarianceMethod = "sample",
+    progress: ProgressCallback | None = None,
+) -> tuple[BacktestOutput, BacktestCheckpoint]:
+    """Extend ``prior`` over the bars of ``ohlcv`` after ``checkpoint.last_date``.
+
+    ``ohlcv`` needs to cover ``checkpoint.window_start`` onwards only and only
+    the new rebalances are computed, so the cost depends on the new bars and
+    the lookback rather than on the length of the history. The parameters must
+    be those of the run that produced ``prior``; the result matches a full
+    rerun over the combined bars.
+    """
+    with telemetry.stage("align"):
+        prices = select_field(ohlcv)
+        missing = [ticker for ticker in checkpoint.tickers if ticker not in prices.columns]
+        if missing:
+            raise ValueError(f"No bars for {', '.join(missing)} to continue the run with.")
+        prices = prices.loc[checkpoint.window_start :, checkpoint.tickers]
+        returns = _simple_returns(prices)
+    last = int(prices.index.get_indexer([checkpoint.last_date])[0])
+    if last < 0:
+        raise ValueError(f"Bars do not include the run's last date {checkpoint.last_date.date()}.")
+    if last == len(prices) - 1:
+        return prior, checkpoint
+
+    positions = _rebalance_positions(prices, rebalance)
+    schedule = compute_weight_schedule(
+        prices,
+        returns,
+        strategy,
+        rebalance,
+        lookback,
+        max_weight,
+        cov_estimator,
+        progress,
+        positions=positions[positions > last],
+    )
+    with telemetry.stage("apply"):
+        # The run's last bar leads the schedule, so its weights carry into the new bars.
+        tail = WeightSchedule(
+            positions=np.concatenate([[0], schedule.positions - last]),
+            weights=np.vstack([checkpoint.weights, schedule.weights]),
+        )
+        gross, weights, turnover, costs = _apply_schedule(
+            prices.iloc[last:], returns, tail, transaction_cost_bps, slippage_bps
+        )
+        gross, weights = gross.iloc[1:], weights.iloc[1:]
+        turnover, costs = turnover.iloc[1:], costs.iloc[1:]
+
+        vol = checkpoint.vol
+        daily_target = daily_vol_target(strategy, vol_target)
+        if daily_target is not None:
+            vol = replace(vol) if vol is not None else EwmaVolState()
+            ewma_vol = np.array([vol.update(value) for value in gross.values])
+            with np.errstate(divide="ignore", invalid="ignore"):
+                scale = daily_target / np.where(ewma_vol == 0, np.nan, ewma_vol)
+            gross = gross * np.nan_to_num(np.clip(scale, 0, MAX_VOL_SCALE), nan=1.0)
+        # Chained from the last equity level, the same product a full run accumulates.
+        equity = np.cumprod(np.concatenate([[checkpoint.equity], 1 + gross.values]))[1:]
+
+        new_rebalances = prices.index[schedule.positions]
+        rebalance_dates = new_rebalances
+        if prior.rebalance_dates is not None:
+            rebalance_dates = prior.rebalance_dates.append(new_rebalances)
+        output = BacktestOutput(
+            equity_curve=pd.concat([prior.equity_curve, pd.Series(equity, index=gross.index)]),
+            returns=pd.concat([prior.returns, gross]),
+            weights=pd.concat([prior.weights.reindex(columns=checkpoint.tickers), weights]),
+            turnover=pd.concat([prior.turnover, turnover]),
+            costs=pd.concat([prior.costs, costs]),
+            rebalance_dates=rebalance_dates,
+        )
+    checkpoint = _checkpoint(
+        prices,
+        output,
+        new_rebalances[-1] if len(new_rebalances) else checkpoint.last_rebalance,
+        lookback,
+        vol,
+        checkpoint.turnover + float(np.nansum(turnover.values)),
+        checkpoint.costs + float(np.nansum(costs.values)),
+    )
+    return output, checkpoint
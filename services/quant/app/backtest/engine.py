@@ -1,11 +1,17 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Literal
+from typing import Callable, Literal
 
 import numpy as np
 import pandas as pd
 
+from .. import telemetry
+from ..analytics.covariance import Covariance, CovarianceMethod, as_dense, estimate_covariance
+from ..data.panels import select_field
+from ..optimize.cvar import CVaRSolver
+from ..optimize.risk_parity import solve_risk_parity_batch
+from .moments import RollingMoments
 from .strategies import cvar_min, equal_weight, min_variance, momentum_12_1, risk_parity
 
 Strategy = Literal[
@@ -17,6 +23,19 @@ Strategy = Literal[
     "vol_target",
     "cvar_min",
 ]
+EngineMode = Literal["vectorized", "loop"]
+# Called with (completed rebalances, total rebalances) as weights are computed.
+ProgressCallback = Callable[[int, int], None]
+
+# Strategies whose weights never depend on the lookback window.
+_STATIC_STRATEGIES = {"buy_and_hold", "equal_weight", "vol_target"}
+# Strategies that only need the covariance of the lookback window.
+_COVARIANCE_STRATEGIES = {"min_variance", "risk_parity"}
+# Rebalance windows whose risk-parity problems are stacked into one batched solve.
+_RISK_PARITY_BATCH = 64
+# Vol-target overlay: EWMA decay of the portfolio volatility and the leverage cap.
+VOL_EWMA_ALPHA = 1 - 0.94
+MAX_VOL_SCALE = 2.5
 
 
 @dataclass
@@ -26,15 +45,23 @@ class BacktestOutput:
     weights: pd.DataFrame
     turnover: pd.Series
     costs: pd.Series
+    rebalance_dates: pd.DatetimeIndex | None = None
 
 
-def _extract_prices(ohlcv: pd.DataFrame) -> pd.DataFrame:
-    if isinstance(ohlcv.columns, pd.MultiIndex):
-        field = "adj_close" if "adj_close" in ohlcv.columns.levels[1] else "close"
-        prices = ohlcv.xs(field, level=1, axis=1)
-    else:
-        prices = ohlcv
-    return prices.dropna(how="all")
+def _simple_returns(prices: pd.DataFrame) -> pd.DataFrame:
+    # float32 panels lose too much precision in the differences of nearby prices.
+    prices = prices.astype(float, copy=False)
+    values = prices.to_numpy()
+    if np.isnan(values).any():
+        # Gaps are padded, as pct_change's deprecated default fill did.
+        return prices.ffill().pct_change(fill_method=None).dropna(how="all")
+    # Without gaps pct_change is the ratio of consecutive rows; its first row is all NaN.
+    returns = pd.DataFrame(
+        values[1:] / values[:-1] - 1, index=prices.index[1:], columns=prices.columns
+    )
+    if np.isnan(returns.values).all(axis=1).any():
+        returns = returns.dropna(how="all")
+    return returns
 
 
 def _rebalance_dates(prices: pd.DataFrame, freq: str) -> list[pd.Timestamp]:
@@ -42,78 +69,376 @@ def _rebalance_dates(prices: pd.DataFrame, freq: str) -> list[pd.Timestamp]:
     return [date for date in resampled if date in prices.index]
 
 
+def _rebalance_positions(prices: pd.DataFrame, freq: str) -> np.ndarray:
+    """Row positions of the rebalance dates, always including the first row."""
+    resampled = prices.index.to_series().resample(freq).last().index
+    positions = prices.index.get_indexer(resampled[resampled.isin(prices.index)])
+    return np.union1d([0], positions).astype(np.int64)
+
+
 def _compute_weights(
     strategy: Strategy,
     prices: pd.DataFrame,
     returns: pd.DataFrame,
     current: np.ndarray | None,
     max_weight: float | None,
+    cov: Covariance | None = None,
+    cov_estimator: CovarianceMethod = "sample",
+    cvar_solver: CVaRSolver | None = None,
 ) -> np.ndarray:
     if strategy == "buy_and_hold" and current is not None:
         return current
-    if strategy == "buy_and_hold" or strategy == "equal_weight" or strategy == "vol_target":
+    if strategy in _STATIC_STRATEGIES:
         return equal_weight(prices.shape[1])
     if strategy == "momentum_12_1":
         return momentum_12_1(prices)
+    if strategy in ("min_variance", "risk_parity", "cvar_min") and len(returns) < 2:
+        # The first rebalance has no return history to estimate from yet.
+        return equal_weight(prices.shape[1])
+    if cov is None and strategy in _COVARIANCE_STRATEGIES and cov_estimator != "sample":
+        cov = estimate_covariance(returns, cov_estimator)
     if strategy == "min_variance":
-        return min_variance(returns, max_weight=max_weight)
+        return min_variance(returns, max_weight=max_weight, cov=cov)
     if strategy == "risk_parity":
-        return risk_parity(returns)
+        return risk_parity(returns, cov=cov, x0=current)
     if strategy == "cvar_min":
-        return cvar_min(returns, max_weight=max_weight)
+        return cvar_min(returns, max_weight=max_weight, solver=cvar_solver)
     return equal_weight(prices.shape[1])
 
 
-def run_backtest(
-    ohlcv: pd.DataFrame,
+@dataclass
+class WeightSchedule:
+    """Target weights computed on rebalance rows only.
+
+    ``positions`` are row positions into the price index and ``weights`` holds one
+    row of target weights per position.
+    """
+
+    positions: np.ndarray
+    weights: np.ndarray
+
+
+def compute_weight_schedule(
+    prices: pd.DataFrame,
+    returns: pd.DataFrame,
     strategy: Strategy,
     rebalance: str = "M",
-    transaction_cost_bps: float = 5.0,
-    slippage_bps: float = 2.0,
     lookback: int = 126,
     max_weight: float | None = None,
+    cov_estimator: CovarianceMethod = "sample",
+    progress: ProgressCallback | None = None,
+    positions: np.ndarray | None = None,
+) -> WeightSchedule:
+    """Target weights at the rebalance rows of ``prices``.
+
+    ``positions`` overrides the rebalance rows, e.g. to compute only those after
+    a checkpoint (see ``app.backtest.continuation``).
+    """
+    if positions is None:
+        positions = _rebalance_positions(prices, rebalance)
+    total = len(positions)
+    if strategy in _STATIC_STRATEGIES:
+        weights = np.tile(equal_weight(prices.shape[1]), (total, 1))
+        if progress is not None:
+            progress(total, total)
+        return WeightSchedule(positions=positions, weights=weights)
+
+    if strategy == "momentum_12_1":
+        # Only reads prices, so windows are array slices rather than frames.
+        values = prices.values
+        weights = np.empty((total, prices.shape[1]), dtype=float)
+        for row, position in enumerate(positions):
+            with telemetry.stage("weights"):
+                weights[row] = momentum_12_1(
+                    values[max(0, position + 1 - (lookback + 21)) : position + 1]
+                )
+            if progress is not None:
+                progress(row + 1, total)
+        return WeightSchedule(positions=positions, weights=weights)
+
+    return_ends = returns.index.searchsorted(prices.index[positions], side="right")
+    if strategy == "risk_parity":
+        weights = _risk_parity_schedule(returns, return_ends, lookback, cov_estimator, progress)
+        return WeightSchedule(positions=positions, weights=weights)
+
+    weights = np.empty((len(positions), prices.shape[1]), dtype=float)
+    # With the sample estimator, covariance strategies read the window covariance from
+    # running sums instead of recomputing it from the raw window at every rebalance.
+    use_moments = strategy in _COVARIANCE_STRATEGIES and cov_estimator == "sample"
+    moments = RollingMoments(returns.values) if use_moments else None
+    # Consecutive CVaR windows overlap, so each solve starts from the previous basis.
+    cvar_solver = CVaRSolver() if strategy == "cvar_min" else None
+
+    current: np.ndarray | None = None
+    for row, (position, return_end) in enumerate(zip(positions, return_ends)):
+        return_start = max(0, return_end - lookback)
+        window_prices = prices.iloc[max(0, position + 1 - (lookback + 21)) : position + 1]
+        window_returns = returns.iloc[return_start:return_end]
+        cov = None
+        if moments is not None:
+            moments.move(return_start, return_end)
+            cov = moments.cov()
+        with telemetry.stage("weights"):
+            current = _compute_weights(
+                strategy,
+                window_prices,
+                window_returns,
+                current,
+                max_weight,
+                cov=cov,
+                cov_estimator=cov_estimator,
+                cvar_solver=cvar_solver,
+            )
+        weights[row] = current
+        if progress is not None:
+            progress(row + 1, total)
+    return WeightSchedule(positions=positions, weights=weights)
+
+
+def _risk_parity_schedule(
+    returns: pd.DataFrame,
+    return_ends: np.ndarray,
+    lookback: int,
+    cov_estimator: CovarianceMethod,
+    progress: ProgressCallback | None = None,
+) -> np.ndarray:
+    """Risk-parity weights for every rebalance, solved in batches of stacked covariances."""
+    n_assets = returns.shape[1]
+    moments = RollingMoments(returns.values) if cov_estimator == "sample" else None
+    weights = np.empty((len(return_ends), n_assets), dtype=float)
+    for first in range(0, len(return_ends), _RISK_PARITY_BATCH):
+        ends = return_ends[first : first + _RISK_PARITY_BATCH]
+        covs = np.empty((len(ends), n_assets, n_assets), dtype=float)
+        for row, return_end in enumerate(ends):
+            return_start = max(0, return_end - lookback)
+            if return_end - return_start < 2:
+                # Non-finite covariances come back as equal weights.
+                covs[row] = np.nan
+            elif moments is not None:
+                moments.move(return_start, return_end)
+                covs[row] = moments.cov()
+            else:
+                window = returns.iloc[return_start:return_end]
+                covs[row] = as_dense(estimate_covariance(window, cov_estimator))
+        with telemetry.stage("weights"):
+            weights[first : first + len(ends)] = solve_risk_parity_batch(covs)[0]
+        if progress is not None:
+            progress(first + len(ends), len(return_ends))
+    return weights
+
+
+def apply_weight_schedule(
+    prices: pd.DataFrame,
+    returns: pd.DataFrame,
+    schedule: WeightSchedule,
+    strategy: Strategy,
+    transaction_cost_bps: float = 5.0,
+    slippage_bps: float = 2.0,
     vol_target: float | None = None,
 ) -> BacktestOutput:
-    prices = _extract_prices(ohlcv)
-    returns = prices.pct_change().dropna(how="all")
-    if returns.empty:
-        empty = pd.Series(dtype=float)
-        return BacktestOutput(empty, empty, pd.DataFrame(), empty, empty)
+    portfolio_returns, weights, turnover, costs = _apply_schedule(
+        prices, returns, schedule, transaction_cost_bps, slippage_bps
+    )
+    return _finalize(
+        portfolio_returns,
+        weights,
+        turnover,
+        costs,
+        strategy,
+        vol_target,
+        rebalance_dates=prices.index[schedule.positions],
+    )
+
+
+def _apply_schedule(
+    prices: pd.DataFrame,
+    returns: pd.DataFrame,
+    schedule: WeightSchedule,
+    transaction_cost_bps: float,
+    slippage_bps: float,
+) -> tuple[pd.Series, pd.DataFrame, pd.Series, pd.Series]:
+    """Daily portfolio returns before any vol overlay, weights, turnover and costs."""
+    index = prices.index
+    n_rows = len(index)
+    cost_rate = (transaction_cost_bps + slippage_bps) / 10000
+
+    fill = np.searchsorted(schedule.positions, np.arange(n_rows), side="right") - 1
+    weights = pd.DataFrame(schedule.weights[fill], index=index, columns=prices.columns)
+    if np.isnan(schedule.weights).any():
+        weights = weights.ffill().fillna(0)
+
+    turnover_values = np.zeros(n_rows)
+    turnover_values[schedule.positions[1:]] = np.abs(np.diff(schedule.weights, axis=0)).sum(axis=1)
+    cost_values = turnover_values * cost_rate
+
+    # Weights held into each row are the previous row's; the first row earns nothing.
+    if returns.index.equals(index[1:]) and returns.columns.equals(prices.columns):
+        aligned_returns = returns.values
+    else:
+        aligned_returns = returns.reindex(index=index[1:], columns=prices.columns).values
+    contributions = weights.values[:-1] * aligned_returns
+    if np.isnan(contributions).any():
+        earned = np.nansum(contributions, axis=1)
+    else:
+        earned = contributions.sum(axis=1)
+    portfolio_values = np.concatenate([[0.0], earned]) - np.nan_to_num(cost_values)
+    return (
+        pd.Series(portfolio_values, index=index),
+        weights,
+        pd.Series(turnover_values, index=index),
+        pd.Series(cost_values, index=index),
+    )
+
+
+def daily_vol_target(strategy: Strategy, vol_target: float | None) -> float | None:
+    """Daily volatility the overlay scales returns to, or ``None`` without an overlay."""
+    if strategy == "vol_target" or vol_target is not None:
+        return (vol_target or 0.1) / np.sqrt(252)
+    return None
+
+
+def _finalize(
+    portfolio_returns: pd.Series,
+    weights: pd.DataFrame,
+    turnover: pd.Series,
+    costs: pd.Series,
+    strategy: Strategy,
+    vol_target: float | None,
+    rebalance_dates: pd.DatetimeIndex | None = None,
+) -> BacktestOutput:
+    daily_target = daily_vol_target(strategy, vol_target)
+    if daily_target is not None:
+        ewma = portfolio_returns.ewm(alpha=VOL_EWMA_ALPHA, adjust=False)
+        ewma_vol = ewma.std().replace(0, np.nan)
+        scale = (daily_target / ewma_vol).clip(lower=0, upper=MAX_VOL_SCALE).fillna(1.0)
+        portfolio_returns = portfolio_returns * scale
+
+    equity_curve = (1 + portfolio_returns).cumprod()
+    return BacktestOutput(
+        equity_curve=equity_curve,
+        returns=portfolio_returns,
+        weights=weights,
+        turnover=turnover,
+        costs=costs,
+        rebalance_dates=rebalance_dates,
+    )
+
 
-    rebal_dates = _rebalance_dates(prices, rebalance)
+def _run_loop(
+    prices: pd.DataFrame,
+    returns: pd.DataFrame,
+    strategy: Strategy,
+    rebalance: str,
+    transaction_cost_bps: float,
+    slippage_bps: float,
+    lookback: int,
+    max_weight: float | None,
+    vol_target: float | None,
+    cov_estimator: CovarianceMethod = "sample",
+    progress: ProgressCallback | None = None,
+) -> BacktestOutput:
+    rebal_dates = set(_rebalance_dates(prices, rebalance))
+    total = len(rebal_dates | {prices.index[0]})
     weights = pd.DataFrame(index=prices.index, columns=prices.columns, dtype=float)
     current: np.ndarray | None = None
     costs = pd.Series(0.0, index=prices.index)
     turnover = pd.Series(0.0, index=prices.index)
     cost_rate = (transaction_cost_bps + slippage_bps) / 10000
+    rebalanced = []
+    cvar_solver = CVaRSolver() if strategy == "cvar_min" else None
 
     for date in prices.index:
         if date in rebal_dates or current is None:
+            rebalanced.append(date)
             window_prices = prices.loc[:date].tail(lookback + 21)
             window_returns = returns.loc[:date].tail(lookback)
-            new_weights = _compute_weights(strategy, window_prices, window_returns, current, max_weight)
+            new_weights = _compute_weights(
+                strategy,
+                window_prices,
+                window_returns,
+                current,
+                max_weight,
+                cov_estimator=cov_estimator,
+                cvar_solver=cvar_solver,
+            )
             if current is not None:
                 turnover.loc[date] = np.abs(new_weights - current).sum()
                 costs.loc[date] = turnover.loc[date] * cost_rate
             current = new_weights
+            if progress is not None:
+                progress(len(rebalanced), total)
         weights.loc[date] = current
 
     weights = weights.ffill().fillna(0)
     portfolio_returns = (weights.shift(1) * returns).sum(axis=1)
-    portfolio_returns = portfolio_returns.sub(costs.reindex(portfolio_returns.index).fillna(0), fill_value=0)
+    portfolio_returns = portfolio_returns.sub(
+        costs.reindex(portfolio_returns.index).fillna(0), fill_value=0
+    )
+    return _finalize(
+        portfolio_returns,
+        weights,
+        turnover,
+        costs,
+        strategy,
+        vol_target,
+        rebalance_dates=pd.DatetimeIndex(rebalanced),
+    )
 
-    if strategy == "vol_target" or vol_target is not None:
-        target = vol_target or 0.1
-        daily_target = target / np.sqrt(252)
-        ewma_vol = portfolio_returns.ewm(alpha=1 - 0.94, adjust=False).std().replace(0, np.nan)
-        scale = (daily_target / ewma_vol).clip(lower=0, upper=2.5).fillna(1.0)
-        portfolio_returns = portfolio_returns * scale
 
-    equity_curve = (1 + portfolio_returns).cumprod()
-    return BacktestOutput(
-        equity_curve=equity_curve,
-        returns=portfolio_returns,
-        weights=weights,
-        turnover=turnover,
-        costs=costs,
+def run_backtest(
+    ohlcv: pd.DataFrame,
+    strategy: Strategy,
+    rebalance: str = "M",
+    transaction_cost_bps: float = 5.0,
+    slippage_bps: float = 2.0,
+    lookback: int = 126,
+    max_weight: float | None = None,
+    vol_target: float | None = None,
+    mode: EngineMode = "vectorized",
+    cov_estimator: CovarianceMethod = "sample",
+    progress: ProgressCallback | None = None,
+) -> BacktestOutput:
+    """Run a backtest over ``ohlcv``.
+
+    ``mode="vectorized"`` computes weights on rebalance rows only and applies
+    returns, turnover and costs as whole-array operations. ``mode="loop"`` is the
+    original day-by-day reference implementation and produces the same output.
+    ``cov_estimator`` selects the covariance estimator used by the covariance
+    strategies (min_variance, risk_parity). ``progress`` is called with the
+    number of rebalances computed so far and the total.
+    """
+    with telemetry.stage("align"):
+        prices = select_field(ohlcv)
+        returns = _simple_returns(prices)
+    if returns.empty:
+        empty = pd.Series(dtype=float)
+        return BacktestOutput(empty, empty, pd.DataFrame(), empty, empty)
+
+    if mode == "loop":
+        return _run_loop(
+            prices,
+            returns,
+            strategy,
+            rebalance,
+            transaction_cost_bps,
+            slippage_bps,
+            lookback,
+            max_weight,
+            vol_target,
+            cov_estimator,
+            progress,
+        )
+
+    schedule = compute_weight_schedule(
+        prices, returns, strategy, rebalance, lookback, max_weight, cov_estimator, progress
     )
+    with telemetry.stage("apply"):
+        return apply_weight_schedule(
+            prices,
+            returns,
+            schedule,
+            strategy,
+            transaction_cost_bps=transaction_cost_bps,
+            slippage_bps=slippage_bps,
+            vol_target=vol_target,
+        )
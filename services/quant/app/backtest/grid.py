@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import itertools
+from dataclasses import dataclass, field
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from ..analytics import performance_summary
+from ..data.panels import select_field
+from ..workers import sweep_pool
+from .engine import (
+    _STATIC_STRATEGIES,
+    BacktestOutput,
+    Strategy,
+    WeightSchedule,
+    _simple_returns,
+    apply_weight_schedule,
+    compute_weight_schedule,
+)
+
+# Weight-relevant parameters of a grid cell. Cells that only differ in costs share a key.
+ScheduleKey = tuple[str, str, int | None, float | None]
+
+
+@dataclass
+class GridCell:
+    strategy: Strategy
+    rebalance: str
+    lookback: int
+    max_weight: float | None
+    transaction_cost_bps: float
+    slippage_bps: float
+
+    @property
+    def schedule_key(self) -> ScheduleKey:
+        lookback = None if self.strategy in _STATIC_STRATEGIES else self.lookback
+        uses_max_weight = self.strategy in ("min_variance", "cvar_min")
+        return (
+            self.strategy,
+            self.rebalance,
+            lookback,
+            self.max_weight if uses_max_weight else None,
+        )
+
+
+@dataclass
+class GridResult:
+    summary: pd.DataFrame
+    cells: list[GridCell] = field(default_factory=list)
+    outputs: list[BacktestOutput] = field(default_factory=list)
+
+
+def _schedules_for(
+    prices: pd.DataFrame, returns: pd.DataFrame, keys: list[ScheduleKey]
+) -> list[WeightSchedule]:
+    return [
+        compute_weight_schedule(
+            prices,
+            returns,
+            strategy,
+            rebalance=rebalance,
+            lookback=lookback or 0,
+            max_weight=max_weight,
+        )
+        for strategy, rebalance, lookback, max_weight in keys
+    ]
+
+
+def build_grid(
+    strategies: Iterable[Strategy],
+    rebalances: Iterable[str] = ("M",),
+    lookbacks: Iterable[int] = (126,),
+    max_weights: Iterable[float | None] = (None,),
+    transaction_costs_bps: Iterable[float] = (5.0,),
+    slippages_bps: Iterable[float] = (2.0,),
+) -> list[GridCell]:
+    return [
+        GridCell(*values)
+        for values in itertools.product(
+            strategies, rebalances, lookbacks, max_weights, transaction_costs_bps, slippages_bps
+        )
+    ]
+
+
+def _compute_schedules(
+    prices: pd.DataFrame,
+    returns: pd.DataFrame,
+    keys: list[ScheduleKey],
+    max_workers: int | None,
+) -> dict[ScheduleKey, WeightSchedule]:
+    workers = min(max_workers or sweep_pool.workers, len(keys))
+    if workers <= 1:
+        return dict(zip(keys, _schedules_for(prices, returns, keys)))
+
+    # One task per worker, so the panel is pickled once per worker rather than per key.
+    groups = [keys[worker::workers] for worker in range(workers)]
+    computed = sweep_pool.map(_schedules_for, [prices] * workers, [returns] * workers, groups)
+    return {
+        key: schedule
+        for group, schedules in zip(groups, computed)
+        for key, schedule in zip(group, schedules)
+    }
+
+
+def run_backtest_grid(
+    ohlcv: pd.DataFrame,
+    cells: list[GridCell],
+    vol_target: float | None = None,
+    risk_free: float = 0.0,
+    max_workers: int | None = None,
+) -> GridResult:
+    """Run every cell of a parameter grid over one shared price/return panel.
+
+    Prices are extracted and returns computed once. Weight schedules are computed
+    once per distinct (strategy, rebalance, lookback, max_weight) and fanned out over
+    up to ``max_workers`` processes of the shared sweep pool (see
+    ``app.workers.sweep_pool``); cost parameters are then applied to the shared
+    schedules.
+    """
+    prices = select_field(ohlcv)
+    returns = _simple_returns(prices)
+    if returns.empty or not cells:
+        return GridResult(summary=pd.DataFrame())
+
+    keys = list(dict.fromkeys(cell.schedule_key for cell in cells))
+    schedules = _compute_schedules(prices, returns, keys, max_workers)
+
+    rows = []
+    outputs = []
+    for cell in cells:
+        output = apply_weight_schedule(
+            prices,
+            returns,
+            schedules[cell.schedule_key],
+            cell.strategy,
+            transaction_cost_bps=cell.transaction_cost_bps,
+            slippage_bps=cell.slippage_bps,
+            vol_target=vol_target,
+        )
+        outputs.append(output)
+        metrics = performance_summary(output.returns, output.equity_curve, risk_free=risk_free)
+        rows.append(
+            {
+                "strategy": cell.strategy,
+                "rebalance": cell.rebalance,
+                "lookback": cell.lookback,
+                "max_weight": np.nan if cell.max_weight is None else cell.max_weight,
+                "transaction_cost_bps": cell.transaction_cost_bps,
+                "slippage_bps": cell.slippage_bps,
+                "turnover": float(output.turnover.sum()),
+                **metrics,
+            }
+        )
+
+    return GridResult(summary=pd.DataFrame(rows), cells=cells, outputs=outputs)
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import numpy as np
+
+# Rebuild the running sums from scratch after this many window lengths of
+# incremental updates, to keep floating-point drift bounded.
+_REBUILD_AFTER_WINDOWS = 64
+
+
+class RollingMoments:
+    """Pairwise running sums over a sliding window of return rows.
+
+    Keeps, for every asset pair, the count of jointly observed rows, the sum of
+    cross-products and the per-pair sums, so moving the window by ``k`` rows costs
+    O(k·N²) and the covariance of the current window costs O(N²). Missing values
+    are handled pairwise, matching ``DataFrame.cov``.
+    """
+
+    def __init__(self, returns: np.ndarray) -> None:
+        values = np.asarray(returns, dtype=float)
+        observed = np.isfinite(values)
+        # Centering on the full-sample mean keeps the running sums well conditioned.
+        counts = observed.sum(axis=0)
+        shift = np.divide(
+            np.where(observed, values, 0.0).sum(axis=0),
+            counts,
+            out=np.zeros(values.shape[1]),
+            where=counts > 0,
+        )
+        self._mask = observed.astype(float)
+        self._x = np.where(observed, values - shift, 0.0)
+        n_assets = values.shape[1]
+        # Without gaps every pair shares the same rows, so counts and sums collapse
+        # to a scalar and a vector.
+        self._pairwise = not observed.all()
+        shape = (n_assets, n_assets) if self._pairwise else ()
+        self._count = np.zeros(shape)
+        self._cross = np.zeros((n_assets, n_assets))
+        self._sums = np.zeros(shape if self._pairwise else n_assets)
+        self._start = 0
+        self._end = 0
+        self._updated_rows = 0
+
+    def _update(self, start: int, end: int, sign: float) -> None:
+        if end <= start:
+            return
+        x = self._x[start:end]
+        self._cross += sign * (x.T @ x)
+        if self._pairwise:
+            mask = self._mask[start:end]
+            self._count += sign * (mask.T @ mask)
+            self._sums += sign * (x.T @ mask)
+        else:
+            self._count += sign * (end - start)
+            self._sums += sign * x.sum(axis=0)
+        self._updated_rows += end - start
+
+    def _slide(self, added: slice, removed: slice) -> None:
+        # One product for the rows entering and leaving the window together.
+        rows = np.concatenate([self._x[added], self._x[removed]])
+        signs = np.concatenate(
+            [np.ones(added.stop - added.start), -np.ones(removed.stop - removed.start)]
+        )
+        self._cross += (rows * signs[:, None]).T @ rows
+        self._sums += signs @ rows
+        self._count += signs.sum()
+        self._updated_rows += len(rows)
+
+    def _reset(self, start: int, end: int) -> None:
+        self._count = np.zeros_like(self._count)
+        self._cross[:] = 0
+        self._sums[:] = 0
+        self._updated_rows = 0
+        self._update(start, end, 1.0)
+        self._start, self._end = start, end
+
+    def move(self, start: int, end: int) -> None:
+        """Slide the window to rows ``[start, end)``."""
+        length = max(end - start, 1)
+        incremental = (abs(start - self._start) + abs(end - self._end)) < length
+        if not incremental or self._updated_rows > _REBUILD_AFTER_WINDOWS * length:
+            self._reset(start, end)
+            return
+        if not self._pairwise and start >= self._start and end >= self._end:
+            self._slide(slice(self._end, end), slice(self._start, start))
+            self._start, self._end = start, end
+            return
+        if end > self._end:
+            self._update(self._end, end, 1.0)
+        elif end < self._end:
+            self._update(end, self._end, -1.0)
+        if start > self._start:
+            self._update(self._start, start, -1.0)
+        elif start < self._start:
+            self._update(start, self._start, 1.0)
+        self._start, self._end = start, end
+
+    def cov(self) -> np.ndarray:
+        """Sample covariance (ddof=1) of the current window."""
+        count = self._count
+        if not self._pairwise:
+            if count < 2:
+                return np.full(self._cross.shape, np.nan)
+            # In-place to avoid temporaries; allocation dominates at this size.
+            cov = np.multiply.outer(self._sums, self._sums)
+            cov *= -1.0 / count
+            cov += self._cross
+            cov *= 1.0 / (count - 1)
+            return cov
+        with np.errstate(divide="ignore", invalid="ignore"):
+            centered = self._cross - self._sums * self._sums.T / count
+            cov = centered / (count - 1)
+        cov = (cov + cov.T) / 2
+        cov[count < 2] = np.nan
+        return cov
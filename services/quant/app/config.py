@@ -1,4 +1,6 @@
+from datetime import date
 from pathlib import Path
+from typing import Literal
 from pydantic_settings import BaseSettings
 
 DEFAULT_UNIVERSE = [
@@ -21,6 +23,28 @@ class Settings(BaseSettings):
     runs_dir: Path = Path("data/runs")
     fred_api_key: str | None = None
     default_universe: list[str] = DEFAULT_UNIVERSE
+    fetch_workers: int = 8
+    panel_cache_bytes: int = 512 * 1024 * 1024
+    panel_cache_ttl: float | None = 300.0
+    # Storage dtype of loaded panels; float32 halves their memory (~7 significant digits).
+    panel_dtype: Literal["float64", "float32"] = "float64"
+    # Serve the default universe from memory-mapped panels under cache_dir/panels,
+    # shared by every worker process (see app.data.shared).
+    shared_panels: bool = False
+    shared_panel_start: date = date(2000, 1, 1)
+    result_cache_bytes: int = 256 * 1024 * 1024
+    result_cache_disk_bytes: int = 2 * 1024 * 1024 * 1024
+    sweep_max_cells: int = 500
+    sweep_workers: int | None = None
+    scenario_workers: int | None = None
+    # Processes for CPU-heavy routes; None uses every core, 0 runs them in threads.
+    compute_workers: int | None = None
+    compute_queue_depth: int = 32
+    compute_timeout: float | None = 120.0
+    # Import cvxpy/HiGHS after startup, in each compute worker, instead of on first use.
+    warmup_solvers: bool = False
+    # Add an X-Timing stage breakdown to every response, not only when a request asks.
+    timing_header: bool = False
 
     class Config:
         env_prefix = "QUANT_"
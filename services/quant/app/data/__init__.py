@@ -1,11 +1,45 @@
+from .cache import ohlcv_version
 from .factors import download_french_factors, load_french_factors
 from .fred import fetch_fred_series
-from .market import load_ohlcv, load_ticker_ohlcv
+from .market import (
+    get_fetcher,
+    load_field,
+    load_ohlcv,
+    load_ticker_ohlcv,
+    set_fetcher,
+    store_covers,
+    yfinance_fetcher,
+)
+from .panels import (
+    Panel,
+    load_price_panel,
+    load_prices,
+    load_return_panel,
+    load_returns,
+    panel_cache,
+    select_field,
+)
+from .shared import publish_shared_panels, shared_panels
 
 __all__ = [
     "download_french_factors",
     "load_french_factors",
     "fetch_fred_series",
     "load_ohlcv",
+    "load_field",
     "load_ticker_ohlcv",
+    "get_fetcher",
+    "set_fetcher",
+    "yfinance_fetcher",
+    "load_prices",
+    "load_returns",
+    "load_price_panel",
+    "load_return_panel",
+    "Panel",
+    "select_field",
+    "publish_shared_panels",
+    "shared_panels",
+    "panel_cache",
+    "ohlcv_version",
+    "store_covers",
 ]
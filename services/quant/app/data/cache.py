@@ -1,12 +1,27 @@
 from __future__ import annotations
 
+import hashlib
+import os
+import threading
+import time
 from pathlib import Path
-from typing import Optional
+from typing import NamedTuple, Optional
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
 from ..config import settings
 
+# Bars per parquet row group; roughly a quarter of daily data, so range reads can
+# skip most of a year file using the row-group min/max statistics.
+OHLCV_ROW_GROUP_SIZE = 64
+# Once a year partition holds this many part files it is rewritten as one file.
+OHLCV_COMPACT_PARTS = 32
+
+_generation = 0
+
 
 def ensure_cache_dir(path: Optional[Path] = None) -> Path:
     cache_dir = path or settings.cache_dir
@@ -28,3 +43,187 @@ def read_parquet(path: Path) -> pd.DataFrame | None:
 def write_parquet(path: Path, frame: pd.DataFrame) -> None:
     ensure_cache_dir(path.parent)
     frame.to_parquet(path)
+
+
+class OhlcvPart(NamedTuple):
+    path: Path
+    first: pd.Timestamp
+    last: pd.Timestamp
+    sequence: int
+
+
+def _generation_path() -> Path:
+    return ohlcv_root() / "GENERATION"
+
+
+def store_generation() -> tuple[int, str]:
+    """Changes on every OHLCV write, made by this process or any other one.
+
+    Writes bump a counter of this process and stamp the store's ``GENERATION``
+    file with a new token, which is how other processes sharing the store see them.
+    """
+    try:
+        token = _generation_path().read_text()
+    except FileNotFoundError:
+        token = ""
+    return _generation, token
+
+
+def _bump_generation() -> None:
+    global _generation
+    _generation += 1
+    path = _generation_path()
+    tmp = path.with_name(f".GENERATION.{os.getpid()}.{threading.get_ident()}")
+    tmp.write_text(f"{time.time_ns()}-{os.getpid()}-{_generation}")
+    os.replace(tmp, path)
+
+
+def ohlcv_root() -> Path:
+    return settings.cache_dir / "ohlcv"
+
+
+def _ticker_dir(ticker: str) -> Path:
+    return ohlcv_root() / f"ticker={ticker}"
+
+
+def _parse_part(path: Path) -> OhlcvPart:
+    # part-<first>-<last>-<sequence>.parquet
+    _, first, last, sequence = path.stem.split("-")
+    return OhlcvPart(path, pd.Timestamp(first), pd.Timestamp(last), int(sequence))
+
+
+def ohlcv_parts(ticker: str) -> list[OhlcvPart]:
+    """Stored part files for ``ticker`` in write order, read from file names only."""
+    ticker_dir = _ticker_dir(ticker)
+    if not ticker_dir.exists():
+        return []
+    parts = [_parse_part(path) for path in ticker_dir.glob("year=*/part-*.parquet")]
+    return sorted(parts, key=lambda part: part.sequence)
+
+
+def ohlcv_range(ticker: str) -> tuple[pd.Timestamp, pd.Timestamp] | None:
+    parts = ohlcv_parts(ticker)
+    if not parts:
+        return None
+    return min(part.first for part in parts), max(part.last for part in parts)
+
+
+def ohlcv_version(tickers: list[str]) -> str:
+    """Fingerprint of the stored bars for ``tickers``.
+
+    Built from part file names only. Any append or compaction writes a new part
+    file, so the fingerprint changes whenever stored bars may have changed.
+    """
+    digest = hashlib.sha256()
+    for ticker in sorted(set(tickers)):
+        digest.update(f"{ticker}:".encode())
+        for part in ohlcv_parts(ticker):
+            digest.update(part.path.name.encode())
+    return digest.hexdigest()[:16]
+
+
+def _to_table(frame: pd.DataFrame) -> pa.Table:
+    frame = frame.astype(float)
+    frame.index = pd.DatetimeIndex(frame.index).tz_localize(None).rename("date")
+    return pa.Table.from_pandas(frame.sort_index().reset_index(), preserve_index=False)
+
+
+def _write_part(ticker: str, year: int, frame: pd.DataFrame) -> Path:
+    year_dir = _ticker_dir(ticker) / f"year={year}"
+    year_dir.mkdir(parents=True, exist_ok=True)
+    first = frame.index.min().strftime("%Y%m%d")
+    last = frame.index.max().strftime("%Y%m%d")
+    path = year_dir / f"part-{first}-{last}-{time.time_ns()}.parquet"
+    tmp_path = path.with_suffix(".tmp")
+    pq.write_table(_to_table(frame), tmp_path, row_group_size=OHLCV_ROW_GROUP_SIZE)
+    tmp_path.replace(path)
+    _bump_generation()
+    return path
+
+
+def append_ohlcv(ticker: str, frame: pd.DataFrame) -> None:
+    """Append bars for ``ticker``, writing one new part file per touched year.
+
+    Existing files are never rewritten; if a date is written twice the most recent
+    write wins on read. Year partitions that accumulate many parts are compacted.
+    """
+    if frame is None or frame.empty:
+        return
+    frame = frame.copy()
+    frame.index = pd.DatetimeIndex(frame.index).tz_localize(None)
+    for year, chunk in frame.groupby(frame.index.year):
+        _write_part(ticker, int(year), chunk)
+        year_dir = _ticker_dir(ticker) / f"year={year}"
+        if len(list(year_dir.glob("part-*.parquet"))) >= OHLCV_COMPACT_PARTS:
+            compact_ohlcv(ticker, int(year))
+
+
+def _read_parts(
+    parts: list[OhlcvPart],
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+    columns: list[str] | None = None,
+) -> pd.DataFrame:
+    if not parts:
+        return pd.DataFrame()
+    dataset = ds.dataset([str(part.path) for part in parts], format="parquet")
+    predicate = None
+    if start is not None:
+        predicate = ds.field("date") >= pa.scalar(start.to_datetime64())
+    if end is not None:
+        upper = ds.field("date") <= pa.scalar(end.to_datetime64())
+        predicate = upper if predicate is None else predicate & upper
+    # Columns missing from the store are left out rather than failing the read.
+    available = set(dataset.schema.names)
+    read_columns = (
+        None if columns is None else ["date", *(col for col in columns if col in available)]
+    )
+    frames = []
+    # Fragments are read in write order so later parts win on duplicate dates.
+    for fragment in dataset.get_fragments():
+        table = fragment.to_table(columns=read_columns, filter=predicate)
+        if table.num_rows:
+            frames.append(table.to_pandas())
+    if not frames:
+        return pd.DataFrame()
+    frame = pd.concat(frames).set_index("date")
+    frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+    frame.index.name = None
+    return frame
+
+
+def read_ohlcv(
+    ticker: str,
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+    columns: list[str] | None = None,
+) -> pd.DataFrame:
+    """Read stored bars in ``[start, end]``.
+
+    Whole parts outside the range are skipped by file name, and within the
+    remaining files the date predicate is pushed down to row-group statistics.
+    """
+    for attempt in range(2):
+        parts = [
+            part
+            for part in ohlcv_parts(ticker)
+            if (start is None or part.last >= start) and (end is None or part.first <= end)
+        ]
+        try:
+            return _read_parts(parts, start, end, columns)
+        except FileNotFoundError:
+            # A concurrent compaction replaced the parts we listed; list again.
+            if attempt:
+                raise
+    return pd.DataFrame()
+
+
+def compact_ohlcv(ticker: str, year: int) -> None:
+    """Rewrite one year partition as a single part file."""
+    parts = [part for part in ohlcv_parts(ticker) if part.first.year == year]
+    if len(parts) < 2:
+        return
+    frame = _read_parts(parts)
+    _write_part(ticker, year, frame)
+    for part in parts:
+        part.path.unlink(missing_ok=True)
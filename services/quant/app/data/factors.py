@@ -4,7 +4,6 @@ import io
 import zipfile
 from datetime import date
 
-import httpx
 import pandas as pd
 
 from .cache import cache_path, read_parquet, write_parquet
@@ -68,6 +67,8 @@ def load_french_factors(start: date | None = None, end: date | None = None) -> p
 
 
 def download_french_factors() -> pd.DataFrame:
+    import httpx
+
     with httpx.Client(timeout=20.0) as client:
         response = client.get(FRENCH_DAILY_URL)
         response.raise_for_status()
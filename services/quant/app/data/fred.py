@@ -2,7 +2,6 @@ from __future__ import annotations
 
 from datetime import date
 
-import httpx
 import pandas as pd
 
 from ..config import settings
@@ -30,6 +29,8 @@ def fetch_fred_series(
     if end:
         params["observation_end"] = end.isoformat()
 
+    import httpx
+
     with httpx.Client(timeout=20.0) as client:
         response = client.get(FRED_BASE_URL, params=params)
         response.raise_for_status()
@@ -1,12 +1,27 @@
 from __future__ import annotations
 
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
-from typing import Iterable
+from typing import Callable, Iterable
 
 import pandas as pd
-import yfinance as yf
 
-from .cache import cache_path, read_parquet, write_parquet
+from .. import telemetry
+from ..config import settings
+from .cache import append_ohlcv, cache_path, ohlcv_range, read_ohlcv, read_parquet
+
+logger = logging.getLogger(__name__)
+
+# A fetcher downloads bars for several tickers over one [start, end) range and
+# returns a frame per ticker that had data.
+Fetcher = Callable[[list[str], date, date], dict[str, pd.DataFrame]]
+
+# yf.download keeps module-level state, so concurrent calls must not overlap.
+_yfinance_lock = threading.Lock()
 
 
 def _normalize_columns(frame: pd.DataFrame) -> pd.DataFrame:
@@ -21,61 +36,156 @@ def _normalize_columns(frame: pd.DataFrame) -> pd.DataFrame:
     return frame.rename(columns=rename_map)
 
 
-def _fetch_history(ticker: str, start: date, end: date) -> pd.DataFrame:
-    frame = yf.download(
-        ticker,
-        start=start,
-        end=end,
-        auto_adjust=False,
-        progress=False,
-        group_by="column",
-    )
+def yfinance_fetcher(tickers: list[str], start: date, end: date) -> dict[str, pd.DataFrame]:
+    """Fetch all ``tickers`` with a single multi-symbol ``yf.download`` call."""
+    import yfinance as yf  # deferred: slow to import and only needed on a cache miss
+
+    with _yfinance_lock:
+        frame = yf.download(
+            tickers,
+            start=start,
+            end=end,
+            auto_adjust=False,
+            progress=False,
+            group_by="ticker",
+            threads=True,
+        )
     if frame.empty:
-        return frame
-    frame = _normalize_columns(frame)
-    frame.index = pd.to_datetime(frame.index).tz_localize(None)
-    return frame
+        return {}
 
+    if isinstance(frame.columns, pd.MultiIndex):
+        available = set(frame.columns.get_level_values(0))
+        per_ticker = {ticker: frame[ticker] for ticker in tickers if ticker in available}
+    else:
+        per_ticker = {tickers[0]: frame}
 
-def load_ticker_ohlcv(ticker: str, start: date, end: date) -> pd.DataFrame:
-    path = cache_path(f"ohlcv_{ticker}")
-    cached = read_parquet(path)
-    start_ts = pd.Timestamp(start)
-    end_ts = pd.Timestamp(end)
+    frames = {}
+    for ticker, bars in per_ticker.items():
+        bars = _normalize_columns(bars).dropna(how="all")
+        if bars.empty:
+            continue
+        bars.index = pd.to_datetime(bars.index).tz_localize(None)
+        bars.columns.name = None
+        frames[ticker] = bars
+    return frames
 
-    needs_fetch = cached is None or cached.empty
-    if cached is not None and not cached.empty:
-        cached.index = pd.to_datetime(cached.index).tz_localize(None)
-        if start_ts < cached.index.min() or end_ts > cached.index.max():
-            needs_fetch = True
-
-    if needs_fetch:
-        fetched = _fetch_history(ticker, start, end)
-        if cached is not None and not cached.empty:
-            combined = pd.concat([cached, fetched]).sort_index()
-            combined = combined[~combined.index.duplicated(keep="last")]
-        else:
-            combined = fetched
-        if not combined.empty:
-            write_parquet(path, combined)
-        data = combined
-    else:
-        data = cached
 
-    if data is None or data.empty:
-        return pd.DataFrame()
+_fetcher: Fetcher = yfinance_fetcher
 
-    sliced = data.loc[(data.index >= start_ts) & (data.index <= end_ts)]
-    return sliced
 
+def get_fetcher() -> Fetcher:
+    return _fetcher
 
-def load_ohlcv(tickers: Iterable[str], start: date, end: date) -> pd.DataFrame:
-    frames: dict[str, pd.DataFrame] = {}
-    for ticker in tickers:
-        frames[ticker] = load_ticker_ohlcv(ticker, start, end)
 
-    if not frames:
+def set_fetcher(fetcher: Fetcher) -> Fetcher:
+    """Swap the market data source (e.g. for tests); returns the previous fetcher."""
+    global _fetcher
+    previous = _fetcher
+    _fetcher = fetcher
+    return previous
+
+
+def _import_legacy_cache(ticker: str) -> None:
+    # Earlier versions kept one ohlcv_{ticker}.parquet per ticker.
+    legacy = read_parquet(cache_path(f"ohlcv_{ticker}"))
+    if legacy is not None and not legacy.empty:
+        append_ohlcv(ticker, legacy)
+
+
+def _missing_ranges(ticker: str, start: date, end: date) -> list[tuple[date, date]]:
+    """[start, end) ranges that have to be fetched for ``ticker``."""
+    stored = ohlcv_range(ticker)
+    if stored is None:
+        _import_legacy_cache(ticker)
+        stored = ohlcv_range(ticker)
+    if stored is None:
+        return [(start, end)]
+
+    first, last = stored
+    ranges = []
+    if pd.Timestamp(start) < first:
+        ranges.append((start, first.date()))
+    # Fetch ranges are end-exclusive, so nothing is missing once ``last`` reaches end - 1.
+    if last + pd.Timedelta(days=1) < pd.Timestamp(end):
+        ranges.append(((last + pd.Timedelta(days=1)).date(), end))
+    return ranges
+
+
+def store_covers(tickers: Iterable[str], start: date, end: date) -> bool:
+    """Whether loading ``[start, end)`` for ``tickers`` needs no fetch."""
+    return not any(_missing_ranges(ticker, start, end) for ticker in tickers)
+
+
+def _fill_missing(tickers: list[str], start: date, end: date, pool: ThreadPoolExecutor) -> int:
+    """Fetch and store every missing range; returns the number of fetch calls made."""
+    # Tickers missing the same range share one bulk download.
+    groups: dict[tuple[date, date], list[str]] = defaultdict(list)
+    for ticker, ranges in zip(tickers, pool.map(lambda t: _missing_ranges(t, start, end), tickers)):
+        for missing in ranges:
+            groups[missing].append(ticker)
+    if not groups:
+        return 0
+
+    fetcher = _fetcher
+    fetched = pool.map(lambda item: fetcher(item[1], *item[0]), list(groups.items()))
+    writes = [(ticker, frame) for frames in fetched for ticker, frame in frames.items()]
+    list(pool.map(lambda write: append_ohlcv(*write), writes))
+    return len(groups)
+
+
+def load_ticker_ohlcv(ticker: str, start: date, end: date) -> pd.DataFrame:
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        _fill_missing([ticker], start, end, pool)
+    return read_ohlcv(ticker, pd.Timestamp(start), pd.Timestamp(end))
+
+
+def _load_stored(
+    tickers: list[str], start: date, end: date, columns: list[str] | None = None
+) -> dict[str, pd.DataFrame]:
+    """Fill gaps in the store, then read ``columns`` (all when ``None``) per ticker."""
+    started = time.perf_counter()
+    start_ts = pd.Timestamp(start)
+    end_ts = pd.Timestamp(end)
+    with ThreadPoolExecutor(max_workers=max(1, settings.fetch_workers)) as pool:
+        with telemetry.stage("fetch"):
+            fetch_calls = _fill_missing(tickers, start, end, pool)
+        with telemetry.stage("store_read"):
+            loaded = pool.map(lambda ticker: read_ohlcv(ticker, start_ts, end_ts, columns), tickers)
+            frames = dict(zip(tickers, loaded))
+    logger.debug(
+        "load: %d tickers, %d fetch calls, %.3fs",
+        len(tickers),
+        fetch_calls,
+        time.perf_counter() - started,
+    )
+    return frames
+
+
+def load_ohlcv(tickers: Iterable[str], start: date, end: date) -> pd.DataFrame:
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
         return pd.DataFrame()
 
-    combined = pd.concat(frames, axis=1)
-    return combined.sort_index()
+    frames = _load_stored(tickers, start, end)
+    with telemetry.stage("align"):
+        combined = pd.concat(frames, axis=1)
+        return combined.sort_index()
+
+
+def load_field(
+    tickers: Iterable[str], start: date, end: date, field: str = "adj_close"
+) -> dict[str, pd.Series]:
+    """``field`` per ticker, reading only that column from the store.
+
+    Tickers stored without ``adj_close`` fall back to ``close``; tickers without
+    bars are left out.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    columns = {}
+    for ticker, frame in _load_stored(tickers, start, end, [field]).items():
+        if field not in frame and field == "adj_close":
+            frame = read_ohlcv(ticker, pd.Timestamp(start), pd.Timestamp(end), ["close"])
+            frame = frame.rename(columns={"close": field})
+        if field in frame:
+            columns[ticker] = frame[field]
+    return columns
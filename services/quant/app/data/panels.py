@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from functools import cached_property
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from .. import telemetry
+from ..config import settings
+from .cache import store_generation
+from .market import load_field
+
+
+@dataclass(frozen=True, eq=False)
+class Panel:
+    """One field as a dates x tickers panel backed by a single read-only array.
+
+    Date ranges and evenly spaced ticker selections are views of the same buffer,
+    so a resident panel can serve many requests without copying.
+    """
+
+    values: np.ndarray
+    dates: pd.DatetimeIndex
+    tickers: pd.Index
+
+    def __post_init__(self) -> None:
+        self.values.flags.writeable = False
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, dtype: np.dtype | str | None = None) -> Panel:
+        values = np.ascontiguousarray(frame.to_numpy(dtype=dtype or float))
+        return cls(values, pd.DatetimeIndex(frame.index), pd.Index(frame.columns))
+
+    @classmethod
+    def from_columns(
+        cls, columns: dict[str, pd.Series], dtype: np.dtype | str | None = None
+    ) -> Panel:
+        """Align per-ticker series on the union of their dates, written in place."""
+        columns = {ticker: series for ticker, series in columns.items() if not series.empty}
+        dates = pd.DatetimeIndex(
+            np.unique(np.concatenate([series.index.values for series in columns.values()]))
+            if columns
+            else []
+        )
+        values = np.full((len(dates), len(columns)), np.nan, dtype=dtype or float)
+        for position, series in enumerate(columns.values()):
+            values[dates.get_indexer(series.index), position] = series.to_numpy()
+        return _drop_empty_rows(values, dates, pd.Index(list(columns)))
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.values.nbytes + self.dates.nbytes)
+
+    @cached_property
+    def frame(self) -> pd.DataFrame:
+        """The panel as a DataFrame over the same (read-only) array."""
+        return pd.DataFrame(self.values, index=self.dates, columns=self.tickers, copy=False)
+
+    def select(
+        self,
+        tickers: Iterable[str] | None = None,
+        start: pd.Timestamp | None = None,
+        end: pd.Timestamp | None = None,
+    ) -> Panel:
+        """Rows in ``[start, end]`` and columns ``tickers``, without dates all of them miss.
+
+        Only ticker selections that are not evenly spaced in this panel copy data.
+        """
+        first = 0 if start is None else self.dates.searchsorted(start, side="left")
+        last = len(self.dates) if end is None else self.dates.searchsorted(end, side="right")
+        columns: slice | np.ndarray = slice(None)
+        if tickers is not None:
+            positions = self.tickers.get_indexer(list(tickers))
+            if (positions < 0).any():
+                raise KeyError(list(self.tickers[positions < 0]))
+            columns = _as_slice(positions)
+        values = self.values[first:last, columns]
+        return _drop_empty_rows(values, self.dates[first:last], self.tickers[columns])
+
+    def returns(self) -> Panel:
+        """Simple returns, computed in float64 and stored in the panel's dtype.
+
+        Differencing float32 prices would leave returns with only ~5 good digits.
+        """
+        prices = self.frame.astype(float, copy=False)
+        # Gaps are padded, as pct_change's deprecated default fill did.
+        returns = prices.ffill().pct_change(fill_method=None).dropna(how="all")
+        return Panel.from_frame(returns, self.values.dtype)
+
+
+def _as_slice(positions: np.ndarray) -> slice | np.ndarray:
+    """``positions`` as a basic slice when evenly spaced, so indexing returns a view."""
+    if len(positions) < 2:
+        return slice(int(positions[0]), int(positions[0]) + 1) if len(positions) else positions
+    steps = np.diff(positions)
+    if steps[0] == 0 or (steps != steps[0]).any():
+        return positions
+    step = int(steps[0])
+    stop = positions[-1] + step
+    return slice(int(positions[0]), None if stop < 0 else int(stop), step)
+
+
+def _drop_empty_rows(values: np.ndarray, dates: pd.DatetimeIndex, tickers: pd.Index) -> Panel:
+    present = ~np.isnan(values).all(axis=1)
+    if not present.all():
+        kept = np.flatnonzero(present)
+        if len(kept) and present[kept[0] : kept[-1] + 1].all():
+            # Leading and trailing gaps (e.g. before a listing) keep this a view.
+            rows = slice(kept[0], kept[-1] + 1)
+        else:
+            rows = present
+        values, dates = values[rows], dates[rows]
+    return Panel(values, dates, tickers)
+
+
+@dataclass
+class _Entry:
+    kind: str
+    field: str
+    tickers: tuple[str, ...]
+    start: pd.Timestamp
+    end: pd.Timestamp
+    panel: Panel
+    generation: tuple[int, str]
+    created: float
+
+
+class PanelCache:
+    """Byte-bounded LRU of aligned price/return panels.
+
+    Entries are keyed by (kind, field, dtype, tickers, start, end). A lookup can
+    also be served from a cached panel whose tickers and date range contain the
+    request, as a view of it where possible. Entries expire after ``ttl`` seconds
+    or as soon as any process writes to the OHLCV store. Cached panels are read-only.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float | None = None) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.superset_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _valid(self, entry: _Entry, generation: tuple[int, str]) -> bool:
+        if entry.generation != generation:
+            return False
+        return self.ttl is None or time.monotonic() - entry.created <= self.ttl
+
+    def get(
+        self,
+        kind: str,
+        field: str,
+        tickers: tuple[str, ...],
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+        allow_superset: bool = True,
+        dtype: str = "float64",
+    ) -> Panel | None:
+        key = (kind, field, dtype, tickers, start, end)
+        generation = store_generation()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._valid(entry, generation):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                telemetry.record_cache("panel", "hit")
+                return entry.panel
+            if allow_superset:
+                wanted = set(tickers)
+                for other_key, other in reversed(self._entries.items()):
+                    if (
+                        other.kind == kind
+                        and other.field == field
+                        and other.panel.values.dtype == dtype
+                        and other.start <= start
+                        and other.end >= end
+                        # Requested tickers without bars are not in the panel.
+                        and wanted.issubset(other.panel.tickers)
+                        and self._valid(other, generation)
+                    ):
+                        self._entries.move_to_end(other_key)
+                        self.superset_hits += 1
+                        telemetry.record_cache("panel", "superset_hit")
+                        return other.panel.select(tickers, start, end)
+            self.misses += 1
+            telemetry.record_cache("panel", "miss")
+            return None
+
+    def put(
+        self,
+        kind: str,
+        field: str,
+        tickers: tuple[str, ...],
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+        panel: Panel,
+        generation: tuple[int, str],
+    ) -> None:
+        nbytes = panel.nbytes
+        if nbytes > self.max_bytes:
+            return
+        key = (kind, field, panel.values.dtype.name, tickers, start, end)
+        entry = _Entry(kind, field, tickers, start, end, panel, generation, time.monotonic())
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.panel.nbytes
+            self._entries[key] = entry
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.panel.nbytes
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "superset_hits": self.superset_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+panel_cache = PanelCache(settings.panel_cache_bytes, ttl=settings.panel_cache_ttl)
+
+
+def select_field(ohlcv: pd.DataFrame | Panel, field: str = "adj_close") -> pd.DataFrame:
+    """``field`` of a ``(ticker, field)`` OHLCV frame; single-field frames pass through.
+
+    ``adj_close`` falls back to ``close`` when the frame has no adjusted prices.
+    """
+    if isinstance(ohlcv, Panel):
+        return ohlcv.frame
+    if ohlcv.empty:
+        return pd.DataFrame()
+    if isinstance(ohlcv.columns, pd.MultiIndex):
+        fields = ohlcv.columns.levels[1]
+        if field not in fields and field == "adj_close":
+            field = "close"
+        prices = ohlcv.xs(field, level=1, axis=1)
+    else:
+        prices = ohlcv
+    return prices.dropna(how="all")
+
+
+def _shared_panel(
+    kind: str,
+    field: str,
+    tickers: tuple[str, ...],
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    dtype: str,
+) -> Panel | None:
+    if not settings.shared_panels or field != "adj_close":
+        return None
+    # Imported here: the shared store builds on Panel.
+    from .shared import shared_panels
+
+    return shared_panels.get(kind, tickers, start, end, dtype)
+
+
+def load_price_panel(
+    tickers: Iterable[str],
+    start: date,
+    end: date,
+    field: str = "adj_close",
+    dtype: str | None = None,
+) -> Panel:
+    """Aligned ``field`` panel, served from the panel cache when possible.
+
+    Only ``field`` is read from the bar store. ``dtype`` defaults to
+    ``settings.panel_dtype``. With ``settings.shared_panels``, requests the
+    memory-mapped universe panels cover are served from those instead.
+    """
+    key_tickers = tuple(tickers)
+    start_ts = pd.Timestamp(start)
+    end_ts = pd.Timestamp(end)
+    dtype = np.dtype(dtype or settings.panel_dtype).name
+    shared = _shared_panel("prices", field, key_tickers, start_ts, end_ts, dtype)
+    if shared is not None:
+        return shared
+    cached = panel_cache.get("prices", field, key_tickers, start_ts, end_ts, dtype=dtype)
+    if cached is not None:
+        return cached
+
+    # Read before loading: a write racing the load must invalidate what it stamps.
+    generation = store_generation()
+    columns = load_field(key_tickers, start, end, field)
+    with telemetry.stage("align"):
+        panel = Panel.from_columns(columns, dtype)
+    panel_cache.put("prices", field, key_tickers, start_ts, end_ts, panel, generation)
+    return panel
+
+
+def load_return_panel(
+    tickers: Iterable[str],
+    start: date,
+    end: date,
+    field: str = "adj_close",
+    dtype: str | None = None,
+) -> Panel:
+    """Simple returns of :func:`load_price_panel`, cached alongside the price panels."""
+    key_tickers = tuple(tickers)
+    start_ts = pd.Timestamp(start)
+    end_ts = pd.Timestamp(end)
+    dtype = np.dtype(dtype or settings.panel_dtype).name
+    shared = _shared_panel("returns", field, key_tickers, start_ts, end_ts, dtype)
+    if shared is not None:
+        return shared
+    # Returns of a sliced superset differ on the first row, so only exact hits count.
+    cached = panel_cache.get(
+        "returns", field, key_tickers, start_ts, end_ts, allow_superset=False, dtype=dtype
+    )
+    if cached is not None:
+        return cached
+
+    generation = store_generation()
+    prices = load_price_panel(key_tickers, start, end, field, dtype)
+    with telemetry.stage("align"):
+        returns = prices.returns()
+    panel_cache.put("returns", field, key_tickers, start_ts, end_ts, returns, generation)
+    return returns
+
+
+def load_prices(
+    tickers: Iterable[str],
+    start: date,
+    end: date,
+    field: str = "adj_close",
+    dtype: str | None = None,
+) -> pd.DataFrame:
+    """:func:`load_price_panel` as a read-only DataFrame (dates x tickers)."""
+    return load_price_panel(tickers, start, end, field, dtype).frame
+
+
+def load_returns(
+    tickers: Iterable[str],
+    start: date,
+    end: date,
+    field: str = "adj_close",
+    dtype: str | None = None,
+) -> pd.DataFrame:
+    """:func:`load_return_panel` as a read-only DataFrame (dates x tickers)."""
+    return load_return_panel(tickers, start, end, field, dtype).frame
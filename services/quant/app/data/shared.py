@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from .. import telemetry
+from ..config import settings
+from .cache import ohlcv_version
+from .market import load_field
+from .panels import Panel
+
+logger = logging.getLogger(__name__)
+
+_KINDS = ("prices", "returns")
+
+
+def shared_root() -> Path:
+    return settings.cache_dir / "panels"
+
+
+def _store_versions(tickers: Iterable[str]) -> dict[str, str]:
+    return {ticker: ohlcv_version([ticker]) for ticker in tickers}
+
+
+def _write_panel(directory: Path, panel: Panel) -> None:
+    directory.mkdir(parents=True)
+    np.save(directory / "values.npy", np.ascontiguousarray(panel.values))
+    np.save(directory / "dates.npy", panel.dates.values.astype("datetime64[ns]"))
+    (directory / "tickers.json").write_text(json.dumps([str(t) for t in panel.tickers]))
+
+
+def _map_panel(directory: Path) -> Panel:
+    values = np.load(directory / "values.npy", mmap_mode="r")
+    dates = pd.DatetimeIndex(np.load(directory / "dates.npy"))
+    tickers = pd.Index(json.loads((directory / "tickers.json").read_text()))
+    return Panel(values, dates, tickers)
+
+
+@contextmanager
+def _publish_lock(blocking: bool = True):
+    """Serialize publishers across processes; yields whether the lock was taken."""
+    import fcntl
+
+    root = shared_root()
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / ".lock", "w") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def publish_shared_panels(
+    tickers: Iterable[str] | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    dtype: str | None = None,
+) -> str:
+    """Write the adj-close price and return panels for ``tickers`` and make them current.
+
+    Each publish writes a new version directory, then atomically replaces the
+    ``CURRENT`` pointer, so readers switch on their next lookup. Defaults cover
+    ``settings.default_universe`` from ``settings.shared_panel_start`` to tomorrow.
+    Returns the new version.
+    """
+    with _publish_lock():
+        return _publish(tickers, start, end, dtype)
+
+
+def _publish(
+    tickers: Iterable[str] | None, start: date | None, end: date | None, dtype: str | None
+) -> str:
+    tickers = list(tickers or settings.default_universe)
+    start = start or settings.shared_panel_start
+    end = end or date.today() + timedelta(days=1)
+    dtype = np.dtype(dtype or settings.panel_dtype).name
+    # Versions are read before loading, so a write racing the load marks the
+    # ticker stale. The first load may fetch and write missing bars itself, in
+    # which case a second one stamps the bars it stored.
+    for _ in range(3):
+        versions = _store_versions(tickers)
+        columns = load_field(tickers, start, end)
+        if _store_versions(tickers) == versions:
+            break
+    prices = Panel.from_columns(columns, dtype)
+    returns = prices.returns()
+
+    root = shared_root()
+    version = f"{time.time_ns()}-{os.getpid()}"
+    staging = root / f".{version}"
+    for kind, panel in zip(_KINDS, (prices, returns)):
+        _write_panel(staging / kind, panel)
+    meta = {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "dtype": dtype,
+        "versions": versions,
+    }
+    (staging / "meta.json").write_text(json.dumps(meta))
+    staging.rename(root / version)
+
+    current = root / "CURRENT"
+    previous = current.read_text() if current.exists() else None
+    pointer = root / f".CURRENT.{version}"
+    pointer.write_text(version)
+    os.replace(pointer, current)
+    _remove_old_versions(root, keep={version, previous})
+    logger.info(
+        "published shared panels %s: %d tickers x %d dates",
+        version,
+        len(prices.tickers),
+        len(prices.dates),
+    )
+    return version
+
+
+def _remove_old_versions(root: Path, keep: set[str | None]) -> None:
+    # Mapped files stay readable after unlinking, so workers still on an older
+    # version keep working until their next lookup; one previous version is
+    # kept for those that read the pointer just before the swap.
+    for path in root.iterdir():
+        if path.is_dir() and not path.name.startswith(".") and path.name not in keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+class SharedPanels:
+    """Read-only, memory-mapped view of the panels :func:`publish_shared_panels` wrote last.
+
+    Every worker process maps the same files, so the page cache holds one copy
+    of the universe however many workers serve it. Lookups re-read the
+    ``CURRENT`` pointer and remap when a newer version was published.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._version: str | None = None
+        self._panels: dict[str, Panel] = {}
+        self._meta: dict = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _current(self) -> tuple[dict[str, Panel], dict] | None:
+        try:
+            version = (shared_root() / "CURRENT").read_text()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if version != self._version:
+                directory = shared_root() / version
+                try:
+                    self._panels = {kind: _map_panel(directory / kind) for kind in _KINDS}
+                    self._meta = json.loads((directory / "meta.json").read_text())
+                except FileNotFoundError:
+                    # Removed by a newer publish between reading the pointer and mapping.
+                    return None
+                self._version = version
+            return self._panels, self._meta
+
+    def get(
+        self,
+        kind: str,
+        tickers: tuple[str, ...],
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+        dtype: str = "float64",
+    ) -> Panel | None:
+        """``kind`` panel for the request as a view of the mapped files, or ``None``.
+
+        Returns match :func:`app.data.load_returns` over the same window: the
+        first return is the one into the first price date at or after ``start``.
+        Requests past the last published bar, or for tickers whose stored bars
+        changed since the publish, miss and fall through to the bar store.
+        """
+        current = self._current()
+        if current is not None:
+            panels, meta = current
+            prices = panels["prices"]
+            if (
+                meta["dtype"] == dtype
+                and pd.Timestamp(meta["start"]) <= start
+                and len(prices.dates)
+                and end <= prices.dates[-1]
+                and set(tickers).issubset(prices.tickers)
+                and self._unchanged(meta, tickers)
+            ):
+                self.hits += 1
+                telemetry.record_cache("shared_panel", "hit")
+                if kind == "prices":
+                    return prices.select(tickers, start, end)
+                first = prices.dates.searchsorted(start)
+                if first < len(prices.dates):
+                    start = prices.dates[first] + pd.Timedelta(1, "ns")
+                return panels["returns"].select(tickers, start, end)
+        self.misses += 1
+        telemetry.record_cache("shared_panel", "miss")
+        return None
+
+    @staticmethod
+    def _unchanged(meta: dict, tickers: tuple[str, ...]) -> bool:
+        published = meta.get("versions", {})
+        return all(published.get(ticker) == ohlcv_version([ticker]) for ticker in tickers)
+
+    def stats(self) -> dict:
+        with self._lock:
+            panels = self._panels
+            return {
+                "enabled": settings.shared_panels,
+                "version": self._version,
+                "tickers": len(panels["prices"].tickers) if panels else 0,
+                "mapped_bytes": sum(panel.nbytes for panel in panels.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+shared_panels = SharedPanels()
+
+
+def _is_fresh() -> bool:
+    current = shared_panels._current()
+    return current is not None and date.fromisoformat(current[1]["end"]) > date.today()
+
+
+def publish_if_stale() -> None:
+    """Publish unless the current version covers through today; run at startup.
+
+    When another worker is already publishing, this one leaves it to them.
+    """
+    if _is_fresh():
+        return
+    with _publish_lock(blocking=False) as acquired:
+        if not acquired or _is_fresh():
+            return
+        try:
+            _publish(None, None, None, None)
+        except Exception:
+            logger.exception("publishing shared panels failed")
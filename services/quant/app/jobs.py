@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from .analytics import performance_summary
+from .backtest import (
+    BacktestCheckpoint,
+    BacktestOutput,
+    ProgressCallback,
+    continue_backtest,
+    run_resumable_backtest,
+)
+from .config import settings
+from .models import BacktestJobStatus, BacktestRequest, RunSummary
+from .payload import decode_backtest_arrow, encode_backtest_arrow
+
+# Minimum seconds between progress writes from a running job.
+_PROGRESS_INTERVAL = 0.5
+# Request fields that change only the response encoding, not the backtest itself.
+_ENCODING_FIELDS = {"response_format"}
+
+_active: dict[str, Future] = {}
+_active_lock = threading.Lock()
+
+
+def job_id(request: BacktestRequest, data_version: str | None = None) -> str:
+    """Content hash of the request; identical requests map to the same job.
+
+    ``data_version`` (see :func:`app.data.ohlcv_version`) is hashed in too when
+    given, so the same request over different bars maps to a different job.
+    """
+    payload = request.model_dump(mode="json", exclude=_ENCODING_FIELDS)
+    payload["tickers"] = payload["tickers"] or list(settings.default_universe)
+    if data_version is not None:
+        payload["data_version"] = data_version
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+
+def jobs_dir() -> Path:
+    return Path(settings.runs_dir) / "jobs"
+
+
+def job_path(job: str, root: Path | None = None) -> Path:
+    return (root or jobs_dir()) / job
+
+
+def result_path(job: str, root: Path | None = None) -> Path:
+    return job_path(job, root) / "result.arrow"
+
+
+def checkpoint_path(job: str, root: Path | None = None) -> Path:
+    return job_path(job, root) / "checkpoint.json"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _write_json(path: Path, payload: dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(payload))
+    os.replace(tmp, path)
+
+
+def read_status(job: str, root: Path | None = None) -> BacktestJobStatus | None:
+    path = job_path(job, root) / "status.json"
+    try:
+        return BacktestJobStatus.model_validate_json(path.read_text())
+    except FileNotFoundError:
+        return None
+
+
+def write_status(job: str, root: Path | None = None, **changes) -> BacktestJobStatus:
+    current = read_status(job, root)
+    payload = current.model_dump() if current is not None else {"job_id": job, "created_at": _now()}
+    payload.update(changes, updated_at=_now())
+    status = BacktestJobStatus.model_validate(payload)
+    _write_json(job_path(job, root) / "status.json", status.model_dump(mode="json"))
+    return status
+
+
+def read_request(job: str) -> BacktestRequest | None:
+    try:
+        return BacktestRequest.model_validate_json((job_path(job) / "request.json").read_text())
+    except FileNotFoundError:
+        return None
+
+
+def read_checkpoint(job: str, root: Path | None = None) -> BacktestCheckpoint | None:
+    try:
+        return BacktestCheckpoint.from_dict(json.loads(checkpoint_path(job, root).read_text()))
+    except FileNotFoundError:
+        return None
+
+
+def is_active(job: str) -> bool:
+    with _active_lock:
+        future = _active.get(job)
+        return future is not None and not future.done()
+
+
+def track(job: str, future: Future) -> None:
+    with _active_lock:
+        _active[job] = future
+
+    def _forget(done: Future) -> None:
+        with _active_lock:
+            if _active.get(job) is done:
+                del _active[job]
+        error = done.exception() if not done.cancelled() else None
+        if error is not None or done.cancelled():
+            # The worker could not record the failure itself (e.g. it crashed).
+            status = read_status(job)
+            if status is not None and status.state not in ("done", "failed"):
+                write_status(job, state="failed", error=str(error or "cancelled"))
+
+    future.add_done_callback(_forget)
+
+
+def create_job(job: str, request: BacktestRequest) -> BacktestJobStatus:
+    job_path(job).mkdir(parents=True, exist_ok=True)
+    (job_path(job) / "request.json").write_text(request.model_dump_json())
+    return write_status(job, state="queued", completed=0, total=0, error=None)
+
+
+def _progress_writer(job: str, root: Path) -> ProgressCallback:
+    last_write = 0.0
+
+    def report(completed: int, total: int) -> None:
+        nonlocal last_write
+        now = time.monotonic()
+        if completed == total or now - last_write >= _PROGRESS_INTERVAL:
+            write_status(job, root, completed=completed, total=total)
+            last_write = now
+
+    return report
+
+
+def _engine_args(request: BacktestRequest) -> dict:
+    return {
+        "strategy": request.strategy,
+        "rebalance": request.rebalance,
+        "transaction_cost_bps": request.transaction_cost_bps,
+        "slippage_bps": request.slippage_bps,
+        "lookback": request.lookback_window,
+        "max_weight": request.max_weight,
+        "vol_target": request.vol_target,
+        "cov_estimator": request.cov_estimator,
+    }
+
+
+def _read_output(job: str, root: Path) -> BacktestOutput:
+    decoded = decode_backtest_arrow(result_path(job, root).read_bytes())
+    series = decoded["series"]
+    weights = decoded["weights"]
+    rebalance_dates = None
+    if decoded["weights_granularity"] == "rebalance":
+        rebalance_dates = weights.index
+        weights = weights.reindex(series.index).ffill()
+    return BacktestOutput(
+        equity_curve=series["equity_curve"],
+        returns=series["returns"],
+        weights=weights,
+        turnover=series["turnover"],
+        costs=series["costs"],
+        rebalance_dates=rebalance_dates,
+    )
+
+
+def _write_run(
+    job: str,
+    root: Path,
+    output: BacktestOutput,
+    checkpoint: BacktestCheckpoint | None,
+    request: BacktestRequest,
+) -> RunSummary:
+    summary = RunSummary(
+        **performance_summary(output.returns, output.equity_curve, request.risk_free or 0.0)
+    )
+    content = encode_backtest_arrow(output, summary, job, request.weights_granularity)
+    tmp = result_path(job, root).with_suffix(".tmp")
+    tmp.write_bytes(content)
+    os.replace(tmp, result_path(job, root))
+    # Written after the result: a checkpoint never points past the bars on disk.
+    if checkpoint is not None:
+        _write_json(checkpoint_path(job, root), checkpoint.to_dict())
+    return summary
+
+
+def _last_date(output: BacktestOutput) -> date | None:
+    return output.equity_curve.index[-1].date() if len(output.equity_curve) else None
+
+
+def run_job(job: str, prices: pd.DataFrame, request: BacktestRequest, root: Path) -> str:
+    """Run a persisted backtest job; executes in a compute worker process.
+
+    ``root`` is passed explicitly because worker processes do not see runtime
+    changes to ``settings``.
+    """
+    write_status(job, root, state="running")
+    try:
+        output, checkpoint = run_resumable_backtest(
+            prices, **_engine_args(request), progress=_progress_writer(job, root)
+        )
+        summary = _write_run(job, root, output, checkpoint, request)
+    except Exception as exc:
+        write_status(job, root, state="failed", error=f"{type(exc).__name__}: {exc}")
+        raise
+    write_status(job, root, state="done", summary=summary, last_date=_last_date(output))
+    return job
+
+
+def continue_job(
+    job: str, source: str, prices: pd.DataFrame, request: BacktestRequest, root: Path
+) -> str:
+    """Run job ``job`` by extending the finished job ``source`` over the bars in ``prices``.
+
+    ``request`` is the source's request with a later ``end``, so the extended
+    run lives under the id that request hashes to and the source keeps serving
+    its own window. ``prices`` needs to start at the checkpoint's
+    ``window_start`` only. Runs in a compute worker.
+    """
+    write_status(job, root, state="running")
+    try:
+        output, checkpoint = continue_backtest(
+            _read_output(source, root),
+            read_checkpoint(source, root),
+            prices,
+            **_engine_args(request),
+            progress=_progress_writer(job, root),
+        )
+        summary = _write_run(job, root, output, checkpoint, request)
+    except Exception as exc:
+        write_status(job, root, state="failed", error=f"{type(exc).__name__}: {exc}")
+        raise
+    write_status(job, root, state="done", summary=summary, last_date=_last_date(output))
+    return job
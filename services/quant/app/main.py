@@ -1,10 +1,33 @@
+import threading
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
-from .routers import backtest, health, optimize, risk
+from .config import settings
+from .data.shared import publish_if_stale
+from .routers import backtest, health, metrics, optimize, risk
+from .telemetry import timing_middleware
+from .warmup import solver_warmup
+from .workers import compute_pool, scenario_pool, sweep_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.warmup_solvers:
+        solver_warmup.start(compute_pool)
+    if settings.shared_panels:
+        # Publishing may fetch bars, so it stays off the startup path.
+        threading.Thread(target=publish_if_stale, name="shared-panels", daemon=True).start()
+    yield
+    for pool in (compute_pool, sweep_pool, scenario_pool):
+        pool.shutdown()
+
 
-app = FastAPI(title="PortfolioPilot Quant", version="0.1.0")
+app = FastAPI(title="PortfolioPilot Quant", version="0.1.0", lifespan=lifespan)
+app.middleware("http")(timing_middleware)
 
 app.include_router(health.router, prefix="/v1", tags=["health"])
+app.include_router(metrics.router, tags=["health"])
 app.include_router(backtest.router, prefix="/v1", tags=["backtest"])
 app.include_router(optimize.router, prefix="/v1", tags=["optimize"])
 app.include_router(risk.router, prefix="/v1", tags=["risk"])
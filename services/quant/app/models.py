@@ -12,6 +12,11 @@ StrategyName = Literal[
     "cvar_min",
 ]
 
+ResponseFormat = Literal["json", "arrow"]
+WeightsGranularity = Literal["daily", "rebalance"]
+CovarianceEstimator = Literal["sample", "ledoit_wolf", "oas", "ewma", "factor"]
+ScenarioMethod = Literal["bootstrap", "normal", "student_t"]
+
 
 class TimeSeries(BaseModel):
     dates: list[str]
@@ -44,6 +49,11 @@ class BacktestRequest(BaseModel):
     lookback_window: int = 126
     max_weight: float | None = None
     vol_target: float | None = None
+    cov_estimator: CovarianceEstimator = "sample"
+    response_format: ResponseFormat = "json"
+    weights_granularity: WeightsGranularity = Field(
+        default="daily", description="rebalance sends weights only on rebalance dates"
+    )
 
 
 class BacktestResult(BaseModel):
@@ -57,6 +67,52 @@ class BacktestResult(BaseModel):
     costs: TimeSeries
 
 
+class BacktestJobStatus(BaseModel):
+    job_id: str
+    state: Literal["queued", "running", "done", "failed"]
+    completed: int = Field(default=0, description="Rebalances computed so far")
+    total: int = Field(default=0, description="Rebalances in the run, once known")
+    error: str | None = None
+    summary: RunSummary | None = None
+    last_date: date | None = Field(default=None, description="Last bar in the result")
+    created_at: str
+    updated_at: str
+
+
+class BacktestSweepRequest(BaseModel):
+    tickers: list[str] = Field(default_factory=list)
+    start: date
+    end: date
+    strategies: list[StrategyName]
+    rebalances: list[str] = Field(default_factory=lambda: ["M"])
+    lookback_windows: list[int] = Field(default_factory=lambda: [126])
+    max_weights: list[float | None] = Field(default_factory=lambda: [None])
+    transaction_cost_bps: list[float] = Field(default_factory=lambda: [5.0])
+    slippage_bps: list[float] = Field(default_factory=lambda: [2.0])
+    risk_free: float | None = None
+    vol_target: float | None = None
+    include_artifacts: bool = False
+    weights_granularity: WeightsGranularity = "daily"
+
+
+class SweepRow(BaseModel):
+    run_id: str
+    strategy: StrategyName
+    rebalance: str
+    lookback_window: int
+    max_weight: float | None
+    transaction_cost_bps: float
+    slippage_bps: float
+    turnover: float
+    summary: RunSummary
+
+
+class BacktestSweepResult(BaseModel):
+    sweep_id: str
+    rows: list[SweepRow]
+    runs: list[BacktestResult] | None = None
+
+
 class OptimizationRequest(BaseModel):
     tickers: list[str]
     start: date
@@ -68,6 +124,10 @@ class OptimizationRequest(BaseModel):
     alpha: float = 0.95
     frontier_points: int = 25
     long_only: bool = True
+    cov_estimator: CovarianceEstimator = "sample"
+    risk_budgets: dict[str, float] | None = Field(
+        default=None, description="Risk budget per ticker for risk_parity; equal if omitted"
+    )
 
 
 class FrontierPoint(BaseModel):
@@ -75,12 +135,19 @@ class FrontierPoint(BaseModel):
     expected_vol: float
 
 
+class SolverDiagnostics(BaseModel):
+    iterations: int
+    residual: float
+    converged: bool
+
+
 class OptimizationResult(BaseModel):
     weights: dict[str, float]
     expected_return: float
     expected_vol: float
     sharpe: float
     frontier: list[FrontierPoint] | None = None
+    diagnostics: SolverDiagnostics | None = None
 
 
 class RiskRequest(BaseModel):
@@ -88,6 +155,18 @@ class RiskRequest(BaseModel):
     start: date
     end: date
     alpha: float = 0.95
+    weights: dict[str, float] | None = None
+    portfolios: dict[str, dict[str, float]] | None = None
+    alphas: list[float] | None = None
+
+
+class TailRiskEntry(BaseModel):
+    portfolio: str
+    alpha: float
+    hist_var: float
+    hist_cvar: float
+    param_var: float
+    param_cvar: float
 
 
 class RiskMetrics(BaseModel):
@@ -98,15 +177,61 @@ class RiskMetrics(BaseModel):
     volatility: float
     rolling_vol: TimeSeries
     rolling_sharpe: TimeSeries
+    tail_risk: list[TailRiskEntry] = Field(default_factory=list)
+
+
+class ScenarioRequest(BaseModel):
+    tickers: list[str]
+    start: date
+    end: date
+    weights: dict[str, float] | None = None
+    portfolios: dict[str, dict[str, float]] | None = None
+    method: ScenarioMethod = "bootstrap"
+    horizons: list[int] = Field(default_factory=lambda: [1, 5, 20])
+    alphas: list[float] = Field(default_factory=lambda: [0.95, 0.99])
+    n_scenarios: int = Field(default=100_000, ge=1_000, le=1_000_000)
+    seed: int = 0
+    block_length: float = Field(default=10.0, ge=1.0, description="Mean bootstrap block, days")
+    dof: float = Field(default=5.0, gt=2.0, description="Student-t degrees of freedom")
+    cov_estimator: CovarianceEstimator = "sample"
+
+
+class ScenarioRiskEntry(BaseModel):
+    portfolio: str
+    horizon: int
+    alpha: float
+    var: float
+    cvar: float
+    mean: float
+    volatility: float
+
+
+class ScenarioRiskResult(BaseModel):
+    method: ScenarioMethod
+    n_scenarios: int
+    entries: list[ScenarioRiskEntry]
 
 
 class FactorRegressionRequest(BaseModel):
     tickers: list[str]
     start: date
     end: date
+    factors: list[str] | None = Field(default=None, description="Defaults to Mkt-RF, SMB, HML")
+    per_asset: bool = False
+    cov_type: Literal["ols", "hac"] = "ols"
+    hac_lags: int | None = Field(default=None, ge=0)
+    rolling_window: int | None = Field(default=None, ge=10)
+
+
+class FactorExposure(BaseModel):
+    coefficients: dict[str, float]
+    tstats: dict[str, float]
+    r2: float
 
 
 class FactorRegressionResult(BaseModel):
     coefficients: dict[str, float]
     tstats: dict[str, float]
     r2: float
+    assets: dict[str, FactorExposure] | None = None
+    rolling_betas: dict[str, TimeSeries] | None = None
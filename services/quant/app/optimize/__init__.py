@@ -1,4 +1,4 @@
-from .cvar import cvar_optimize
+from .cvar import CVaRResult, CVaRSolver, cvar_optimize, solve_cvar
 from .mvo import (
     efficient_frontier,
     max_sharpe_long_only,
@@ -8,10 +8,18 @@ from .mvo import (
     target_return_long_only,
     target_return_unconstrained,
 )
-from .risk_parity import risk_parity_weights
+from .risk_parity import (
+    RiskParityResult,
+    risk_parity_weights,
+    solve_risk_parity,
+    solve_risk_parity_batch,
+)
 
 __all__ = [
     "cvar_optimize",
+    "CVaRResult",
+    "CVaRSolver",
+    "solve_cvar",
     "efficient_frontier",
     "max_sharpe_long_only",
     "max_sharpe_unconstrained",
@@ -20,4 +28,7 @@ __all__ = [
     "target_return_long_only",
     "target_return_unconstrained",
     "risk_parity_weights",
+    "RiskParityResult",
+    "solve_risk_parity",
+    "solve_risk_parity_batch",
 ]
@@ -1,29 +1,268 @@
 from __future__ import annotations
 
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+
 import numpy as np
 import pandas as pd
 
-try:
-    import cvxpy as cp
-except Exception:  # pragma: no cover
-    cp = None
+from .. import telemetry
+
+# Histories longer than this are solved over a subsample of tail scenarios.
+_GENERATION_HORIZON = 500
+# The first subsample holds this many times the expected number of tail days.
+_INITIAL_TAIL = 2.0
+_MAX_ROUNDS = 20
+_LOSS_TOLERANCE = 1e-10
 
 
-def _pick_solver(preferred: list[str]) -> str | None:
-    if cp is None:
+@lru_cache(maxsize=1)
+def _load_highspy():
+    """HiGHS' Python bindings, imported on first solve, or ``None`` without them."""
+    try:
+        import highspy
+    except Exception:  # pragma: no cover - optional, installed alongside cvxpy
         return None
-    for name in preferred:
-        if name in cp.installed_solvers():
-            return name
-    return None
+    return highspy
+
+
+@dataclass
+class CVaRResult:
+    """Minimum-CVaR weights from the Rockafellar-Uryasev LP.
+
+    ``var`` and ``cvar`` are the loss threshold and expected tail loss of the
+    optimal portfolio over the scenarios that were solved.
+    """
+
+    weights: np.ndarray
+    var: float
+    cvar: float
+    iterations: int
+    optimal: bool
+
+
+def _lp_columns(returns: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Column-wise sparse constraint matrix over ``[w, z, u]``.
+
+    Scenario rows read ``r_t @ w + z + u_t >= 0`` and the last row is the budget.
+    """
+    horizon, n_assets = returns.shape
+    start = np.concatenate(
+        [
+            np.arange(n_assets + 1) * (horizon + 1),
+            n_assets * (horizon + 1) + horizon + np.arange(horizon + 1),
+        ]
+    )
+    index = np.concatenate(
+        [np.tile(np.arange(horizon + 1), n_assets), np.arange(horizon), np.arange(horizon)]
+    )
+    asset_values = np.vstack([returns, np.ones((1, n_assets))]).T.ravel()
+    value = np.concatenate([asset_values, np.ones(2 * horizon)])
+    return start, index, value
+
+
+class CVaRSolver:
+    """Minimum-CVaR LP solver that warm-starts from its previous basis.
+
+    Consecutive rebalances solve over overlapping windows. When scenarios carry
+    labels (e.g. dates), the simplex basis of the scenarios both problems share is
+    carried over, so only the scenarios that entered the window need pivoting, and
+    the last weights seed scenario generation. Without HiGHS' Python bindings the
+    LP goes to ``scipy.optimize.linprog`` and starts cold.
+    """
+
+    def __init__(self) -> None:
+        self._basis = None
+        self._labels: pd.Index | None = None
+        self._n_assets: int | None = None
+        self.weights: np.ndarray | None = None
+
+    def solve(
+        self,
+        returns: np.ndarray,
+        alpha: float = 0.95,
+        max_weight: float | None = None,
+        probabilities: np.ndarray | None = None,
+        labels: pd.Index | None = None,
+    ) -> CVaRResult:
+        returns = np.asarray(returns, dtype=float)
+        horizon, n_assets = returns.shape
+        if horizon == 0 or not np.isfinite(returns).all():
+            return CVaRResult(np.full(n_assets, 1.0 / n_assets), np.nan, np.nan, 0, False)
+        if probabilities is None:
+            probabilities = np.full(horizon, 1.0 / horizon)
+        cost = np.concatenate([np.zeros(n_assets), [1.0], probabilities / (1 - alpha)])
+        upper = 1.0 if max_weight is None else max_weight
+        started = time.perf_counter()
+        if _load_highspy() is not None:
+            solver = "HIGHS"
+            solution, iterations = self._solve_highs(returns, cost, upper, labels)
+        else:
+            solver = "LINPROG"
+            solution, iterations = _solve_linprog(returns, cost, upper)
+        status = "failed" if solution is None else "optimal"
+        telemetry.record_solve(solver, status, time.perf_counter() - started)
+        if solution is None:
+            return CVaRResult(np.full(n_assets, 1.0 / n_assets), np.nan, np.nan, iterations, False)
+        self.weights = solution[:n_assets]
+        return CVaRResult(
+            weights=solution[:n_assets],
+            var=float(solution[n_assets]),
+            cvar=float(cost @ solution),
+            iterations=iterations,
+            optimal=True,
+        )
 
+    def _solve_highs(
+        self, returns: np.ndarray, cost: np.ndarray, upper: float, labels: pd.Index | None
+    ) -> tuple[np.ndarray | None, int]:
+        highspy = _load_highspy()
+        horizon, n_assets = returns.shape
+        n_cols = n_assets + 1 + horizon
+        inf = highspy.kHighsInf
+        lp = highspy.HighsLp()
+        lp.num_col_ = n_cols
+        lp.num_row_ = horizon + 1
+        lp.col_cost_ = cost
+        lp.col_lower_ = np.concatenate([np.zeros(n_assets), [-inf], np.zeros(horizon)])
+        lp.col_upper_ = np.concatenate([np.full(n_assets, upper), np.full(horizon + 1, inf)])
+        lp.row_lower_ = np.concatenate([np.zeros(horizon), [1.0]])
+        lp.row_upper_ = np.concatenate([np.full(horizon, inf), [1.0]])
+        matrix = lp.a_matrix_
+        matrix.format_ = highspy.MatrixFormat.kColwise
+        matrix.num_col_ = n_cols
+        matrix.num_row_ = horizon + 1
+        matrix.start_, matrix.index_, matrix.value_ = _lp_columns(returns)
 
-def _solve(problem: "cp.Problem", preferred: list[str]) -> None:
-    solver = _pick_solver(preferred)
-    if solver:
-        problem.solve(solver=solver, warm_start=True)
+        highs = highspy.Highs()
+        highs.setOptionValue("output_flag", False)
+        highs.passModel(lp)
+        basis = self._aligned_basis(n_assets, labels)
+        if basis is not None and highs.setBasis(basis) != highspy.HighsStatus.kOk:
+            highs.clearSolver()
+        highs.run()
+
+        iterations = highs.getInfo().simplex_iteration_count
+        if highs.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+            self._basis = None
+            return None, iterations
+        self._basis = highs.getBasis()
+        self._labels = None if labels is None else pd.Index(labels)
+        self._n_assets = n_assets
+        return np.array(highs.getSolution().col_value), iterations
+
+    def _aligned_basis(self, n_assets: int, labels: pd.Index | None):
+        """Previous basis mapped onto ``labels``; new scenarios start with a slack row."""
+        if self._basis is None or labels is None or self._labels is None:
+            return None
+        if self._n_assets != n_assets:
+            return None
+        previous = self._labels.get_indexer(labels)
+        shared = previous >= 0
+        if not shared.any():
+            return None
+        highspy = _load_highspy()
+        status = highspy.HighsBasisStatus
+        col_status = np.array(self._basis.col_status, dtype=object)
+        row_status = np.array(self._basis.row_status, dtype=object)
+        scenario_cols = np.where(shared, col_status[n_assets + 1 :][previous], status.kLower)
+        scenario_rows = np.where(shared, row_status[:-1][previous], status.kBasic)
+
+        basis = highspy.HighsBasis()
+        basis.col_status = list(col_status[: n_assets + 1]) + list(scenario_cols)
+        basis.row_status = list(scenario_rows) + [row_status[-1]]
+        basis.valid = True
+        return basis
+
+
+def _solve_linprog(
+    returns: np.ndarray, cost: np.ndarray, upper: float
+) -> tuple[np.ndarray | None, int]:
+    from scipy import sparse
+    from scipy.optimize import linprog
+
+    horizon, n_assets = returns.shape
+    start, index, value = _lp_columns(returns)
+    matrix = sparse.csc_matrix((value, index, start), shape=(horizon + 1, n_assets + 1 + horizon))
+    bounds = [(0, upper)] * n_assets + [(None, None)] + [(0, None)] * horizon
+    result = linprog(
+        cost,
+        A_ub=-matrix[:horizon],
+        b_ub=np.zeros(horizon),
+        A_eq=matrix[horizon:],
+        b_eq=[1.0],
+        bounds=bounds,
+        method="highs",
+    )
+    if result.status != 0:
+        return None, int(result.nit)
+    return result.x, int(result.nit)
+
+
+def _generate_scenarios(
+    solver: CVaRSolver,
+    returns: np.ndarray,
+    labels: pd.Index,
+    alpha: float,
+    max_weight: float | None,
+) -> CVaRResult:
+    """Solve over a growing subsample of scenarios until it holds the whole tail.
+
+    Scenarios below the optimal loss threshold do not affect the objective, so the
+    LP only needs the ones in the tail. It starts from the worst days of the
+    solver's previous portfolio (equal weights on the first call), then adds every
+    scenario whose loss exceeds the threshold of the current solution; when none
+    does, the subsampled solution is optimal for the full set.
+    """
+    horizon = len(returns)
+    active = np.zeros(horizon, dtype=bool)
+    reference = solver.weights
+    if reference is None or len(reference) != returns.shape[1]:
+        reference = np.full(returns.shape[1], 1.0 / returns.shape[1])
+    worst_first = np.argsort(returns @ reference, kind="stable")
+    active[worst_first[: int(np.ceil(_INITIAL_TAIL * (1 - alpha) * horizon))]] = True
+    iterations = 0
+    for _ in range(_MAX_ROUNDS):
+        rows = np.flatnonzero(active)
+        probabilities = np.full(len(rows), 1.0 / horizon)
+        result = solver.solve(returns[rows], alpha, max_weight, probabilities, labels[rows])
+        iterations += result.iterations
+        if not result.optimal:
+            break
+        losses = -(returns @ result.weights)
+        violated = ~active & (losses > result.var + _LOSS_TOLERANCE)
+        if not violated.any():
+            result.iterations = iterations
+            return result
+        active |= violated
+    return solver.solve(returns, alpha, max_weight, labels=labels)
+
+
+def solve_cvar(
+    returns: pd.DataFrame | np.ndarray,
+    alpha: float = 0.95,
+    max_weight: float | None = None,
+    solver: CVaRSolver | None = None,
+) -> CVaRResult:
+    """Long-only minimum-CVaR portfolio over historical return scenarios.
+
+    Histories longer than ``_GENERATION_HORIZON`` are solved by scenario
+    generation (see :func:`_generate_scenarios`), which is exact. Passing the
+    same ``solver`` to consecutive calls with DataFrame windows reuses its basis
+    for the dates the windows share.
+    """
+    values = np.asarray(returns, dtype=float)
+    if isinstance(returns, pd.DataFrame):
+        labels = returns.index
+        solver = solver or CVaRSolver()
     else:
-        problem.solve(warm_start=True)
+        # Positions are only meaningful within this call.
+        labels = pd.RangeIndex(len(values))
+        solver = CVaRSolver()
+    if len(values) > _GENERATION_HORIZON and np.isfinite(values).all():
+        return _generate_scenarios(solver, values, labels, alpha, max_weight)
+    return solver.solve(values, alpha, max_weight, labels=labels)
 
 
 def cvar_optimize(
@@ -31,24 +270,7 @@ def cvar_optimize(
 ) -> np.ndarray:
     if returns.empty:
         return np.array([])
-    if cp is None:
-        return np.ones(returns.shape[1]) / returns.shape[1]
-
-    matrix = returns.values
-    t_len, n_assets = matrix.shape
-
-    w = cp.Variable(n_assets)
-    z = cp.Variable()
-    u = cp.Variable(t_len)
-
-    losses = -matrix @ w
-    objective = cp.Minimize(z + (1 / ((1 - alpha) * t_len)) * cp.sum(u))
-    constraints = [u >= losses - z, u >= 0, cp.sum(w) == 1, w >= 0]
-    if max_weight is not None:
-        constraints.append(w <= max_weight)
-
-    _solve(cp.Problem(objective, constraints), ["ECOS", "SCS"])
-    if w.value is None:
-        return np.ones(n_assets) / n_assets
-    weights = np.maximum(w.value, 0)
+
+    weights = solve_cvar(returns, alpha, max_weight).weights
+    weights = np.maximum(weights, 0)
     return weights / weights.sum()
@@ -3,27 +3,14 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 
-try:
-    import cvxpy as cp
-except Exception:  # pragma: no cover
-    cp = None
-
-
-def _pick_solver(preferred: list[str]) -> str | None:
-    if cp is None:
-        return None
-    for name in preferred:
-        if name in cp.installed_solvers():
-            return name
-    return None
-
-
-def _solve(problem: "cp.Problem", preferred: list[str]) -> None:
-    solver = _pick_solver(preferred)
-    if solver:
-        problem.solve(solver=solver, warm_start=True)
-    else:
-        problem.solve(warm_start=True)
+from ..analytics.covariance import FactorCovariance, as_dense, portfolio_variance
+from .problems import (
+    load_cvxpy,
+    solve_max_sharpe,
+    solve_min_variance,
+    solve_target_return,
+    solve_target_return_sweep,
+)
 
 
 def _normalize(weights: np.ndarray) -> np.ndarray:
@@ -33,21 +20,29 @@ def _normalize(weights: np.ndarray) -> np.ndarray:
     return weights / total
 
 
-def min_variance_unconstrained(cov: np.ndarray) -> np.ndarray:
-    inv = np.linalg.pinv(cov)
+def _inverse_apply(cov, rhs: np.ndarray) -> np.ndarray:
+    """``inv(cov) @ rhs``; factored covariances use Woodbury, O(N·K²) instead of O(N³)."""
+    if isinstance(cov, FactorCovariance):
+        return cov.solve(rhs)
+    return np.linalg.pinv(cov) @ rhs
+
+
+def min_variance_unconstrained(cov) -> np.ndarray:
     ones = np.ones(cov.shape[0])
-    weights = inv @ ones
+    weights = _inverse_apply(cov, ones)
     return _normalize(weights)
 
 
-def max_sharpe_unconstrained(mu: np.ndarray, cov: np.ndarray, risk_free: float = 0.0) -> np.ndarray:
-    inv = np.linalg.pinv(cov)
+def max_sharpe_unconstrained(mu: np.ndarray, cov, risk_free: float = 0.0) -> np.ndarray:
     excess = mu - risk_free
-    weights = inv @ excess
+    weights = _inverse_apply(cov, excess)
     return _normalize(weights)
 
 
-def target_return_unconstrained(mu: np.ndarray, cov: np.ndarray, target_return: float) -> np.ndarray:
+def target_return_unconstrained(mu: np.ndarray, cov, target_return: float) -> np.ndarray:
+    if isinstance(cov, FactorCovariance):
+        weights, _ = _two_fund_frontier(mu, cov, np.array([target_return]))
+        return weights[0]
     n = len(mu)
     ones = np.ones(n)
     kkt = np.block(
@@ -62,64 +57,86 @@ def target_return_unconstrained(mu: np.ndarray, cov: np.ndarray, target_return:
     return solution[:n]
 
 
-def min_variance_long_only(cov: np.ndarray, max_weight: float | None = None) -> np.ndarray:
-    if cp is None:
+def min_variance_long_only(cov, max_weight: float | None = None) -> np.ndarray:
+    if load_cvxpy() is None:
         return min_variance_unconstrained(cov)
-    n = cov.shape[0]
-    w = cp.Variable(n)
-    objective = cp.Minimize(cp.quad_form(w, cov))
-    constraints = [cp.sum(w) == 1, w >= 0]
-    if max_weight is not None:
-        constraints.append(w <= max_weight)
-    _solve(cp.Problem(objective, constraints), ["OSQP", "SCS"])
-    return _normalize(w.value if w.value is not None else np.ones(n))
+    weights = solve_min_variance(cov, max_weight)
+    return _normalize(weights if weights is not None else np.ones(cov.shape[0]))
 
 
 def target_return_long_only(
-    mu: np.ndarray, cov: np.ndarray, target_return: float, max_weight: float | None = None
+    mu: np.ndarray, cov, target_return: float, max_weight: float | None = None
 ) -> np.ndarray:
-    if cp is None:
+    if load_cvxpy() is None:
         return target_return_unconstrained(mu, cov, target_return)
-    n = len(mu)
-    w = cp.Variable(n)
-    objective = cp.Minimize(cp.quad_form(w, cov))
-    constraints = [cp.sum(w) == 1, w >= 0, mu @ w >= target_return]
-    if max_weight is not None:
-        constraints.append(w <= max_weight)
-    _solve(cp.Problem(objective, constraints), ["OSQP", "SCS"])
-    return _normalize(w.value if w.value is not None else np.ones(n))
+    weights = solve_target_return(mu, cov, target_return, max_weight)
+    return _normalize(weights if weights is not None else np.ones(len(mu)))
 
 
-def max_sharpe_long_only(mu: np.ndarray, cov: np.ndarray, risk_free: float = 0.0) -> np.ndarray:
-    if cp is None:
+def max_sharpe_long_only(mu: np.ndarray, cov, risk_free: float = 0.0) -> np.ndarray:
+    if load_cvxpy() is None:
         return max_sharpe_unconstrained(mu, cov, risk_free)
-    n = len(mu)
-    w = cp.Variable(n)
-    objective = cp.Maximize((mu - risk_free) @ w)
-    constraints = [cp.quad_form(w, cov) <= 1, w >= 0]
-    _solve(cp.Problem(objective, constraints), ["SCS", "OSQP"])
-    if w.value is None:
-        return _normalize(np.ones(n))
-    return _normalize(w.value)
+    weights = solve_max_sharpe(mu, cov, risk_free)
+    if weights is None:
+        return _normalize(np.ones(len(mu)))
+    return _normalize(weights)
+
+
+def _two_fund_frontier(
+    mu: np.ndarray, cov, target_returns: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Closed-form unconstrained frontier: every point mixes the same two funds."""
+    ones = np.ones(len(mu))
+    rhs = np.column_stack([ones, mu])
+    if isinstance(cov, FactorCovariance):
+        solved = cov.solve(rhs)
+    else:
+        solved = np.linalg.solve(cov, rhs)
+    inv_ones, inv_mu = solved[:, 0], solved[:, 1]
+    a = ones @ inv_ones
+    b = ones @ inv_mu
+    c = mu @ inv_mu
+    d = a * c - b * b
+    weights = (
+        np.outer(c - target_returns * b, inv_ones) + np.outer(target_returns * a - b, inv_mu)
+    ) / d
+    variance = (a * target_returns**2 - 2 * b * target_returns + c) / d
+    return weights, np.sqrt(np.clip(variance, 0, None))
 
 
 def efficient_frontier(
-    mu: pd.Series, cov: pd.DataFrame, points: int = 25, long_only: bool = True
+    mu: pd.Series,
+    cov: pd.DataFrame | FactorCovariance,
+    points: int = 25,
+    long_only: bool = True,
 ) -> pd.DataFrame:
+    """Efficient frontier over ``points`` target returns between min and max ``mu``.
+
+    The long-only frontier compiles the target-return problem once with the target
+    as a parameter and warm-starts along the sweep. The unconstrained frontier is
+    the closed-form two-fund solution. ``cov`` may be a :class:`FactorCovariance`,
+    which is passed to the solvers in factored form.
+    """
     mu_values = mu.values
-    cov_values = cov.values
+    cov_values = cov.values if isinstance(cov, pd.DataFrame) else cov
     target_returns = np.linspace(mu.min(), mu.max(), points)
-    weights_list = []
-    vol_list = []
 
-    for target in target_returns:
-        if long_only:
-            weights = target_return_long_only(mu_values, cov_values, target)
+    if not long_only:
+        weights, vols = _two_fund_frontier(mu_values, cov_values, target_returns)
+        weights_list = list(weights)
+        vol_list = [float(vol) for vol in vols]
+    else:
+        if load_cvxpy() is None:
+            weights_list = [
+                target_return_unconstrained(mu_values, as_dense(cov_values), target)
+                for target in target_returns
+            ]
         else:
-            weights = target_return_unconstrained(mu_values, cov_values, target)
-        vol = float(np.sqrt(weights.T @ cov_values @ weights))
-        weights_list.append(weights)
-        vol_list.append(vol)
+            solved = solve_target_return_sweep(mu_values, cov_values, target_returns)
+            weights_list = [
+                _normalize(w if w is not None else np.ones(len(mu_values))) for w in solved
+            ]
+        vol_list = [float(np.sqrt(portfolio_variance(cov_values, w))) for w in weights_list]
 
     return pd.DataFrame(
         {
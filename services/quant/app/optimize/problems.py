@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable
+
+import numpy as np
+
+from .. import telemetry
+from ..analytics.covariance import FactorCovariance
+
+if TYPE_CHECKING:
+    import cvxpy as cp
+
+
+@lru_cache(maxsize=1)
+def load_cvxpy():
+    """The ``cvxpy`` module, or ``None`` when it is not installed.
+
+    Importing cvxpy takes a large share of service startup, so it is deferred to
+    the first constrained solve (or to the warm-up thread, see ``app.warmup``).
+    """
+    try:
+        import cvxpy
+    except Exception:  # pragma: no cover - optional dependency for constraints
+        return None
+    return cvxpy
+
+
+@lru_cache(maxsize=1)
+def _installed_solvers() -> frozenset[str]:
+    cp = load_cvxpy()
+    return frozenset(cp.installed_solvers()) if cp is not None else frozenset()
+
+
+def pick_solver(preferred: list[str]) -> str | None:
+    installed = _installed_solvers()
+    for name in preferred:
+        if name in installed:
+            return name
+    return None
+
+
+def solve(problem: "cp.Problem", preferred: list[str]) -> None:
+    solver = pick_solver(preferred)
+    started = time.perf_counter()
+    status = "error"
+    try:
+        if solver:
+            problem.solve(solver=solver, warm_start=True)
+        else:
+            problem.solve(warm_start=True)
+        status = problem.status
+    finally:
+        telemetry.record_solve(solver or "default", status, time.perf_counter() - started)
+
+
+@dataclass
+class CachedProblem:
+    """A compiled CVXPY problem whose data enters only through parameters.
+
+    Re-solving after updating ``parameters`` reuses the canonicalized form and
+    warm-starts from the previous solution. ``lock`` serializes use of the
+    shared instance across threads.
+    """
+
+    problem: "cp.Problem"
+    weights: "cp.Variable"
+    parameters: dict[str, "cp.Parameter"]
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class ProblemCache:
+    """LRU of :class:`CachedProblem` keyed by problem structure."""
+
+    def __init__(self, maxsize: int = 64) -> None:
+        self.maxsize = maxsize
+        self._problems: OrderedDict[tuple, CachedProblem] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, build: Callable[[], CachedProblem]) -> CachedProblem:
+        with self._lock:
+            cached = self._problems.get(key)
+            if cached is not None:
+                self._problems.move_to_end(key)
+                return cached
+        cached = build()
+        with self._lock:
+            cached = self._problems.setdefault(key, cached)
+            while len(self._problems) > self.maxsize:
+                self._problems.popitem(last=False)
+        return cached
+
+    def clear(self) -> None:
+        with self._lock:
+            self._problems.clear()
+
+
+problem_cache = ProblemCache()
+
+
+def covariance_factor(cov: np.ndarray) -> np.ndarray | None:
+    """``F`` with ``F.T @ F == cov``, so ``w' cov w`` can be written as ``||F w||^2``."""
+    cov = np.asarray(cov, dtype=float)
+    if not np.isfinite(cov).all():
+        return None
+    try:
+        return np.linalg.cholesky(cov).T
+    except np.linalg.LinAlgError:
+        eigvals, eigvecs = np.linalg.eigh((cov + cov.T) / 2)
+        return np.sqrt(np.clip(eigvals, 0, None))[:, None] * eigvecs.T
+
+
+def risk_values(cov) -> tuple[int | None, dict] | None:
+    """Parameter values for the risk term and the factor count that keys its structure.
+
+    A dense covariance is entered through its square-root factor (``n_factors`` is
+    ``None``); a :class:`FactorCovariance` through its loadings and specific
+    volatilities, so the compiled problem holds factors x assets entries.
+    """
+    if isinstance(cov, FactorCovariance):
+        loadings = np.asarray(cov.loadings, dtype=float)
+        specific = np.asarray(cov.specific, dtype=float)
+        if not (np.isfinite(loadings).all() and np.isfinite(specific).all()):
+            return None
+        values = {"loadings": loadings.T, "specific": np.sqrt(np.clip(specific, 0, None))}
+        return loadings.shape[1], values
+    factor = covariance_factor(cov)
+    if factor is None:
+        return None
+    return None, {"factor": factor}
+
+
+def _risk_term(w, n_assets: int, n_factors: int | None, parameters: dict):
+    cp = load_cvxpy()
+    if n_factors is None:
+        parameters["factor"] = cp.Parameter((n_assets, n_assets))
+        return cp.sum_squares(parameters["factor"] @ w)
+    parameters["loadings"] = cp.Parameter((n_factors, n_assets))
+    parameters["specific"] = cp.Parameter(n_assets, nonneg=True)
+    return cp.sum_squares(parameters["loadings"] @ w) + cp.sum_squares(
+        cp.multiply(parameters["specific"], w)
+    )
+
+
+def _long_only_constraints(w, n_assets: int, has_max_weight: bool, parameters: dict) -> list:
+    cp = load_cvxpy()
+    constraints = [cp.sum(w) == 1, w >= 0]
+    if has_max_weight:
+        parameters["max_weight"] = cp.Parameter(nonneg=True)
+        constraints.append(w <= parameters["max_weight"])
+    return constraints
+
+
+def _build_min_variance(
+    n_assets: int, has_max_weight: bool, n_factors: int | None = None
+) -> CachedProblem:
+    cp = load_cvxpy()
+    w = cp.Variable(n_assets)
+    parameters = {}
+    risk = _risk_term(w, n_assets, n_factors, parameters)
+    constraints = _long_only_constraints(w, n_assets, has_max_weight, parameters)
+    problem = cp.Problem(cp.Minimize(risk), constraints)
+    return CachedProblem(problem, w, parameters)
+
+
+def _build_target_return(
+    n_assets: int, has_max_weight: bool, n_factors: int | None = None
+) -> CachedProblem:
+    cp = load_cvxpy()
+    w = cp.Variable(n_assets)
+    parameters = {"mu": cp.Parameter(n_assets), "target": cp.Parameter()}
+    risk = _risk_term(w, n_assets, n_factors, parameters)
+    constraints = _long_only_constraints(w, n_assets, has_max_weight, parameters)
+    constraints.append(parameters["mu"] @ w >= parameters["target"])
+    problem = cp.Problem(cp.Minimize(risk), constraints)
+    return CachedProblem(problem, w, parameters)
+
+
+def _build_max_sharpe(n_assets: int, n_factors: int | None = None) -> CachedProblem:
+    cp = load_cvxpy()
+    w = cp.Variable(n_assets)
+    parameters = {"excess": cp.Parameter(n_assets)}
+    risk = _risk_term(w, n_assets, n_factors, parameters)
+    objective = cp.Maximize(parameters["excess"] @ w)
+    constraints = [risk <= 1, w >= 0]
+    return CachedProblem(cp.Problem(objective, constraints), w, parameters)
+
+
+def _solve_cached(cached: CachedProblem, values: dict, preferred: list[str]) -> np.ndarray | None:
+    with cached.lock:
+        for name, value in values.items():
+            cached.parameters[name].value = value
+        try:
+            solve(cached.problem, preferred)
+        except load_cvxpy().error.SolverError:
+            return None
+        if cached.weights.value is None:
+            return None
+        return np.array(cached.weights.value, dtype=float)
+
+
+def solve_min_variance(cov, max_weight: float | None = None) -> np.ndarray | None:
+    """Long-only minimum variance weights, or ``None`` if the problem could not be solved.
+
+    ``cov`` is a dense matrix or a :class:`FactorCovariance`.
+    """
+    risk = risk_values(cov)
+    if risk is None or load_cvxpy() is None:
+        return None
+    n_factors, values = risk
+    n_assets = cov.shape[0]
+    has_max_weight = max_weight is not None
+    cached = problem_cache.get(
+        ("min_variance", n_assets, has_max_weight, n_factors),
+        lambda: _build_min_variance(n_assets, has_max_weight, n_factors),
+    )
+    if has_max_weight:
+        values["max_weight"] = max_weight
+    return _solve_cached(cached, values, ["OSQP", "SCS"])
+
+
+def solve_target_return(
+    mu: np.ndarray, cov, target_return: float, max_weight: float | None = None
+) -> np.ndarray | None:
+    risk = risk_values(cov)
+    if risk is None or load_cvxpy() is None:
+        return None
+    n_factors, values = risk
+    n_assets = cov.shape[0]
+    has_max_weight = max_weight is not None
+    cached = problem_cache.get(
+        ("target_return", n_assets, has_max_weight, n_factors),
+        lambda: _build_target_return(n_assets, has_max_weight, n_factors),
+    )
+    values.update(mu=np.asarray(mu, dtype=float), target=target_return)
+    if has_max_weight:
+        values["max_weight"] = max_weight
+    return _solve_cached(cached, values, ["OSQP", "SCS"])
+
+
+def solve_target_return_sweep(
+    mu: np.ndarray,
+    cov,
+    targets: np.ndarray,
+    max_weight: float | None = None,
+) -> list[np.ndarray | None]:
+    """Solve one target-return problem per target, compiled once and warm-started in order."""
+    risk = risk_values(cov)
+    if risk is None or load_cvxpy() is None:
+        return [None] * len(targets)
+    n_factors, values = risk
+    n_assets = cov.shape[0]
+    has_max_weight = max_weight is not None
+    cached = problem_cache.get(
+        ("target_return", n_assets, has_max_weight, n_factors),
+        lambda: _build_target_return(n_assets, has_max_weight, n_factors),
+    )
+
+    values["mu"] = np.asarray(mu, dtype=float)
+    if has_max_weight:
+        values["max_weight"] = max_weight
+    results = []
+    for target in targets:
+        values["target"] = float(target)
+        results.append(_solve_cached(cached, values, ["OSQP", "SCS"]))
+    return results
+
+
+def solve_max_sharpe(mu: np.ndarray, cov, risk_free: float = 0.0) -> np.ndarray | None:
+    risk = risk_values(cov)
+    if risk is None or load_cvxpy() is None:
+        return None
+    n_factors, values = risk
+    n_assets = cov.shape[0]
+    cached = problem_cache.get(
+        ("max_sharpe", n_assets, n_factors), lambda: _build_max_sharpe(n_assets, n_factors)
+    )
+    values["excess"] = np.asarray(mu, dtype=float) - risk_free
+    return _solve_cached(cached, values, ["SCS", "OSQP"])
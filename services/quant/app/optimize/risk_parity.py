@@ -1,24 +1,168 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
+from typing import Literal
+
 import numpy as np
 import pandas as pd
 
+from ..analytics.covariance import FactorCovariance, as_dense
+
+RiskParityMethod = Literal["newton", "ccd"]
+
+
+@dataclass
+class RiskParityResult:
+    """Risk-budgeting weights with convergence diagnostics.
+
+    ``residual`` is the largest absolute gap between an asset's share of portfolio
+    variance and its budget.
+    """
+
+    weights: np.ndarray
+    iterations: int
+    residual: float
+    converged: bool
+
+
+def _budgets(budgets: np.ndarray | None, n_assets: int) -> np.ndarray:
+    if budgets is None:
+        return np.full(n_assets, 1.0 / n_assets)
+    budgets = np.asarray(budgets, dtype=float)
+    if budgets.shape != (n_assets,) or (budgets <= 0).any() or not np.isfinite(budgets).all():
+        raise ValueError("Risk budgets must be positive, finite and one per asset.")
+    return budgets / budgets.sum()
+
+
+def risk_contributions(cov: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Fraction of portfolio variance contributed by each asset (rows for stacked inputs)."""
+    marginal = np.einsum("...ij,...j->...i", cov, weights)
+    contributions = weights * marginal
+    return contributions / contributions.sum(axis=-1, keepdims=True)
+
+
+def _residual(cov: np.ndarray, x: np.ndarray, budgets: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.abs(risk_contributions(cov, x) - budgets).max(axis=-1)
+
 
-def risk_parity_weights(cov: pd.DataFrame, max_iter: int = 200, step: float = 0.05) -> np.ndarray:
-    matrix = cov.values
-    n = matrix.shape[0]
-    weights = np.ones(n) / n
+def _initial_point(cov: np.ndarray, budgets: np.ndarray, x0: np.ndarray | None) -> np.ndarray:
+    """Starting point scaled onto ``x' cov x == sum(budgets)``, where the optimum lies."""
+    if x0 is None:
+        # Inverse-volatility weights solve the problem exactly for uncorrelated assets.
+        x = budgets / np.sqrt(np.clip(np.einsum("...ii->...i", cov), 1e-16, None))
+    else:
+        x = np.clip(np.asarray(x0, dtype=float), 1e-8, None)
+    variance = np.einsum("...i,...ij,...j->...", x, cov, x)
+    return x / np.sqrt(np.clip(variance, 1e-300, None))[..., None]
+
+
+def solve_risk_parity_batch(
+    covs: np.ndarray,
+    budgets: np.ndarray | None = None,
+    x0: np.ndarray | None = None,
+    tol: float = 1e-10,
+    max_iter: int = 50,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Damped Newton (Spinu) on a stack of covariance matrices.
+
+    Minimizes ``x' cov x / 2 - budgets' log(x)`` for every matrix in ``covs``
+    (shape ``(batch, n, n)``) at once; ``w = x / sum(x)`` then has risk
+    contributions equal to ``budgets``. Returns weights, iteration counts,
+    residuals and converged flags, one per matrix. Matrices with non-finite
+    entries get equal weights and ``converged=False``.
+    """
+    covs = np.asarray(covs, dtype=float)
+    batch, n_assets = covs.shape[0], covs.shape[-1]
+    budgets = _budgets(budgets, n_assets)
+    valid = np.isfinite(covs).all(axis=(1, 2))
+    covs = np.where(valid[:, None, None], covs, np.eye(n_assets))
+
+    x = _initial_point(covs, budgets, x0)
+    iterations = np.zeros(batch, dtype=np.int64)
+    residual = _residual(covs, x, budgets)
+    active = valid & ~(residual < tol)
     for _ in range(max_iter):
-        portfolio_vol = np.sqrt(weights.T @ matrix @ weights)
-        if portfolio_vol == 0:
+        if not active.any():
             break
-        marginal = matrix @ weights / portfolio_vol
-        risk_contrib = weights * marginal
-        target = portfolio_vol / n
-        gradient = risk_contrib - target
-        weights -= step * gradient
-        weights = np.clip(weights, 1e-6, None)
-        weights = weights / weights.sum()
-        if np.linalg.norm(gradient) < 1e-4:
-            break
-    return weights
+        idx = np.flatnonzero(active)
+        cov, xa = covs[idx], x[idx]
+        gradient = np.einsum("bij,bj->bi", cov, xa) - budgets / xa
+        hessian = cov.copy()
+        hessian[:, np.arange(n_assets), np.arange(n_assets)] += budgets / xa**2
+        try:
+            step = np.linalg.solve(hessian, gradient[..., None])[..., 0]
+        except np.linalg.LinAlgError:
+            step = gradient / np.einsum("bii->bi", hessian)
+        # Newton decrement; damp long steps so iterates stay strictly positive.
+        decrement = np.sqrt(np.clip(np.einsum("bi,bi->b", gradient, step), 0, None))
+        scale = np.where(decrement > 0.25, 1.0 / (1.0 + decrement), 1.0)
+        updated = xa - scale[:, None] * step
+        updated = np.where(updated > 0, updated, xa / 2)
+        x[idx] = updated
+        iterations[idx] += 1
+        residual[idx] = _residual(cov, updated, budgets)
+        active[idx] = ~(residual[idx] < tol)
+
+    weights = x / x.sum(axis=1, keepdims=True)
+    weights[~valid] = 1.0 / n_assets
+    residual[~valid] = np.nan
+    converged = valid & (residual < tol)
+    return weights, iterations, residual, converged
+
+
+def _solve_ccd(
+    cov: np.ndarray, budgets: np.ndarray, x0: np.ndarray | None, tol: float, max_iter: int
+) -> RiskParityResult:
+    """Cyclical coordinate descent (Griveau-Billion et al.), one closed-form root per asset."""
+    x = _initial_point(cov, budgets, x0)
+    diag = np.diag(cov)
+    marginal = cov @ x
+    residual = float(_residual(cov, x, budgets))
+    iterations = 0
+    while residual >= tol and iterations < max_iter:
+        for i in range(len(x)):
+            others = marginal[i] - diag[i] * x[i]
+            updated = (-others + np.sqrt(others**2 + 4 * diag[i] * budgets[i])) / (2 * diag[i])
+            marginal += cov[:, i] * (updated - x[i])
+            x[i] = updated
+        iterations += 1
+        residual = float(_residual(cov, x, budgets))
+    return RiskParityResult(x / x.sum(), iterations, residual, residual < tol)
+
+
+def solve_risk_parity(
+    cov: np.ndarray | pd.DataFrame | FactorCovariance,
+    budgets: np.ndarray | None = None,
+    x0: np.ndarray | None = None,
+    method: RiskParityMethod = "newton",
+    tol: float = 1e-10,
+    max_iter: int | None = None,
+) -> RiskParityResult:
+    """Risk-budgeting weights for one covariance matrix.
+
+    ``budgets`` defaults to equal risk; ``x0`` warm-starts from previous weights.
+    """
+    matrix = as_dense(cov).astype(float)
+    n_assets = matrix.shape[0]
+    budgets = _budgets(budgets, n_assets)
+    if method == "ccd":
+        if not np.isfinite(matrix).all() or (np.diag(matrix) <= 0).any():
+            return RiskParityResult(np.full(n_assets, 1.0 / n_assets), 0, float("nan"), False)
+        return _solve_ccd(matrix, budgets, x0, tol, max_iter or 500)
+    weights, iterations, residual, converged = solve_risk_parity_batch(
+        matrix[None],
+        budgets,
+        None if x0 is None else np.asarray(x0, dtype=float)[None],
+        tol=tol,
+        max_iter=max_iter or 50,
+    )
+    return RiskParityResult(weights[0], int(iterations[0]), float(residual[0]), bool(converged[0]))
+
+
+def risk_parity_weights(
+    cov: pd.DataFrame | FactorCovariance,
+    budgets: np.ndarray | None = None,
+    x0: np.ndarray | None = None,
+) -> np.ndarray:
+    return solve_risk_parity(cov, budgets=budgets, x0=x0).weights
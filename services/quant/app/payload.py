@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .analytics import drawdown_curve
+from .backtest import BacktestOutput
+from .models import BacktestResult, RunSummary, TimeSeries, WeightSeries, WeightsGranularity
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+# Rows per Arrow record batch, so clients can decode the stream incrementally.
+ARROW_BATCH_ROWS = 65536
+_SERIES = ("equity_curve", "returns", "drawdown", "turnover", "costs")
+_WEIGHT_PREFIX = "weight:"
+
+
+def iso_dates(index: pd.Index) -> list[str]:
+    return np.datetime_as_string(index.values.astype("datetime64[D]"), unit="D").tolist()
+
+
+def series_payload(series: pd.Series) -> TimeSeries:
+    series = series.dropna()
+    return TimeSeries.model_construct(
+        dates=iso_dates(series.index), values=series.to_numpy(dtype=float).tolist()
+    )
+
+
+def _weight_columns(weights: pd.DataFrame) -> list[str]:
+    return [col[0] if isinstance(col, tuple) else str(col) for col in weights.columns]
+
+
+def select_weights(output: BacktestOutput, granularity: WeightsGranularity) -> pd.DataFrame:
+    """Daily weights, or only the rows where target weights were set."""
+    weights = output.weights
+    if granularity == "rebalance" and output.rebalance_dates is not None:
+        weights = weights.loc[weights.index.isin(output.rebalance_dates)]
+    return weights
+
+
+def weights_payload(weights: pd.DataFrame) -> WeightSeries:
+    values = weights.fillna(0).to_numpy(dtype=float)
+    return WeightSeries.model_construct(
+        dates=iso_dates(weights.index),
+        weights={col: values[:, i].tolist() for i, col in enumerate(_weight_columns(weights))},
+    )
+
+
+def build_backtest_result(
+    output: BacktestOutput,
+    summary: RunSummary,
+    run_id: str,
+    granularity: WeightsGranularity = "daily",
+) -> BacktestResult:
+    """Payload built from whole-array conversions, skipping per-element validation."""
+    return BacktestResult.model_construct(
+        run_id=run_id,
+        summary=summary,
+        equity_curve=series_payload(output.equity_curve),
+        returns=series_payload(output.returns),
+        drawdown=series_payload(drawdown_curve(output.equity_curve)),
+        weights=weights_payload(select_weights(output, granularity)),
+        turnover=series_payload(output.turnover),
+        costs=series_payload(output.costs),
+    )
+
+
+def encode_backtest_arrow(
+    output: BacktestOutput,
+    summary: RunSummary,
+    run_id: str,
+    granularity: WeightsGranularity = "daily",
+) -> bytes:
+    """Arrow IPC stream (zstd) with one row per date.
+
+    Columns are ``date``, the series in ``_SERIES`` and one ``weight:<ticker>``
+    column per asset. Missing values are nulls; with ``granularity="rebalance"``
+    weights are null except on rebalance dates.
+    """
+    index = output.weights.index
+    series = {
+        "equity_curve": output.equity_curve,
+        "returns": output.returns,
+        "drawdown": drawdown_curve(output.equity_curve),
+        "turnover": output.turnover,
+        "costs": output.costs,
+    }
+    arrays = [pa.array(index.values.astype("datetime64[D]"), type=pa.date32())]
+    names = ["date"]
+    for name in _SERIES:
+        values = series[name].reindex(index).to_numpy(dtype=float)
+        arrays.append(pa.array(values, mask=np.isnan(values)))
+        names.append(name)
+
+    weights = output.weights.fillna(0).to_numpy(dtype=float)
+    selected = select_weights(output, granularity)
+    hidden = None if len(selected) == len(index) else ~index.isin(selected.index)
+    for i, col in enumerate(_weight_columns(output.weights)):
+        arrays.append(pa.array(weights[:, i], mask=hidden))
+        names.append(_WEIGHT_PREFIX + col)
+
+    metadata = {
+        "run_id": run_id,
+        "summary": summary.model_dump_json(),
+        "weights_granularity": granularity,
+    }
+    table = pa.Table.from_arrays(arrays, names=names).replace_schema_metadata(metadata)
+    sink = pa.BufferOutputStream()
+    options = pa.ipc.IpcWriteOptions(compression="zstd")
+    with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+        writer.write_table(table, max_chunksize=ARROW_BATCH_ROWS)
+    return sink.getvalue().to_pybytes()
+
+
+def decode_backtest_arrow(data: bytes) -> dict:
+    """Inverse of :func:`encode_backtest_arrow`, for clients and tests.
+
+    Returns ``run_id``, ``summary`` (dict), ``series`` (DataFrame of the series
+    columns) and ``weights`` (DataFrame, rebalance rows only when encoded that way).
+    """
+    table = pa.ipc.open_stream(data).read_all()
+    metadata = {key.decode(): value.decode() for key, value in table.schema.metadata.items()}
+    frame = table.to_pandas()
+    frame.index = pd.DatetimeIndex(frame.pop("date"))
+    frame.index.name = None
+    weight_names = [name for name in frame.columns if name.startswith(_WEIGHT_PREFIX)]
+    weights = frame[weight_names].dropna(how="all")
+    weights.columns = [name[len(_WEIGHT_PREFIX) :] for name in weight_names]
+    return {
+        "run_id": metadata["run_id"],
+        "summary": json.loads(metadata["summary"]),
+        "weights_granularity": metadata["weights_granularity"],
+        "series": frame[list(_SERIES)],
+        "weights": weights,
+    }
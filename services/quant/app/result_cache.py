@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple
+
+from pydantic import BaseModel
+
+from . import telemetry
+from .config import settings
+
+_EXTENSIONS = {"application/json": ".json", "application/vnd.apache.arrow.stream": ".arrow"}
+_MEDIA_TYPES = {extension: media for media, extension in _EXTENSIONS.items()}
+
+
+class CachedResult(NamedTuple):
+    content: bytes
+    media_type: str
+
+
+def result_key(kind: str, request: BaseModel, data_version: str) -> str:
+    """Content address of a result: the canonical request plus the version of its data."""
+    canonical = json.dumps(
+        {"kind": kind, "request": request.model_dump(mode="json"), "data": data_version},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+
+class ResultCache:
+    """Two-tier, byte-bounded cache of serialized results keyed by :func:`result_key`.
+
+    The memory tier is an LRU of response bytes. The disk tier keeps one file per
+    result under ``cache_dir/results`` and evicts the least recently used files
+    (by mtime, refreshed on hits) once it exceeds ``disk_bytes``. Keys include the
+    data version, so new bars make stale entries unreachable and they age out.
+    """
+
+    def __init__(self, memory_bytes: int, disk_bytes: int) -> None:
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._entries: OrderedDict[str, CachedResult] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def directory(self) -> Path:
+        return settings.cache_dir / "results"
+
+    def _remember(self, key: str, result: CachedResult) -> None:
+        size = len(result.content)
+        if size > self.memory_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.content)
+            self._entries[key] = result
+            self._bytes += size
+            while self._bytes > self.memory_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.content)
+
+    def get(self, key: str) -> CachedResult | None:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                telemetry.record_cache("result", "memory_hit")
+                return result
+
+        for path in self.directory().glob(f"{key}.*"):
+            media_type = _MEDIA_TYPES.get(path.suffix)
+            if media_type is None:
+                continue
+            try:
+                result = CachedResult(path.read_bytes(), media_type)
+                os.utime(path)
+            except FileNotFoundError:
+                continue
+            self._remember(key, result)
+            with self._lock:
+                self.disk_hits += 1
+            telemetry.record_cache("result", "disk_hit")
+            return result
+
+        with self._lock:
+            self.misses += 1
+        telemetry.record_cache("result", "miss")
+        return None
+
+    def put(self, key: str, content: bytes, media_type: str) -> None:
+        result = CachedResult(content, media_type)
+        self._remember(key, result)
+        extension = _EXTENSIONS.get(media_type)
+        if extension is None or len(content) > self.disk_bytes:
+            return
+        directory = self.directory()
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{key}{extension}"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(content)
+        os.replace(tmp, path)
+        self._evict_disk(directory)
+
+    def _evict_disk(self, directory: Path) -> None:
+        files = []
+        for path in directory.iterdir():
+            if path.suffix in _MEDIA_TYPES:
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+
+result_cache = ResultCache(settings.result_cache_bytes, settings.result_cache_disk_bytes)
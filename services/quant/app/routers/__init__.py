@@ -1,11 +1,13 @@
 from .backtest import router as backtest_router
 from .health import router as health_router
+from .metrics import router as metrics_router
 from .optimize import router as optimize_router
 from .risk import router as risk_router
 
 __all__ = [
     "backtest_router",
     "health_router",
+    "metrics_router",
     "optimize_router",
     "risk_router",
 ]
@@ -1,32 +1,54 @@
 from __future__ import annotations
 
+from datetime import date
 from uuid import uuid4
 
-from fastapi import APIRouter
+import pandas as pd
+from fastapi import APIRouter, HTTPException, Path, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
 
-from ..analytics import annualize_return, annualize_volatility, drawdown_curve, max_drawdown, sharpe_ratio
-from ..backtest import run_backtest
+from .. import jobs, telemetry
+from ..analytics import performance_summary
+from ..backtest import BacktestOutput, build_grid, run_backtest, run_backtest_grid
 from ..config import settings
-from ..data import load_ohlcv
-from ..models import BacktestRequest, BacktestResult, RunSummary, TimeSeries, WeightSeries
+from ..data import load_prices, ohlcv_version, store_covers
+from ..models import (
+    BacktestJobStatus,
+    BacktestRequest,
+    BacktestResult,
+    BacktestSweepRequest,
+    BacktestSweepResult,
+    RunSummary,
+    SweepRow,
+    WeightsGranularity,
+)
+from ..payload import ARROW_MEDIA_TYPE, build_backtest_result, encode_backtest_arrow
+from ..result_cache import CachedResult, result_cache, result_key
+from ..workers import compute_pool
 
 router = APIRouter()
 
 
-def _series_to_payload(series) -> TimeSeries:
-    series = series.dropna()
-    return TimeSeries(
-        dates=[idx.date().isoformat() for idx in series.index],
-        values=[float(value) for value in series.values],
-    )
+# Routes return serialized payloads directly; the payload models are built with
+# model_construct, and FastAPI would otherwise re-validate every element.
 
 
-@router.post("/backtest", response_model=BacktestResult)
-def run_backtest_route(request: BacktestRequest) -> BacktestResult:
-    tickers = request.tickers or settings.default_universe
-    ohlcv = load_ohlcv(tickers, request.start, request.end)
+def _build_result(
+    output: BacktestOutput,
+    risk_free: float,
+    run_id: str | None = None,
+    weights_granularity: WeightsGranularity = "daily",
+) -> BacktestResult:
+    summary = RunSummary(**performance_summary(output.returns, output.equity_curve, risk_free))
+    return build_backtest_result(output, summary, run_id or str(uuid4()), weights_granularity)
+
+
+def _backtest_payload(
+    prices: pd.DataFrame, request: BacktestRequest, run_id: str
+) -> tuple[bytes, str]:
     output = run_backtest(
-        ohlcv=ohlcv,
+        ohlcv=prices,
         strategy=request.strategy,
         rebalance=request.rebalance,
         transaction_cost_bps=request.transaction_cost_bps,
@@ -34,35 +56,236 @@ def run_backtest_route(request: BacktestRequest) -> BacktestResult:
         lookback=request.lookback_window,
         max_weight=request.max_weight,
         vol_target=request.vol_target,
+        cov_estimator=request.cov_estimator,
     )
+    risk_free = request.risk_free or 0.0
+    with telemetry.stage("summary"):
+        summary = RunSummary(**performance_summary(output.returns, output.equity_curve, risk_free))
+    with telemetry.stage("serialize"):
+        if request.response_format == "arrow":
+            content = encode_backtest_arrow(output, summary, run_id, request.weights_granularity)
+            return content, ARROW_MEDIA_TYPE
+        result = build_backtest_result(output, summary, run_id, request.weights_granularity)
+        return result.model_dump_json().encode(), "application/json"
+
+
+def _cached_result(tickers: list[str], request: BacktestRequest) -> tuple[str, CachedResult | None]:
+    """Result-cache key and entry for ``request`` as the store stands now."""
+    keyed = request.model_copy(update={"tickers": list(tickers)})
+    key = result_key("backtest", keyed, ohlcv_version(tickers))
+    return key, result_cache.get(key)
+
+
+@router.post("/backtest", response_model=BacktestResult)
+async def run_backtest_route(request: BacktestRequest, http_request: Request) -> Response:
+    """Run a backtest; identical requests over unchanged data are served from the result cache.
+
+    The run id is the cache key, so a memoized response is byte-identical to the
+    original one.
+    """
+    telemetry.label(strategy=request.strategy)
+    tickers = list(request.tickers or settings.default_universe)
+    # Only look up before loading when loading would not fetch (and so change) data.
+    # The key then holds the version read before loading, which the loaded prices
+    # are never older than.
+    key = None
+    if await run_in_threadpool(store_covers, tickers, request.start, request.end):
+        key, cached = await run_in_threadpool(_cached_result, tickers, request)
+        if cached is not None:
+            return Response(content=cached.content, media_type=cached.media_type)
 
-    drawdown = drawdown_curve(output.equity_curve)
-    cagr = annualize_return(output.returns)
-    vol = annualize_volatility(output.returns)
-    sharpe = sharpe_ratio(output.returns, risk_free=request.risk_free or 0.0)
-    max_dd = max_drawdown(drawdown)
-    calmar = cagr / abs(max_dd) if max_dd != 0 else 0.0
-
-    weights_frame = output.weights.copy()
-    weights_frame.columns = [
-        col[0] if isinstance(col, tuple) else str(col) for col in weights_frame.columns
-    ]
-    weights_payload = WeightSeries(
-        dates=[idx.date().isoformat() for idx in weights_frame.index],
-        weights={
-            col: weights_frame[col].fillna(0).astype(float).tolist() for col in weights_frame
-        },
+    prices = await run_in_threadpool(load_prices, tickers, request.start, request.end)
+    if key is None:
+        key, cached = await run_in_threadpool(_cached_result, tickers, request)
+        if cached is not None:
+            return Response(content=cached.content, media_type=cached.media_type)
+    content, media_type = await compute_pool.run(
+        _backtest_payload, prices, request, key, request=http_request
     )
+    await run_in_threadpool(result_cache.put, key, content, media_type)
+    return Response(content=content, media_type=media_type)
 
-    summary = RunSummary(cagr=cagr, vol=vol, sharpe=sharpe, max_drawdown=max_dd, calmar=calmar)
-
-    return BacktestResult(
-        run_id=str(uuid4()),
-        summary=summary,
-        equity_curve=_series_to_payload(output.equity_curve),
-        returns=_series_to_payload(output.returns),
-        drawdown=_series_to_payload(drawdown),
-        weights=weights_payload,
-        turnover=_series_to_payload(output.turnover),
-        costs=_series_to_payload(output.costs),
+
+def _sweep_payload(prices: pd.DataFrame, cells: list, request: BacktestSweepRequest) -> bytes:
+    grid = run_backtest_grid(
+        prices,
+        cells,
+        vol_target=request.vol_target,
+        risk_free=request.risk_free or 0.0,
+        max_workers=settings.sweep_workers,
+    )
+
+    rows = []
+    runs = []
+    for cell, output in zip(grid.cells, grid.outputs):
+        run_id = str(uuid4())
+        metrics = grid.summary.iloc[len(rows)]
+        rows.append(
+            SweepRow(
+                run_id=run_id,
+                strategy=cell.strategy,
+                rebalance=cell.rebalance,
+                lookback_window=cell.lookback,
+                max_weight=cell.max_weight,
+                transaction_cost_bps=cell.transaction_cost_bps,
+                slippage_bps=cell.slippage_bps,
+                turnover=float(metrics["turnover"]),
+                summary=RunSummary(**{key: float(metrics[key]) for key in RunSummary.model_fields}),
+            )
+        )
+        if request.include_artifacts:
+            runs.append(
+                _build_result(output, request.risk_free or 0.0, run_id, request.weights_granularity)
+            )
+
+    result = BacktestSweepResult(
+        sweep_id=str(uuid4()),
+        rows=rows,
+        runs=runs if request.include_artifacts else None,
     )
+    return result.model_dump_json().encode()
+
+
+@router.post("/backtest/sweep", response_model=BacktestSweepResult)
+async def run_backtest_sweep_route(
+    request: BacktestSweepRequest, http_request: Request
+) -> Response:
+    cells = build_grid(
+        request.strategies,
+        request.rebalances,
+        request.lookback_windows,
+        request.max_weights,
+        request.transaction_cost_bps,
+        request.slippage_bps,
+    )
+    if len(cells) > settings.sweep_max_cells:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Sweep has {len(cells)} cells; the limit is {settings.sweep_max_cells}.",
+        )
+
+    tickers = request.tickers or settings.default_universe
+    prices = await run_in_threadpool(load_prices, tickers, request.start, request.end)
+    # The grid fans out to its own process pool, so it is driven from a thread here.
+    content = await compute_pool.run(
+        _sweep_payload, prices, cells, request, request=http_request, in_thread=True
+    )
+    return Response(content=content, media_type="application/json")
+
+
+JobId = Path(pattern=r"^[0-9a-f]{32}$")
+
+
+def _job_for(tickers: list[str], request: BacktestRequest) -> str:
+    """Job id for ``request`` as the store stands now.
+
+    Windows the store does not fully cover, typically those running up to
+    today, hash the data version too: once new bars arrive they map to a new
+    job instead of a finished one that stops short of them.
+    """
+    if store_covers(tickers, request.start, request.end):
+        return jobs.job_id(request)
+    return jobs.job_id(request, ohlcv_version(tickers))
+
+
+def _existing_job(job: str) -> BacktestJobStatus | None:
+    status = jobs.read_status(job)
+    if status is not None and (jobs.is_active(job) or jobs.result_path(job).exists()):
+        return status
+    return None
+
+
+@router.post("/backtest/jobs", response_model=BacktestJobStatus, status_code=202)
+async def submit_backtest_job(request: BacktestRequest) -> BacktestJobStatus:
+    """Start a persisted backtest; identical requests over unchanged data share one job."""
+    telemetry.label(strategy=request.strategy)
+    tickers = list(request.tickers or settings.default_universe)
+    # Only look up before loading when loading would not fetch (and so change) data.
+    if await run_in_threadpool(store_covers, tickers, request.start, request.end):
+        existing = _existing_job(jobs.job_id(request))
+        if existing is not None:
+            return existing
+
+    prices = await run_in_threadpool(load_prices, tickers, request.start, request.end)
+    job = await run_in_threadpool(_job_for, tickers, request)
+    # No awaits from here on: a concurrent identical request either sees this job
+    # as active or has already submitted it.
+    existing = _existing_job(job)
+    if existing is not None:
+        return existing
+    status = jobs.create_job(job, request)
+    try:
+        future = compute_pool.submit(jobs.run_job, job, prices, request, jobs.jobs_dir())
+    except HTTPException as exc:
+        jobs.write_status(job, state="failed", error=str(exc.detail))
+        raise
+    jobs.track(job, future)
+    return status
+
+
+@router.post("/backtest/jobs/{job_id}/continue", response_model=BacktestJobStatus, status_code=202)
+async def continue_backtest_job(job_id: str = JobId, end: date | None = None) -> BacktestJobStatus:
+    """Extend a finished job over the bars after its last date, through ``end`` (default today).
+
+    The extended run is the job of the same request with the new ``end``, so
+    submitting that request later finds it and the original job keeps its own
+    window. Only the new bars and the lookback window before them are loaded,
+    and only the new rebalances are computed.
+    """
+    status = jobs.read_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown job.")
+    if jobs.is_active(job_id) or status.state != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {status.state}.")
+    checkpoint = jobs.read_checkpoint(job_id)
+    if checkpoint is None:
+        raise HTTPException(
+            status_code=409, detail="Job predates checkpoints and cannot be continued."
+        )
+    request = jobs.read_request(job_id)
+    telemetry.label(strategy=request.strategy)
+
+    end = end or date.today()
+    if end <= checkpoint.last_date.date():
+        return status
+    prices = await run_in_threadpool(
+        load_prices, checkpoint.tickers, checkpoint.window_start.date(), end
+    )
+    if prices.empty or prices.index[-1] <= checkpoint.last_date:
+        return status
+    extended = request.model_copy(update={"end": end})
+    tickers = list(extended.tickers or settings.default_universe)
+    job = await run_in_threadpool(_job_for, tickers, extended)
+    # No awaits from here on, as in submit_backtest_job.
+    existing = _existing_job(job)
+    if existing is not None:
+        return existing
+    queued = jobs.create_job(job, extended)
+    try:
+        future = compute_pool.submit(
+            jobs.continue_job, job, job_id, prices, extended, jobs.jobs_dir()
+        )
+    except HTTPException as exc:
+        jobs.write_status(job, state="failed", error=str(exc.detail))
+        raise
+    jobs.track(job, future)
+    return queued
+
+
+@router.get("/backtest/jobs/{job_id}", response_model=BacktestJobStatus)
+async def backtest_job_status(job_id: str = JobId) -> BacktestJobStatus:
+    status = jobs.read_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown job.")
+    return status
+
+
+@router.get("/backtest/jobs/{job_id}/result")
+async def backtest_job_result(job_id: str = JobId) -> FileResponse:
+    """The run as an Arrow IPC stream (see ``app.payload.decode_backtest_arrow``)."""
+    status = jobs.read_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown job.")
+    if status.state != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {status.state}.")
+    return FileResponse(jobs.result_path(job_id), media_type=ARROW_MEDIA_TYPE)
@@ -1,8 +1,21 @@
 from fastapi import APIRouter
 
+from ..data import panel_cache, shared_panels
+from ..result_cache import result_cache
+from ..warmup import solver_warmup
+from ..workers import compute_pool
+
 router = APIRouter()
 
 
+# Runs on the event loop, so it never queues behind compute work in the threadpool.
 @router.get("/health")
-def health() -> dict:
-    return {"status": "ok"}
+async def health() -> dict:
+    return {
+        "status": "ok",
+        "panel_cache": panel_cache.stats(),
+        "shared_panels": shared_panels.stats(),
+        "result_cache": result_cache.stats(),
+        "compute": compute_pool.stats(),
+        "warmup": solver_warmup.stats(),
+    }
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..telemetry import CONTENT_TYPE, registry
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Request, stage and solver histograms plus cache counters, for Prometheus to scrape."""
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
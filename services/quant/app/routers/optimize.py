@@ -1,9 +1,19 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+import numpy as np
+import pandas as pd
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 
-from ..data import load_ohlcv
-from ..models import OptimizationRequest, OptimizationResult
+from .. import telemetry
+from ..analytics.covariance import (
+    FactorCovariance,
+    estimate_covariance,
+    portfolio_variance,
+    scale_covariance,
+)
+from ..data import load_returns
+from ..models import OptimizationRequest, OptimizationResult, SolverDiagnostics
 from ..optimize import (
     cvar_optimize,
     efficient_frontier,
@@ -11,44 +21,72 @@ from ..optimize import (
     max_sharpe_unconstrained,
     min_variance_long_only,
     min_variance_unconstrained,
-    risk_parity_weights,
+    solve_risk_parity,
     target_return_long_only,
     target_return_unconstrained,
 )
+from ..workers import compute_pool
 
 router = APIRouter()
 
 
-def _extract_prices(frame):
-    if hasattr(frame.columns, "levels"):
-        field = "adj_close" if "adj_close" in frame.columns.levels[1] else "close"
-        return frame.xs(field, level=1, axis=1)
-    return frame
+def _risk_budgets(request: OptimizationRequest) -> dict[str, float] | None:
+    if request.method != "risk_parity" or request.risk_budgets is None:
+        return None
+    missing = [ticker for ticker in request.tickers if ticker not in request.risk_budgets]
+    if missing or any(value <= 0 for value in request.risk_budgets.values()):
+        raise HTTPException(
+            status_code=422,
+            detail="risk_budgets needs a positive budget for every ticker.",
+        )
+    return request.risk_budgets
 
 
 @router.post("/optimize", response_model=OptimizationResult)
-def optimize(request: OptimizationRequest) -> OptimizationResult:
-    prices = load_ohlcv(request.tickers, request.start, request.end)
-    prices = _extract_prices(prices)
-    returns = prices.pct_change().dropna(how="all")
+async def optimize(request: OptimizationRequest, http_request: Request) -> OptimizationResult:
+    telemetry.label(strategy=request.method)
+    budgets = _risk_budgets(request)
+    returns = await run_in_threadpool(load_returns, request.tickers, request.start, request.end)
+    if budgets is not None:
+        # Budgets are per ticker, so one without bars cannot be dropped silently.
+        no_data = [ticker for ticker in request.tickers if ticker not in returns.columns]
+        if no_data:
+            raise HTTPException(
+                status_code=422,
+                detail=f"No data for budgeted tickers: {', '.join(no_data)}.",
+            )
+    return await compute_pool.run(_optimize, returns, request, budgets, request=http_request)
+
 
+def _optimize(
+    returns: pd.DataFrame, request: OptimizationRequest, budgets: dict[str, float] | None
+) -> OptimizationResult:
     mu = returns.mean() * 252
-    cov = returns.cov() * 252
+    cov = scale_covariance(estimate_covariance(returns, request.cov_estimator), 252)
+    # Dense estimates stay labelled so the frontier sees the same tickers as ``mu``.
+    if not isinstance(cov, FactorCovariance):
+        cov = pd.DataFrame(cov, index=returns.columns, columns=returns.columns)
+    cov_values = cov if isinstance(cov, FactorCovariance) else cov.values
+    diagnostics = None
 
     if request.method == "mvo":
         if request.target_return is not None:
             weights = (
-                target_return_long_only(mu.values, cov.values, request.target_return, request.max_weight)
+                target_return_long_only(
+                    mu.values, cov_values, request.target_return, request.max_weight
+                )
                 if request.long_only
-                else target_return_unconstrained(mu.values, cov.values, request.target_return)
+                else target_return_unconstrained(mu.values, cov_values, request.target_return)
             )
         else:
             weights = (
-                max_sharpe_long_only(mu.values, cov.values, request.risk_free or 0.0)
+                max_sharpe_long_only(mu.values, cov_values, request.risk_free or 0.0)
                 if request.long_only
-                else max_sharpe_unconstrained(mu.values, cov.values, request.risk_free or 0.0)
+                else max_sharpe_unconstrained(mu.values, cov_values, request.risk_free or 0.0)
             )
-        frontier_frame = efficient_frontier(mu, cov, points=request.frontier_points, long_only=request.long_only)
+        frontier_frame = efficient_frontier(
+            mu, cov, points=request.frontier_points, long_only=request.long_only
+        )
         frontier = [
             {
                 "expected_return": float(row["target_return"]),
@@ -57,20 +95,28 @@ def optimize(request: OptimizationRequest) -> OptimizationResult:
             for _, row in frontier_frame.iterrows()
         ]
     elif request.method == "risk_parity":
-        weights = risk_parity_weights(cov)
+        budget_vector = None
+        if budgets is not None:
+            budget_vector = np.array([budgets[ticker] for ticker in returns.columns])
+        solved = solve_risk_parity(cov, budgets=budget_vector)
+        weights = solved.weights
+        diagnostics = SolverDiagnostics(
+            iterations=solved.iterations, residual=solved.residual, converged=solved.converged
+        )
         frontier = None
     else:
         weights = cvar_optimize(returns, alpha=request.alpha, max_weight=request.max_weight)
         frontier = None
 
     expected_return = float(weights @ mu.values)
-    expected_vol = float((weights.T @ cov.values @ weights) ** 0.5)
+    expected_vol = float(portfolio_variance(cov, weights) ** 0.5)
     sharpe = (expected_return - (request.risk_free or 0.0)) / expected_vol if expected_vol else 0.0
 
     return OptimizationResult(
-        weights={ticker: float(weight) for ticker, weight in zip(request.tickers, weights)},
+        weights={ticker: float(weight) for ticker, weight in zip(returns.columns, weights)},
         expected_return=expected_return,
         expected_vol=expected_vol,
         sharpe=sharpe,
         frontier=frontier,
+        diagnostics=diagnostics,
     )
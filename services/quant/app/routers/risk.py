@@ -1,18 +1,34 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+import numpy as np
+import pandas as pd
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 
 from ..analytics import (
-    factor_regression,
-    historical_cvar,
-    historical_var,
-    parametric_cvar,
-    parametric_var,
-    rolling_sharpe,
-    rolling_vol,
+    FactorModelFit,
+    fit_factor_model,
+    rolling_analytics,
+    rolling_factor_betas,
+    simulate_tail_risk,
+    tail_risk,
+    unknown_factors,
 )
-from ..data import load_french_factors, load_ohlcv
-from ..models import FactorRegressionRequest, FactorRegressionResult, RiskMetrics, RiskRequest, TimeSeries
+from ..config import settings
+from ..data import load_french_factors, load_returns
+from ..models import (
+    FactorExposure,
+    FactorRegressionRequest,
+    FactorRegressionResult,
+    RiskMetrics,
+    RiskRequest,
+    ScenarioRequest,
+    ScenarioRiskEntry,
+    ScenarioRiskResult,
+    TailRiskEntry,
+    TimeSeries,
+)
+from ..workers import compute_pool
 
 router = APIRouter()
 
@@ -25,17 +41,34 @@ def _series_payload(series) -> TimeSeries:
     )
 
 
-def _extract_prices(frame):
-    if hasattr(frame.columns, "levels"):
-        field = "adj_close" if "adj_close" in frame.columns.levels[1] else "close"
-        return frame.xs(field, level=1, axis=1)
-    return frame
+def _check_portfolios(request: RiskRequest | ScenarioRequest, alphas: list[float]) -> None:
+    portfolios = dict(request.portfolios or {})
+    if request.weights is not None:
+        portfolios["weights"] = request.weights
+    for name, weights in portfolios.items():
+        unknown = sorted(set(weights) - set(request.tickers))
+        if unknown:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Portfolio {name!r} has weights for unknown tickers {unknown}.",
+            )
+    if any(not 0 < alpha < 1 for alpha in alphas):
+        raise HTTPException(status_code=422, detail="Confidence levels must lie in (0, 1).")
 
 
 @router.post("/risk/metrics", response_model=RiskMetrics)
-def risk_metrics(request: RiskRequest) -> RiskMetrics:
-    prices = load_ohlcv(request.tickers, request.start, request.end)
-    if prices.empty:
+async def risk_metrics(request: RiskRequest, http_request: Request) -> RiskMetrics:
+    _check_portfolios(request, [request.alpha, *(request.alphas or [])])
+    returns = await run_in_threadpool(load_returns, request.tickers, request.start, request.end)
+    return await compute_pool.run(_risk_metrics, returns, request, request=http_request)
+
+
+def _weight_vector(weights: dict[str, float], columns: pd.Index) -> np.ndarray:
+    return np.array([weights.get(ticker, 0.0) for ticker in columns], dtype=float)
+
+
+def _risk_metrics(returns: pd.DataFrame, request: RiskRequest) -> RiskMetrics:
+    if returns.empty:
         empty = TimeSeries(dates=[], values=[])
         return RiskMetrics(
             hist_var=0.0,
@@ -47,41 +80,148 @@ def risk_metrics(request: RiskRequest) -> RiskMetrics:
             rolling_sharpe=empty,
         )
 
-    prices = _extract_prices(prices)
-    returns = prices.pct_change().dropna(how="all")
-    portfolio = returns.mean(axis=1)
-
-    hist_var = historical_var(portfolio, request.alpha)
-    hist_cvar = historical_cvar(portfolio, request.alpha)
-    param_var = parametric_var(portfolio, request.alpha)
-    param_cvar = parametric_cvar(portfolio, request.alpha)
+    if request.weights is None:
+        portfolio = returns.mean(axis=1)
+    else:
+        weights = _weight_vector(request.weights, returns.columns)
+        portfolio = pd.Series(returns.fillna(0.0).values @ weights, index=returns.index)
+
+    # The requested portfolio comes first, then the named candidates, all in one pass.
+    candidates = request.portfolios or {}
+    names = ["portfolio", *candidates]
+    columns = portfolio.values[:, None]
+    if candidates:
+        weights = np.array([_weight_vector(w, returns.columns) for w in candidates.values()])
+        columns = np.column_stack([columns, returns.fillna(0.0).values @ weights.T])
+    alphas = list(dict.fromkeys([request.alpha, *(request.alphas or [])]))
+    risk = tail_risk(columns, alphas=alphas)
     vol = float(portfolio.std(ddof=1) * (252**0.5))
+    # Rolling vol and Sharpe share their running sums.
+    rolling = rolling_analytics(portfolio, [63])
 
     return RiskMetrics(
-        hist_var=hist_var,
-        hist_cvar=hist_cvar,
-        param_var=param_var,
-        param_cvar=param_cvar,
+        hist_var=float(risk.hist_var[0, 0]),
+        hist_cvar=float(risk.hist_cvar[0, 0]),
+        param_var=float(risk.param_var[0, 0]),
+        param_cvar=float(risk.param_cvar[0, 0]),
         volatility=vol,
-        rolling_vol=_series_payload(rolling_vol(portfolio)),
-        rolling_sharpe=_series_payload(rolling_sharpe(portfolio)),
+        rolling_vol=_series_payload(rolling.frame("vol", 63).iloc[:, 0]),
+        rolling_sharpe=_series_payload(rolling.frame("sharpe", 63).iloc[:, 0]),
+        tail_risk=[
+            TailRiskEntry(
+                portfolio=name,
+                alpha=float(alpha),
+                hist_var=float(risk.hist_var[row, column]),
+                hist_cvar=float(risk.hist_cvar[row, column]),
+                param_var=float(risk.param_var[row, column]),
+                param_cvar=float(risk.param_cvar[row, column]),
+            )
+            for row, name in enumerate(names)
+            for column, alpha in enumerate(alphas)
+        ],
+    )
+
+
+@router.post("/risk/scenarios", response_model=ScenarioRiskResult)
+async def risk_scenarios(request: ScenarioRequest, http_request: Request) -> ScenarioRiskResult:
+    """Forward VaR/CVaR from bootstrapped or simulated return paths."""
+    _check_portfolios(request, request.alphas)
+    if not request.horizons or any(not 1 <= horizon <= 252 for horizon in request.horizons):
+        raise HTTPException(status_code=422, detail="Horizons must be between 1 and 252 days.")
+    returns = await run_in_threadpool(load_returns, request.tickers, request.start, request.end)
+    # Chunks fan out to their own processes, so the call itself stays in a thread.
+    return await compute_pool.run(
+        _risk_scenarios, returns, request, request=http_request, in_thread=True
+    )
+
+
+def _risk_scenarios(returns: pd.DataFrame, request: ScenarioRequest) -> ScenarioRiskResult:
+    if len(returns) < 2:
+        return ScenarioRiskResult(method=request.method, n_scenarios=0, entries=[])
+
+    portfolios = {"portfolio": request.weights, **(request.portfolios or {})}
+    n_assets = returns.shape[1]
+    weights = np.array(
+        [
+            np.full(n_assets, 1.0 / n_assets) if w is None else _weight_vector(w, returns.columns)
+            for w in portfolios.values()
+        ]
+    )
+    risk = simulate_tail_risk(
+        returns,
+        weights,
+        horizons=request.horizons,
+        alphas=request.alphas,
+        method=request.method,
+        n_scenarios=request.n_scenarios,
+        seed=request.seed,
+        block_length=request.block_length,
+        dof=request.dof,
+        cov_estimator=request.cov_estimator,
+        max_workers=settings.scenario_workers,
+    )
+    return ScenarioRiskResult(
+        method=request.method,
+        n_scenarios=risk.n_scenarios,
+        entries=[
+            ScenarioRiskEntry(
+                portfolio=name,
+                horizon=int(horizon),
+                alpha=float(alpha),
+                var=float(risk.var[row, column, level]),
+                cvar=float(risk.cvar[row, column, level]),
+                mean=float(risk.mean[row, column]),
+                volatility=float(risk.volatility[row, column]),
+            )
+            for row, name in enumerate(portfolios)
+            for column, horizon in enumerate(risk.horizons)
+            for level, alpha in enumerate(risk.alphas)
+        ],
     )
 
 
 @router.post("/risk/factors", response_model=FactorRegressionResult)
-def risk_factors(request: FactorRegressionRequest) -> FactorRegressionResult:
-    prices = load_ohlcv(request.tickers, request.start, request.end)
-    if prices.empty:
+async def risk_factors(
+    request: FactorRegressionRequest, http_request: Request
+) -> FactorRegressionResult:
+    returns = await run_in_threadpool(load_returns, request.tickers, request.start, request.end)
+    if returns.empty:
         return FactorRegressionResult(coefficients={}, tstats={}, r2=0.0)
 
-    prices = _extract_prices(prices)
-    returns = prices.pct_change().dropna(how="all")
-    portfolio = returns.mean(axis=1)
+    factors = await run_in_threadpool(load_french_factors, request.start, request.end)
+    unknown = unknown_factors(factors, request.factors or [])
+    if not factors.empty and unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown factors: {', '.join(unknown)}.")
+    return await compute_pool.run(_risk_factors, returns, factors, request, request=http_request)
 
-    factors = load_french_factors(request.start, request.end)
-    regression = factor_regression(portfolio, factors)
-    return FactorRegressionResult(
-        coefficients=regression.get("coefficients", {}),
-        tstats=regression.get("tstats", {}),
-        r2=regression.get("r2", 0.0),
+
+def _exposure(fit: FactorModelFit, column: int) -> FactorExposure | None:
+    if not np.isfinite(fit.r2[column]):
+        return None
+    return FactorExposure(**fit.result(column))
+
+
+def _risk_factors(
+    returns: pd.DataFrame, factors: pd.DataFrame, request: FactorRegressionRequest
+) -> FactorRegressionResult:
+    empty = FactorRegressionResult(coefficients={}, tstats={}, r2=0.0)
+    if factors.empty:
+        return empty
+
+    portfolio = returns.mean(axis=1)
+    # The portfolio and, in per-asset mode, every ticker share one solve.
+    panel = pd.concat([portfolio, returns], axis=1) if request.per_asset else portfolio.to_frame()
+    fit = fit_factor_model(
+        panel, factors, request.factors, cov_type=request.cov_type, lags=request.hac_lags
     )
+    exposure = _exposure(fit, 0)
+    result = empty if exposure is None else FactorRegressionResult(**exposure.model_dump())
+    if request.per_asset:
+        assets = {ticker: _exposure(fit, column + 1) for column, ticker in enumerate(returns)}
+        result.assets = {ticker: value for ticker, value in assets.items() if value is not None}
+    if request.rolling_window is not None:
+        betas = rolling_factor_betas(portfolio, factors, request.rolling_window, request.factors)
+        result.rolling_betas = {
+            name: _series_payload(frame.iloc[:, 0]) for name, frame in betas.items()
+        }
+    return result
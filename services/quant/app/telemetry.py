@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+from .config import settings
+
+if TYPE_CHECKING:
+    from fastapi import Request, Response
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Upper bounds in seconds, from a cached panel lookup to a long backtest.
+DURATION_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic count per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...]) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {value:g}" for key, value in values]
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label combination, as Prometheus expects."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...],
+        buckets: tuple[float, ...] = DURATION_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        # Per label combination: one count per bucket plus overflow, then the sum.
+        self._series: dict[tuple[str, ...], list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            series[slot] += 1
+            series[-1] += value
+
+    def count(self, **labels: str) -> int:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            return 0 if series is None else int(sum(series[:-1]))
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+        lines = []
+        for key, values in series:
+            cumulative = 0.0
+            for bound, observed in zip((*self.buckets, float("inf")), values[:-1]):
+                cumulative += observed
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _format_labels(self.labels, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative:g}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {values[-1]!r}")
+            lines.append(f"{self.name}_count{labels} {cumulative:g}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: list[Counter | Histogram] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+REQUEST_SECONDS = registry.register(
+    Histogram(
+        "quant_request_duration_seconds",
+        "Time to produce a response, by route template.",
+        ("route", "method", "status"),
+    )
+)
+STAGE_SECONDS = registry.register(
+    Histogram(
+        "quant_stage_duration_seconds",
+        "Time per request spent in each stage (stages can nest, e.g. weights in compute).",
+        ("route", "strategy", "stage"),
+    )
+)
+SOLVER_SECONDS = registry.register(
+    Histogram(
+        "quant_solver_duration_seconds",
+        "Time of each optimization solve, by solver and outcome.",
+        ("route", "strategy", "solver", "status"),
+    )
+)
+CACHE_LOOKUPS = registry.register(
+    Counter(
+        "quant_cache_lookups_total",
+        "Panel and result cache lookups by outcome.",
+        ("cache", "outcome"),
+    )
+)
+
+
+@dataclass
+class Trace:
+    """Stage timings, cache outcomes and solves of one request.
+
+    Work sent to the compute pool records into a trace of its own, which travels
+    back with the result and is merged into the request's (see ``call_traced``).
+    """
+
+    labels: dict[str, str] = field(default_factory=dict)
+    # stage -> [seconds, calls]
+    stages: dict[str, list[float]] = field(default_factory=dict)
+    cache: list[tuple[str, str]] = field(default_factory=list)
+    solves: list[tuple[str, str, float]] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add_stage(self, name: str, seconds: float, calls: int = 1) -> None:
+        with self._lock:
+            totals = self.stages.setdefault(name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += calls
+
+    def merge(self, other: Trace) -> None:
+        for name, (seconds, calls) in other.stages.items():
+            self.add_stage(name, seconds, int(calls))
+        with self._lock:
+            self.cache.extend(other.cache)
+            self.solves.extend(other.solves)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def header(self, total: float) -> str:
+        """``Server-Timing``-style breakdown in milliseconds, e.g. ``weights;dur=41.2;count=12``."""
+        parts = [
+            f"{name};dur={seconds * 1000:.3f};count={int(calls)}"
+            for name, (seconds, calls) in self.stages.items()
+        ]
+        solvers: dict[str, list[float]] = {}
+        for solver, _, seconds in self.solves:
+            totals = solvers.setdefault(solver, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+        parts += [
+            f"solve.{solver};dur={seconds * 1000:.3f};count={int(calls)}"
+            for solver, (seconds, calls) in solvers.items()
+        ]
+        outcomes: dict[str, list[str]] = {}
+        for cache, outcome in self.cache:
+            outcomes.setdefault(cache, []).append(outcome)
+        parts += [f'{cache};desc="{",".join(seen)}"' for cache, seen in outcomes.items()]
+        parts.append(f"total;dur={total * 1000:.3f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[Trace | None] = ContextVar("quant_trace", default=None)
+
+
+def current() -> Trace | None:
+    return _current.get()
+
+
+class stage:
+    """Time a block into the current trace; a no-op outside of one."""
+
+    __slots__ = ("name", "trace", "started")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> stage:
+        self.trace = _current.get()
+        if self.trace is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        if self.trace is not None:
+            self.trace.add_stage(self.name, time.perf_counter() - self.started)
+
+
+def label(**labels: str) -> None:
+    """Attach metric labels (e.g. ``strategy``) to the current request."""
+    trace = _current.get()
+    if trace is not None:
+        trace.labels.update({name: str(value) for name, value in labels.items()})
+
+
+def record_cache(cache: str, outcome: str) -> None:
+    CACHE_LOOKUPS.inc(cache=cache, outcome=outcome)
+    trace = _current.get()
+    if trace is not None:
+        with trace._lock:
+            trace.cache.append((cache, outcome))
+
+
+def record_solve(solver: str, status: str, seconds: float) -> None:
+    trace = _current.get()
+    if trace is not None:
+        with trace._lock:
+            trace.solves.append((solver, status, seconds))
+
+
+def call_traced(fn: Callable[..., Any], submitted: float, *args: Any) -> tuple[Any, Trace]:
+    """Run ``fn(*args)`` under a fresh trace and return both; runs in pool workers.
+
+    ``submitted`` is the wall-clock submission time, so queueing shows up as a stage.
+    """
+    trace = Trace()
+    trace.add_stage("queue", max(0.0, time.time() - submitted))
+    token = _current.set(trace)
+    try:
+        return fn(*args), trace
+    finally:
+        _current.reset(token)
+
+
+def observe(trace: Trace, route: str) -> None:
+    """Record a finished request's stages and solves in the process metrics."""
+    strategy = trace.labels.get("strategy", "")
+    for name, (seconds, _) in trace.stages.items():
+        STAGE_SECONDS.observe(seconds, route=route, strategy=strategy, stage=name)
+    for solver, status, seconds in trace.solves:
+        SOLVER_SECONDS.observe(
+            seconds, route=route, strategy=strategy, solver=solver, status=status
+        )
+
+
+def _route_template(request: Request) -> str:
+    """The matched path with parameters put back as ``{name}``, e.g. ``/v1/backtest/jobs/{job_id}``.
+
+    Labelling by template rather than raw path keeps label cardinality bounded.
+    """
+    if request.scope.get("route") is None:
+        return "unmatched"
+    names = {str(value): name for name, value in request.path_params.items()}
+    segments = request.url.path.split("/")
+    return "/".join(f"{{{names[part]}}}" if part in names else part for part in segments)
+
+
+async def timing_middleware(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """Trace every request, record its metrics and optionally add an ``X-Timing`` header.
+
+    The header is added when ``settings.timing_header`` is on or the request
+    itself carries an ``X-Timing`` header.
+    """
+    trace = Trace()
+    token = _current.set(trace)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        _current.reset(token)
+        elapsed = time.perf_counter() - started
+        route = _route_template(request)
+        REQUEST_SECONDS.observe(elapsed, route=route, method=request.method, status=str(status))
+        observe(trace, route)
+    if settings.timing_header or "x-timing" in request.headers:
+        response.headers["X-Timing"] = trace.header(elapsed)
+    return response
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .workers import ComputePool
+
+logger = logging.getLogger(__name__)
+
+
+def warm_solvers() -> None:
+    """Import cvxpy and HiGHS and run a first solve through them in this process."""
+    from .optimize.cvar import _load_highspy
+    from .optimize.problems import load_cvxpy, pick_solver, solve_min_variance
+
+    load_cvxpy()
+    pick_solver([])
+    _load_highspy()
+    # Compiles the canonicalization paths and loads the QP solver's bindings.
+    solve_min_variance(np.eye(2))
+
+
+def warm_worker() -> None:
+    """Process-pool initializer running :func:`warm_solvers`; failures only get logged."""
+    try:
+        warm_solvers()
+    except Exception:  # pragma: no cover - warm-up is best effort
+        logger.exception("Solver warm-up failed in worker")
+
+
+class SolverWarmup:
+    """Imports the optimizer stack on a background thread after startup.
+
+    cvxpy, HiGHS and the first solve through them are loaded lazily so the
+    service is ready quickly; warming them up in the background keeps that cost
+    off the first optimize or backtest request as well. Given a compute pool
+    with worker processes, the warm-up happens where the solves run: the
+    workers are started, each running :func:`warm_worker` as it starts.
+    """
+
+    def __init__(self) -> None:
+        self.state = "off"
+        self.seconds: float | None = None
+        self._thread: threading.Thread | None = None
+
+    def run(self, pool: ComputePool | None = None) -> None:
+        started = time.perf_counter()
+        self.state = "running"
+        try:
+            if pool is not None and pool.workers > 0:
+                pool.start_workers()
+            else:
+                warm_solvers()
+        except Exception:  # pragma: no cover - warm-up is best effort
+            logger.exception("Solver warm-up failed")
+            self.state = "failed"
+            return
+        finally:
+            self.seconds = time.perf_counter() - started
+        self.state = "done"
+
+    def start(self, pool: ComputePool | None = None) -> None:
+        if self._thread is not None:
+            return
+        self.state = "pending"
+        self._thread = threading.Thread(
+            target=self.run, args=(pool,), name="solver-warmup", daemon=True
+        )
+        self._thread.start()
+
+    def join(self, timeout: float | None = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {"state": self.state, "seconds": self.seconds}
+
+
+solver_warmup = SolverWarmup()
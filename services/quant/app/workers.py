@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import (
+    BrokenExecutor,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Any, Callable
+
+from fastapi import HTTPException, Request
+
+from . import telemetry
+from .config import settings
+from .warmup import warm_worker
+
+logger = logging.getLogger(__name__)
+
+# How often a waiting request checks whether its client has gone away.
+_DISCONNECT_POLL_SECONDS = 0.25
+
+
+class ComputePool:
+    """Bounded pool for CPU-heavy route work.
+
+    Work runs in a process pool of ``workers`` processes (``0`` runs it in a
+    thread of this process instead). At most ``max_pending`` calls are accepted
+    at once, queued or running; beyond that callers get a 429. Each call has a
+    timeout (504) and is abandoned when the client disconnects. Calls that have
+    not started yet are cancelled; a call already running in a worker finishes
+    and its result is discarded.
+    """
+
+    def __init__(
+        self,
+        workers: int | None,
+        max_pending: int,
+        timeout: float | None,
+        initializer: Callable[[], None] | None = None,
+    ) -> None:
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.initializer = initializer
+        self._executor: Executor | None = None
+        self._threads: ThreadPoolExecutor | None = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _process_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.workers > 0:
+                    # Spawned workers do not inherit the server's threads and locks.
+                    context = multiprocessing.get_context("spawn")
+                    self._executor = ProcessPoolExecutor(
+                        self.workers, mp_context=context, initializer=self.initializer
+                    )
+                else:
+                    self._executor = self._thread_executor()
+            return self._executor
+
+    def start_workers(self) -> None:
+        """Start every worker process now and wait until each has run the initializer.
+
+        Worker processes otherwise start with the first calls that need them.
+        """
+        executor = self._process_executor()
+        # Workers start on demand, one per call submitted while none is idle.
+        for started in [executor.submit(_started) for _ in range(self.workers)]:
+            started.result()
+
+    def _thread_executor(self) -> ThreadPoolExecutor:
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(self.max_pending, thread_name_prefix="compute")
+        return self._threads
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HTTPException(status_code=429, detail="Compute queue is full, retry later.")
+            self._pending += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+            }
+
+    def submit(self, fn: Callable[..., Any], *args: Any, in_thread: bool = False) -> Future:
+        """Queue ``fn(*args)`` without waiting for it; raises 429 when the queue is full.
+
+        The call holds a queue slot until it finishes. ``in_thread=True`` keeps the
+        call in this process (for work that fans out to its own processes).
+        """
+        self._acquire()
+        try:
+            if in_thread:
+                with self._lock:
+                    executor = self._thread_executor()
+            else:
+                executor = self._process_executor()
+            submitted = executor.submit(fn, *args)
+        except BrokenExecutor:
+            self._release()
+            self._reset(executor)
+            raise HTTPException(status_code=503, detail="Compute worker crashed.")
+        except BaseException:
+            self._release()
+            raise
+        submitted.add_done_callback(lambda _: self._release())
+        return submitted
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        request: Request | None = None,
+        timeout: float | None = None,
+        in_thread: bool = False,
+    ) -> Any:
+        """Run ``fn(*args)`` off the event loop and await its result.
+
+        ``fn`` and its arguments must be picklable. Stages the call records are
+        merged into the caller's trace (see ``app.telemetry``).
+        """
+        with telemetry.stage("compute"):
+            submitted = self.submit(
+                telemetry.call_traced, fn, time.time(), *args, in_thread=in_thread
+            )
+            try:
+                result, trace = await self._wait(
+                    fn.__name__, asyncio.wrap_future(submitted), request, timeout or self.timeout
+                )
+            except BrokenExecutor:
+                logger.exception("compute pool broke while running %s", fn.__name__)
+                self._reset(None)
+                raise HTTPException(status_code=503, detail="Compute worker crashed.")
+        caller = telemetry.current()
+        if caller is not None:
+            caller.merge(trace)
+        return result
+
+    def _reset(self, executor: Executor | None) -> None:
+        with self._lock:
+            if self._executor is not None and executor in (None, self._executor):
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    async def _wait(
+        self, name: str, future: asyncio.Future, request: Request | None, timeout: float | None
+    ) -> Any:
+        watcher = asyncio.ensure_future(_wait_disconnect(request)) if request else None
+        waiters = {future} if watcher is None else {future, watcher}
+        try:
+            done, _ = await asyncio.wait(
+                waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+        if future in done:
+            return future.result()
+        future.cancel()
+        if watcher is not None and watcher in done:
+            logger.info("client disconnected, abandoning %s", name)
+            # Nobody is listening; the status code only shows up in access logs.
+            raise HTTPException(status_code=499, detail="Client closed request.")
+        logger.warning("%s timed out after %ss", name, timeout)
+        raise HTTPException(status_code=504, detail="Computation timed out.")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for executor in (self._executor, self._threads):
+                if executor is not None:
+                    executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._threads = None
+
+
+class ProcessPool:
+    """Process pool for library code that fans one call out over processes.
+
+    The executor is created on first use and reused by every later call, so
+    calls do not pay for starting processes. ``workers`` of ``None`` uses every
+    core. A pool that broke (a worker died) is replaced on the next call.
+    """
+
+    def __init__(self, workers: int | None) -> None:
+        self.workers = (os.cpu_count() or 1) if workers is None else max(1, workers)
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _get(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Spawned workers do not inherit the server's threads and locks.
+                context = multiprocessing.get_context("spawn")
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=context)
+            return self._executor
+
+    def map(self, fn: Callable[..., Any], *iterables: Any) -> list:
+        """``[fn(*args) for args in zip(*iterables)]``, computed in the pool's processes."""
+        executor = self._get()
+        try:
+            return list(executor.map(fn, *iterables))
+        except BrokenExecutor:
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def _started() -> None:
+    pass
+
+
+async def _wait_disconnect(request: Request) -> None:
+    while not await request.is_disconnected():
+        await asyncio.sleep(_DISCONNECT_POLL_SECONDS)
+
+
+compute_pool = ComputePool(
+    settings.compute_workers,
+    settings.compute_queue_depth,
+    settings.compute_timeout,
+    initializer=warm_worker if settings.warmup_solvers else None,
+)
+# Fan-out pools for parameter sweeps and scenario simulations.
+sweep_pool = ProcessPool(settings.sweep_workers)
+scenario_pool = ProcessPool(settings.scenario_workers)
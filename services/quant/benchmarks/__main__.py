@@ -0,0 +1,105 @@
+"""Run the quant benchmark suite offline and compare it with a stored baseline.
+
+Usage::
+
+    cd services/quant
+    python -m benchmarks                          # quick sizes, print results
+    python -m benchmarks -k optimize --full       # every size of the optimizer cases
+    python -m benchmarks --compare benchmarks/baseline.json
+    python -m benchmarks --save benchmarks/baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+from .harness import (
+    QUICK_SIZES,
+    SIZES,
+    Measurement,
+    Report,
+    best_of,
+    compare,
+    regressions,
+    run,
+    select,
+)
+
+
+def _sizes(text: str) -> list[tuple[int, int]]:
+    sizes = []
+    for item in text.split(","):
+        assets, years = item.lower().split("x")
+        sizes.append((int(assets), int(years)))
+    return sizes
+
+
+def _print_result(case: str, result: Measurement) -> None:
+    print(
+        f"{case:<52} {result.seconds * 1e3:>10.2f} {result.first_seconds * 1e3:>10.2f} "
+        f"{result.peak_bytes / 2**20:>9.1f} {result.repeat:>4}",
+        flush=True,
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument("-k", dest="pattern", help="substring or glob of case names")
+    sizes = parser.add_mutually_exclusive_group()
+    sizes.add_argument("--full", action="store_true", help="10/100/500 assets x 1/5/20 years")
+    sizes.add_argument("--sizes", type=_sizes, help="e.g. 10x1,100x5")
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds of repeats per case")
+    parser.add_argument("--save", type=Path, help="write results as JSON")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.5, help="allowed relative slowdown (0.5 = 50%%)"
+    )
+    parser.add_argument(
+        "--memory-threshold", type=float, default=0.25, help="allowed relative peak growth"
+    )
+    parser.add_argument("--list", action="store_true", help="list cases without running")
+    args = parser.parse_args(argv)
+
+    chosen = SIZES if args.full else args.sizes or QUICK_SIZES
+    if args.list:
+        for case, _, _ in select(args.pattern, chosen):
+            print(case)
+        return 0
+
+    print(f"{'case':<52} {'median ms':>10} {'first ms':>10} {'peak MiB':>9} {'reps':>4}")
+    report = run(args.pattern, chosen, args.budget, progress=_print_result)
+    if args.save:
+        if args.save.exists():
+            # Keep cases that were not re-run, so partial runs can refresh a baseline.
+            previous = Report.load(args.save)
+            report.results = {**previous.results, **report.results}
+        report.save(args.save)
+
+    if args.compare is None:
+        return 0
+    baseline = Report.load(args.compare)
+    comparisons = compare(report, baseline, args.threshold, args.memory_threshold)
+    flagged = [item.name for item in regressions(comparisons)]
+    if flagged:
+        # Confirm regressions with a second measurement before reporting them.
+        print(f"\nre-measuring {len(flagged)} flagged case(s)")
+        retry = run(sizes=chosen, budget=args.budget, progress=_print_result, names=flagged)
+        for name, result in retry.results.items():
+            report.results[name] = best_of(report.results[name], result)
+        comparisons = compare(report, baseline, args.threshold, args.memory_threshold)
+    print()
+    print(f"{'case':<52} {'time':>7} {'memory':>7}  verdict")
+    for item in comparisons:
+        ratios = f"{item.time_ratio:>6.2f}x {item.memory_ratio:>6.2f}x"
+        print(f"{item.name:<52} {ratios}  {item.verdict}")
+    failed = regressions(comparisons)
+    if failed:
+        print(f"\n{len(failed)} regression(s) against {args.compare}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
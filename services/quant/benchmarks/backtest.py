@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from typing import get_args
+
+import pandas as pd
+
+from app.backtest import (
+    build_grid,
+    continue_backtest,
+    run_backtest,
+    run_backtest_grid,
+    run_resumable_backtest,
+)
+from app.backtest.engine import Strategy
+
+from . import synthetic
+from .harness import Size, benchmark
+
+# Per-rebalance optimizers whose largest cases would run for minutes.
+_SOLVER_STRATEGIES = {"min_variance"}
+
+
+def _ohlcv(size: Size) -> pd.DataFrame:
+    return synthetic.ohlcv(*size)
+
+
+def _register_strategy(strategy: str) -> None:
+    def run(ohlcv: pd.DataFrame) -> None:
+        run_backtest(ohlcv, strategy, rebalance="ME", lookback=126, max_weight=0.2)
+
+    max_assets = 100 if strategy in _SOLVER_STRATEGIES else None
+    benchmark(f"backtest.{strategy}", setup=_ohlcv, max_assets=max_assets)(run)
+
+
+for _strategy in get_args(Strategy):
+    _register_strategy(_strategy)
+
+
+@benchmark("backtest.loop_equal_weight", setup=_ohlcv, max_assets=100)
+def loop_equal_weight(ohlcv: pd.DataFrame) -> None:
+    run_backtest(ohlcv, "equal_weight", rebalance="ME", mode="loop")
+
+
+@benchmark("backtest.grid", setup=_ohlcv, max_assets=100)
+def grid(ohlcv: pd.DataFrame) -> None:
+    cells = build_grid(
+        ["equal_weight", "momentum_12_1", "risk_parity"],
+        rebalances=["ME", "QE"],
+        lookbacks=[63, 126],
+        transaction_costs_bps=[0.0, 5.0],
+    )
+    run_backtest_grid(ohlcv, cells, max_workers=1)
+
+
+# Bars a continuation adds: about one month, so it includes one rebalance.
+_NEW_BARS = 21
+
+
+def _continuation(size: Size):
+    ohlcv = _ohlcv(size)
+    prior, checkpoint = run_resumable_backtest(
+        ohlcv.iloc[:-_NEW_BARS], "min_variance", rebalance="ME", lookback=126, max_weight=0.2
+    )
+    return prior, checkpoint, ohlcv.loc[checkpoint.window_start :]
+
+
+@benchmark("backtest.continue_month", setup=_continuation, max_assets=100)
+def continue_month(state) -> None:
+    prior, checkpoint, ohlcv = state
+    continue_backtest(
+        prior, checkpoint, ohlcv, "min_variance", rebalance="ME", lookback=126, max_weight=0.2
+    )
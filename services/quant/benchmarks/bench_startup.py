@@ -0,0 +1,104 @@
+"""Startup cost of the quant service.
+
+Reports the slowest imports under ``import app.main`` (from ``python -X importtime``)
+and the wall time from launching uvicorn to the first successful ``GET /v1/health``.
+
+    cd services/quant && python benchmarks/bench_startup.py --runs 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+SERVICE_DIR = Path(__file__).resolve().parents[1]
+# Modules reported even when they are not among the slowest, to show what stays deferred.
+WATCHED = ("app.main", "fastapi", "pandas", "numpy", "scipy", "cvxpy", "yfinance", "httpx")
+
+
+def import_times(module: str = "app.main") -> dict[str, tuple[float, float]]:
+    """``{module: (self_ms, cumulative_ms)}`` for one cold ``import module``."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SERVICE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = (int(own) / 1000, int(cumulative) / 1000)
+    return times
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_health(timeout: float = 60.0, env: dict[str, str] | None = None) -> float:
+    """Seconds from spawning uvicorn until ``/v1/health`` answers 200."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/v1/health"
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)]
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        command,
+        cwd=SERVICE_DIR,
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1.0) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"/v1/health not ready after {timeout:.0f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--warmup", action="store_true", help="set QUANT_WARMUP_SOLVERS=1")
+    args = parser.parse_args()
+
+    times = import_times()
+    slowest = sorted(times.items(), key=lambda item: item[1][1], reverse=True)[: args.top]
+    print(f"{'module':<40} {'self ms':>9} {'cumulative ms':>14}")
+    for name, (own, cumulative) in slowest:
+        print(f"{name:<40} {own:>9.1f} {cumulative:>14.1f}")
+    print()
+    for name in WATCHED:
+        state = f"{times[name][1]:.1f} ms" if name in times else "not imported"
+        print(f"{name:<40} {state}")
+
+    env = {"QUANT_WARMUP_SOLVERS": "1"} if args.warmup else None
+    samples = [time_to_health(env=env) for _ in range(args.runs)]
+    print()
+    print(
+        f"process start -> /v1/health: median {statistics.median(samples):.3f}s "
+        f"(min {min(samples):.3f}s, max {max(samples):.3f}s, {args.runs} runs)"
+    )
+
+
+if __name__ == "__main__":
+    main()
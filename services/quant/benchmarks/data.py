@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+
+from app.data import load_ohlcv, load_prices, load_returns, panel_cache
+
+from . import synthetic
+from .harness import Size, benchmark
+
+
+@dataclass
+class StoreRequest:
+    tickers: list[str]
+    start: date
+    end: date
+
+
+def _request(size: Size) -> StoreRequest:
+    assets, years = size
+    return StoreRequest(synthetic.tickers(assets), *synthetic.window(years))
+
+
+def _stored(size: Size) -> StoreRequest:
+    request = _request(size)
+    load_ohlcv(request.tickers, request.start, request.end)
+    return request
+
+
+@benchmark("data.load_ohlcv_cold", setup=_request)
+def load_ohlcv_cold(request: StoreRequest) -> None:
+    # A fresh store each call: fetch, partition by year and write Parquet, then read back.
+    with synthetic.offline_store():
+        load_ohlcv(request.tickers, request.start, request.end)
+
+
+@benchmark("data.load_ohlcv_warm", setup=_stored)
+def load_ohlcv_warm(request: StoreRequest) -> None:
+    load_ohlcv(request.tickers, request.start, request.end)
+
+
+@benchmark("data.load_returns", setup=_stored)
+def load_returns_uncached(request: StoreRequest) -> None:
+    panel_cache.clear()
+    load_returns(request.tickers, request.start, request.end)
+
+
+@benchmark("data.load_returns_cached", setup=_stored)
+def load_returns_cached(request: StoreRequest) -> None:
+    load_returns(request.tickers, request.start, request.end)
+
+
+@benchmark("data.load_returns_float32", setup=_stored)
+def load_returns_float32(request: StoreRequest) -> None:
+    panel_cache.clear()
+    load_returns(request.tickers, request.start, request.end, dtype="float32")
+
+
+@benchmark("data.superset_panel_hit", setup=_stored)
+def superset_panel_hit(request: StoreRequest) -> None:
+    # Every other ticker over the last half of the window, served as a view.
+    load_prices(request.tickers, request.start, request.end)
+    middle = request.start + (request.end - request.start) / 2
+    load_prices(request.tickers[::2], middle, request.end)
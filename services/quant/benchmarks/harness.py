@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import fnmatch
+import gc
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Iterable
+
+import numpy as np
+
+# (assets, years) grid; QUICK is the subset the stored baseline covers.
+SIZES = tuple((assets, years) for assets in (10, 100, 500) for years in (1, 5, 20))
+QUICK_SIZES = ((10, 1), (10, 5), (100, 1), (100, 5))
+
+Size = tuple[int, int]
+
+
+@dataclass
+class Benchmark:
+    """A timed function. ``setup(size)`` builds its input outside the timing."""
+
+    name: str
+    fn: Callable[[Any], Any]
+    setup: Callable[[Size | None], Any] | None = None
+    sizes: tuple[Size, ...] | None = SIZES
+    # Reduces the grid for benchmarks that would take minutes at the largest sizes.
+    max_assets: int | None = None
+
+    def cases(self, sizes: Iterable[Size]) -> list[tuple[str, Size | None]]:
+        if self.sizes is None:
+            return [(self.name, None)]
+        return [
+            (f"{self.name}[{assets}x{years}]", (assets, years))
+            for assets, years in sizes
+            if (assets, years) in self.sizes
+            and (self.max_assets is None or assets <= self.max_assets)
+        ]
+
+
+@dataclass
+class Measurement:
+    seconds: float
+    min_seconds: float
+    first_seconds: float
+    peak_bytes: int
+    repeat: int
+
+
+@dataclass
+class Report:
+    meta: dict = field(default_factory=dict)
+    results: dict[str, Measurement] = field(default_factory=dict)
+
+    def save(self, path: Path) -> None:
+        payload = {
+            "meta": self.meta,
+            "results": {name: asdict(result) for name, result in sorted(self.results.items())},
+        }
+        path.write_text(json.dumps(payload, indent=2) + "\n")
+
+    @classmethod
+    def load(cls, path: Path) -> Report:
+        payload = json.loads(path.read_text())
+        results = {name: Measurement(**values) for name, values in payload["results"].items()}
+        return cls(payload.get("meta", {}), results)
+
+
+REGISTRY: dict[str, Benchmark] = {}
+# Entered around every run, e.g. to swap process pools for threads.
+CONTEXTS: list[Callable[[], ContextManager]] = []
+
+
+def benchmark(
+    name: str,
+    setup: Callable[[Size | None], Any] | None = None,
+    sizes: tuple[Size, ...] | None = SIZES,
+    max_assets: int | None = None,
+):
+    """Register ``fn(state)`` under ``name``; ``sizes=None`` for unparameterized cases."""
+
+    def register(fn: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        if name in REGISTRY:
+            raise ValueError(f"Duplicate benchmark {name!r}")
+        REGISTRY[name] = Benchmark(name, fn, setup, sizes, max_assets)
+        return fn
+
+    return register
+
+
+def context(factory: Callable[[], ContextManager]) -> Callable[[], ContextManager]:
+    """Register a context manager that every run enters before its first benchmark."""
+    CONTEXTS.append(factory)
+    return factory
+
+
+def _peak_bytes(fn: Callable[[Any], Any], state: Any) -> int:
+    """Peak traced allocation of one call; numpy buffers are traced too."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn(state)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(
+    bench: Benchmark, size: Size | None, budget: float = 1.0, max_repeat: int = 100
+) -> Measurement:
+    """Time ``bench`` at ``size``: one first call, then repeats until ``budget`` seconds.
+
+    ``first_seconds`` includes one-off costs (imports, problem compilation, cold
+    caches); ``seconds`` is the median of the repeats that follow it.
+    """
+    state = bench.setup(size) if bench.setup is not None else size
+    started = time.perf_counter()
+    bench.fn(state)
+    first = time.perf_counter() - started
+
+    samples = []
+    while len(samples) < max_repeat and (not samples or sum(samples) < budget):
+        started = time.perf_counter()
+        bench.fn(state)
+        samples.append(time.perf_counter() - started)
+    peak = _peak_bytes(bench.fn, state)
+    return Measurement(statistics.median(samples), min(samples), first, peak, len(samples))
+
+
+def load_suites() -> None:
+    from . import backtest, data, optimize, risk, routes  # noqa: F401 - registers benchmarks
+
+
+def select(
+    pattern: str | None, sizes: Iterable[Size], names: Iterable[str] | None = None
+) -> list[tuple[str, Benchmark, Size | None]]:
+    """Cases matching ``pattern`` (substring or glob), or exactly ``names``."""
+    load_suites()
+    sizes = list(sizes)
+    names = None if names is None else set(names)
+    selected = []
+    for bench in REGISTRY.values():
+        for case, size in bench.cases(sizes):
+            if names is not None:
+                matched = case in names
+            else:
+                matched = pattern is None or fnmatch.fnmatch(case, pattern) or pattern in case
+            if matched:
+                selected.append((case, bench, size))
+    return selected
+
+
+def environment() -> dict:
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def run(
+    pattern: str | None = None,
+    sizes: Iterable[Size] = QUICK_SIZES,
+    budget: float = 1.0,
+    progress: Callable[[str, Measurement], None] | None = None,
+    names: Iterable[str] | None = None,
+) -> Report:
+    """Measure every selected case against an offline synthetic data store."""
+    from .synthetic import offline_store
+
+    report = Report(environment())
+    cases = select(pattern, sizes, names)
+    with ExitStack() as stack:
+        stack.enter_context(offline_store())
+        for factory in CONTEXTS:
+            stack.enter_context(factory())
+        for case, bench, size in cases:
+            result = measure(bench, size, budget)
+            report.results[case] = result
+            if progress is not None:
+                progress(case, result)
+    return report
+
+
+@dataclass
+class Comparison:
+    name: str
+    time_ratio: float
+    memory_ratio: float
+    verdict: str
+
+
+def compare(
+    current: Report,
+    baseline: Report,
+    time_threshold: float = 0.5,
+    memory_threshold: float = 0.25,
+    noise_seconds: float = 1e-3,
+    noise_bytes: int = 1 << 20,
+) -> list[Comparison]:
+    """Ratios of current to baseline for every case in both reports.
+
+    Time uses the fastest repeat, which is the least sensitive to noise. A case
+    is ``slower`` or ``more memory`` when its ratio exceeds ``1 + threshold`` and
+    ``faster`` when its time ratio is below ``1 / (1 + threshold)``. Changes
+    smaller than ``noise_seconds`` or ``noise_bytes`` never count.
+    """
+    comparisons = []
+    for name, result in sorted(current.results.items()):
+        reference = baseline.results.get(name)
+        if reference is None:
+            continue
+        time_ratio = result.min_seconds / max(reference.min_seconds, 1e-9)
+        memory_ratio = result.peak_bytes / max(reference.peak_bytes, 1)
+        significant = abs(result.min_seconds - reference.min_seconds) > noise_seconds
+        if significant and time_ratio > 1 + time_threshold:
+            verdict = "slower"
+        elif (
+            memory_ratio > 1 + memory_threshold
+            and result.peak_bytes - reference.peak_bytes > noise_bytes
+        ):
+            verdict = "more memory"
+        elif significant and time_ratio < 1 / (1 + time_threshold):
+            verdict = "faster"
+        else:
+            verdict = "same"
+        comparisons.append(Comparison(name, time_ratio, memory_ratio, verdict))
+    return comparisons
+
+
+def best_of(first: Measurement, second: Measurement) -> Measurement:
+    """The lower time and peak of two measurements of one case, to discount noise."""
+    return replace(
+        first,
+        min_seconds=min(first.min_seconds, second.min_seconds),
+        seconds=min(first.seconds, second.seconds),
+        peak_bytes=min(first.peak_bytes, second.peak_bytes),
+    )
+
+
+def regressions(comparisons: Iterable[Comparison]) -> list[Comparison]:
+    return [item for item in comparisons if item.verdict in ("slower", "more memory")]
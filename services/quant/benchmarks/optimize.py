@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from app.analytics import estimate_covariance
+from app.optimize import (
+    CVaRSolver,
+    cvar_optimize,
+    efficient_frontier,
+    max_sharpe_long_only,
+    max_sharpe_unconstrained,
+    min_variance_long_only,
+    min_variance_unconstrained,
+    solve_cvar,
+    solve_risk_parity,
+    solve_risk_parity_batch,
+    target_return_long_only,
+    target_return_unconstrained,
+)
+
+from . import synthetic
+from .harness import Size, benchmark
+
+
+@dataclass
+class Inputs:
+    returns: pd.DataFrame
+    mu: pd.Series
+    cov: pd.DataFrame
+    # The last year of monthly half-year covariance estimates, as a backtest would solve.
+    covs: np.ndarray
+    target: float
+
+
+def _inputs(size: Size) -> Inputs:
+    returns = synthetic.returns(*size)
+    mu = returns.mean() * 252
+    # Shrinkage keeps the matrix well conditioned when assets outnumber observations.
+    shrunk = estimate_covariance(returns, "ledoit_wolf") * 252
+    cov = pd.DataFrame(shrunk, index=returns.columns, columns=returns.columns)
+    ends = list(range(126, len(returns) + 1, 21))[-12:]
+    covs = np.stack(
+        [estimate_covariance(returns.iloc[end - 126 : end], "ledoit_wolf") for end in ends]
+    )
+    return Inputs(returns, mu, cov, covs, float(mu.quantile(0.75)))
+
+
+@benchmark("optimize.min_variance_unconstrained", setup=_inputs)
+def min_variance_closed_form(inputs: Inputs) -> None:
+    min_variance_unconstrained(inputs.cov.values)
+
+
+@benchmark("optimize.min_variance_long_only", setup=_inputs)
+def min_variance_qp(inputs: Inputs) -> None:
+    min_variance_long_only(inputs.cov.values, max_weight=0.2)
+
+
+@benchmark("optimize.target_return_unconstrained", setup=_inputs)
+def target_return_closed_form(inputs: Inputs) -> None:
+    target_return_unconstrained(inputs.mu.values, inputs.cov.values, inputs.target)
+
+
+@benchmark("optimize.target_return_long_only", setup=_inputs)
+def target_return_qp(inputs: Inputs) -> None:
+    target_return_long_only(inputs.mu.values, inputs.cov.values, inputs.target)
+
+
+@benchmark("optimize.max_sharpe_unconstrained", setup=_inputs)
+def max_sharpe_closed_form(inputs: Inputs) -> None:
+    max_sharpe_unconstrained(inputs.mu.values, inputs.cov.values)
+
+
+@benchmark("optimize.max_sharpe_long_only", setup=_inputs)
+def max_sharpe_socp(inputs: Inputs) -> None:
+    max_sharpe_long_only(inputs.mu.values, inputs.cov.values)
+
+
+@benchmark("optimize.efficient_frontier", setup=_inputs, max_assets=100)
+def frontier(inputs: Inputs) -> None:
+    efficient_frontier(inputs.mu, inputs.cov, points=25, long_only=True)
+
+
+@benchmark("optimize.efficient_frontier_unconstrained", setup=_inputs)
+def frontier_unconstrained(inputs: Inputs) -> None:
+    efficient_frontier(inputs.mu, inputs.cov, points=25, long_only=False)
+
+
+@benchmark("optimize.risk_parity_newton", setup=_inputs)
+def risk_parity_newton(inputs: Inputs) -> None:
+    solve_risk_parity(inputs.cov.values)
+
+
+@benchmark("optimize.risk_parity_ccd", setup=_inputs, max_assets=100)
+def risk_parity_ccd(inputs: Inputs) -> None:
+    solve_risk_parity(inputs.cov.values, method="ccd")
+
+
+@benchmark("optimize.risk_parity_batch", setup=_inputs)
+def risk_parity_batch(inputs: Inputs) -> None:
+    solve_risk_parity_batch(inputs.covs)
+
+
+@benchmark("optimize.cvar", setup=_inputs, max_assets=100)
+def cvar_full_history(inputs: Inputs) -> None:
+    cvar_optimize(inputs.returns, alpha=0.95, max_weight=0.2)
+
+
+@benchmark("optimize.cvar_rolling_warm", setup=_inputs, max_assets=100)
+def cvar_rolling(inputs: Inputs) -> None:
+    # Six monthly steps over half-year windows with one solver, as in a backtest.
+    solver = CVaRSolver()
+    for end in range(126, min(len(inputs.returns), 126 + 6 * 21) + 1, 21):
+        solve_cvar(inputs.returns.iloc[end - 126 : end], 0.95, 0.2, solver)
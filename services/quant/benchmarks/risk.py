@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import get_args
+
+import numpy as np
+import pandas as pd
+
+from app.analytics import (
+    estimate_covariance,
+    fit_factor_model,
+    historical_cvar,
+    historical_var,
+    parametric_cvar,
+    parametric_var,
+    performance_summary,
+    rolling_analytics,
+    rolling_factor_betas,
+    simulate_tail_risk,
+    tail_risk,
+)
+from app.analytics.covariance import CovarianceMethod
+
+from . import synthetic
+from .harness import Size, benchmark
+
+ALPHAS = (0.95, 0.975, 0.99)
+
+
+@dataclass
+class Inputs:
+    returns: pd.DataFrame
+    # Ten random long-only portfolios over every asset.
+    weights: np.ndarray
+    portfolio: pd.Series
+    factors: pd.DataFrame
+
+
+def _inputs(size: Size) -> Inputs:
+    returns = synthetic.returns(*size)
+    rng = np.random.default_rng(0)
+    weights = rng.dirichlet(np.ones(returns.shape[1]), size=10)
+    portfolio = pd.Series(returns.fillna(0.0).values @ weights[0], index=returns.index)
+    return Inputs(returns, weights, portfolio, synthetic.french_factors())
+
+
+@benchmark("risk.tail_risk", setup=_inputs)
+def batched_tail_risk(inputs: Inputs) -> None:
+    tail_risk(inputs.returns, inputs.weights, ALPHAS)
+
+
+@benchmark("risk.portfolio_var_cvar", setup=_inputs)
+def portfolio_var_cvar(inputs: Inputs) -> None:
+    for alpha in ALPHAS:
+        historical_var(inputs.portfolio, alpha)
+        historical_cvar(inputs.portfolio, alpha)
+        parametric_var(inputs.portfolio, alpha)
+        parametric_cvar(inputs.portfolio, alpha)
+
+
+@benchmark("risk.performance_summary", setup=_inputs)
+def summary(inputs: Inputs) -> None:
+    performance_summary(inputs.portfolio, (1 + inputs.portfolio).cumprod())
+
+
+@benchmark("risk.rolling_analytics", setup=_inputs)
+def rolling(inputs: Inputs) -> None:
+    rolling_analytics(inputs.returns, (21, 63, 252), benchmark=inputs.portfolio)
+
+
+def _register_covariance(method: str) -> None:
+    def estimate(inputs: Inputs) -> None:
+        estimate_covariance(inputs.returns, method)
+
+    benchmark(f"risk.covariance_{method}", setup=_inputs)(estimate)
+
+
+for _method in get_args(CovarianceMethod):
+    _register_covariance(_method)
+
+
+@benchmark("risk.scenarios_bootstrap", setup=_inputs)
+def scenarios_bootstrap(inputs: Inputs) -> None:
+    simulate_tail_risk(inputs.returns, inputs.weights, n_scenarios=20_000, max_workers=1)
+
+
+@benchmark("risk.scenarios_student_t", setup=_inputs)
+def scenarios_student_t(inputs: Inputs) -> None:
+    simulate_tail_risk(
+        inputs.returns, inputs.weights, method="student_t", n_scenarios=20_000, max_workers=1
+    )
+
+
+@benchmark("risk.factor_model_hac", setup=_inputs)
+def factor_model(inputs: Inputs) -> None:
+    fit_factor_model(inputs.returns, inputs.factors, cov_type="hac")
+
+
+@benchmark("risk.rolling_factor_betas", setup=_inputs)
+def factor_betas(inputs: Inputs) -> None:
+    rolling_factor_betas(inputs.returns, inputs.factors, window=126)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from fastapi.testclient import TestClient
+
+from app.data import load_ohlcv
+from app.main import app
+from app.routers import backtest as backtest_routes
+from app.routers import optimize as optimize_routes
+from app.routers import risk as risk_routes
+from app.workers import ComputePool
+
+from . import synthetic
+from .harness import Size, benchmark, context
+
+
+@contextmanager
+def in_process_compute():
+    """Run route work in threads of this process, so memory is traced and no
+    worker has to start up inside the timing."""
+    pool = ComputePool(0, max_pending=8, timeout=None)
+    routers = (backtest_routes, optimize_routes, risk_routes)
+    previous = [router.compute_pool for router in routers]
+    for router in routers:
+        router.compute_pool = pool
+    try:
+        yield
+    finally:
+        for router, original in zip(routers, previous):
+            router.compute_pool = original
+        pool.shutdown()
+
+
+context(in_process_compute)
+
+
+@dataclass
+class Client:
+    client: TestClient
+    body: dict
+
+
+def _client(size: Size | None) -> Client:
+    """A client plus a request body over bars already in the store."""
+    assets, years = size or (10, 1)
+    tickers = synthetic.tickers(assets)
+    start, end = synthetic.window(years)
+    load_ohlcv(tickers, start, end)
+    body = {"tickers": tickers, "start": start.isoformat(), "end": end.isoformat()}
+    return Client(TestClient(app), body)
+
+
+def _post(state: Client, path: str, **fields) -> None:
+    response = state.client.post(path, json={**state.body, **fields})
+    response.raise_for_status()
+
+
+@benchmark("routes.health", setup=_client, sizes=None)
+def health(state: Client) -> None:
+    state.client.get("/v1/health").raise_for_status()
+
+
+@benchmark("routes.backtest", setup=_client)
+def backtest(state: Client) -> None:
+    synthetic.reset_caches()
+    _post(state, "/v1/backtest", strategy="risk_parity", rebalance="ME")
+
+
+@benchmark("routes.backtest_arrow", setup=_client)
+def backtest_arrow(state: Client) -> None:
+    synthetic.reset_caches()
+    _post(state, "/v1/backtest", strategy="risk_parity", rebalance="ME", response_format="arrow")
+
+
+@benchmark("routes.backtest_memoized", setup=_client)
+def backtest_memoized(state: Client) -> None:
+    _post(state, "/v1/backtest", strategy="risk_parity", rebalance="ME")
+
+
+@benchmark("routes.optimize_mvo", setup=_client, max_assets=100)
+def optimize_mvo(state: Client) -> None:
+    _post(state, "/v1/optimize", method="mvo", max_weight=0.2, cov_estimator="ledoit_wolf")
+
+
+@benchmark("routes.optimize_risk_parity", setup=_client)
+def optimize_risk_parity(state: Client) -> None:
+    _post(state, "/v1/optimize", method="risk_parity")
+
+
+@benchmark("routes.optimize_cvar", setup=_client, max_assets=100)
+def optimize_cvar(state: Client) -> None:
+    _post(state, "/v1/optimize", method="cvar", max_weight=0.2)
+
+
+@benchmark("routes.risk_metrics", setup=_client)
+def risk_metrics(state: Client) -> None:
+    _post(state, "/v1/risk/metrics", alphas=[0.95, 0.99])
+
+
+@benchmark("routes.risk_scenarios", setup=_client)
+def risk_scenarios(state: Client) -> None:
+    _post(state, "/v1/risk/scenarios", n_scenarios=20_000)
+
+
+@benchmark("routes.risk_factors", setup=_client)
+def risk_factors(state: Client) -> None:
+    _post(state, "/v1/risk/factors", per_asset=True, cov_type="hac", rolling_window=126)
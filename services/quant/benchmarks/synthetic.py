@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.config import settings
+from app.data import market, panel_cache
+from app.data.cache import cache_path, write_parquet
+from app.result_cache import result_cache
+
+# Every synthetic history is a slice of one business-day calendar ending here, so a
+# ticker's bars do not depend on which range or which other tickers are requested.
+CALENDAR_END = pd.Timestamp("2024-12-31")
+MAX_YEARS = 20
+TRADING_DAYS = 252
+N_SECTORS = 8
+
+
+def tickers(n_assets: int) -> list[str]:
+    return [f"S{position:03d}" for position in range(n_assets)]
+
+
+@lru_cache(maxsize=1)
+def calendar() -> pd.DatetimeIndex:
+    return pd.bdate_range(end=CALENDAR_END, periods=MAX_YEARS * TRADING_DAYS)
+
+
+def window(years: int) -> tuple[date, date]:
+    """``(start, end)`` covering the last ``years`` years of the calendar."""
+    days = calendar()[-years * TRADING_DAYS :]
+    return days[0].date(), (days[-1] + pd.offsets.BDay(1)).date()
+
+
+@lru_cache(maxsize=4)
+def _factor_returns(seed: int) -> np.ndarray:
+    """Market and sector returns shared by every ticker, ``(days, 1 + N_SECTORS)``."""
+    rng = np.random.default_rng([seed, 0])
+    scale = np.concatenate([[0.011], np.full(N_SECTORS, 0.006)])
+    return rng.standard_normal((len(calendar()), 1 + N_SECTORS)) * scale + 0.0003 * (
+        np.arange(1 + N_SECTORS) == 0
+    )
+
+
+def _ticker_returns(ticker: str, seed: int) -> tuple[np.random.Generator, np.ndarray]:
+    position = int(ticker[1:])
+    rng = np.random.default_rng([seed, 1, position])
+    factors = _factor_returns(seed)
+    beta = rng.uniform(0.5, 1.5)
+    sector = factors[:, 1 + position % N_SECTORS]
+    specific = rng.standard_normal(len(factors)) * rng.uniform(0.005, 0.02)
+    return rng, beta * factors[:, 0] + sector + specific
+
+
+def ticker_bars(ticker: str, seed: int = 0) -> pd.DataFrame:
+    """Full-calendar OHLCV bars for ``ticker``, identical for the same ``seed``."""
+    rng, returns = _ticker_returns(ticker, seed)
+    close = 50.0 * np.exp(np.cumsum(np.log1p(returns)))
+    gap = rng.normal(0.0, 0.002, len(close))
+    open_ = np.concatenate([[close[0]], close[:-1]]) * (1.0 + gap)
+    spread = np.abs(rng.normal(0.0, 0.006, (2, len(close))))
+    return pd.DataFrame(
+        {
+            "open": open_,
+            "high": np.maximum(open_, close) * (1.0 + spread[0]),
+            "low": np.minimum(open_, close) * (1.0 - spread[1]),
+            "close": close,
+            "adj_close": close,
+            "volume": np.round(rng.lognormal(13.0, 0.5, len(close))),
+        },
+        index=calendar(),
+    )
+
+
+# Panels are cached and shared between benchmarks, so they must not be mutated.
+@lru_cache(maxsize=2)
+def ohlcv(n_assets: int, years: int, seed: int = 0) -> pd.DataFrame:
+    """``(ticker, field)`` panel shaped like :func:`app.data.load_ohlcv` output."""
+    start, end = window(years)
+    frames = {ticker: ticker_bars(ticker, seed) for ticker in tickers(n_assets)}
+    panel = pd.concat(frames, axis=1)
+    return panel.loc[pd.Timestamp(start) : pd.Timestamp(end) - pd.Timedelta(days=1)]
+
+
+@lru_cache(maxsize=2)
+def prices(n_assets: int, years: int, seed: int = 0) -> pd.DataFrame:
+    return ohlcv(n_assets, years, seed).xs("adj_close", level=1, axis=1)
+
+
+@lru_cache(maxsize=2)
+def returns(n_assets: int, years: int, seed: int = 0) -> pd.DataFrame:
+    return prices(n_assets, years, seed).pct_change().dropna(how="all")
+
+
+def french_factors(seed: int = 0) -> pd.DataFrame:
+    """Daily Fama-French-shaped factors over the calendar, market factor included."""
+    rng = np.random.default_rng([seed, 2])
+    factors = _factor_returns(seed)
+    frame = pd.DataFrame(
+        {
+            "Mkt-RF": factors[:, 0] - 0.0001,
+            "SMB": rng.normal(0.0, 0.005, len(factors)),
+            "HML": rng.normal(0.0, 0.005, len(factors)),
+            "RF": 0.0001,
+        },
+        index=calendar(),
+    )
+    frame.index.name = "Date"
+    return frame
+
+
+class SyntheticFetcher:
+    """Offline stand-in for :func:`app.data.yfinance_fetcher`."""
+
+    def __init__(self, seed: int = 0) -> None:
+        self.seed = seed
+        self.calls = 0
+
+    def __call__(self, tickers: list[str], start: date, end: date) -> dict[str, pd.DataFrame]:
+        self.calls += 1
+        start_ts, end_ts = pd.Timestamp(start), pd.Timestamp(end)
+        frames = {}
+        for ticker in tickers:
+            bars = ticker_bars(ticker, self.seed)
+            bars = bars.loc[(bars.index >= start_ts) & (bars.index < end_ts)]
+            if not bars.empty:
+                frames[ticker] = bars
+        return frames
+
+
+def reset_caches() -> None:
+    """Drop cached panels and results so the next call reads the bar store again."""
+    panel_cache.clear()
+    result_cache.clear()
+    shutil.rmtree(result_cache.directory(), ignore_errors=True)
+
+
+@contextmanager
+def offline_store(root: Path | None = None, seed: int = 0):
+    """Point the data layer at a scratch directory served by :class:`SyntheticFetcher`.
+
+    The French factor cache is pre-filled, so nothing touches the network. The
+    previous settings, fetcher and caches are restored on exit.
+    """
+    with tempfile.TemporaryDirectory(prefix="quant-bench-") as scratch:
+        root = Path(scratch) if root is None else root
+        previous = (settings.cache_dir, settings.runs_dir)
+        settings.cache_dir, settings.runs_dir = root / "cache", root / "runs"
+        previous_fetcher = market.set_fetcher(SyntheticFetcher(seed))
+        reset_caches()
+        write_parquet(cache_path("factors_ff_daily"), french_factors(seed))
+        try:
+            yield root
+        finally:
+            reset_caches()
+            market.set_fetcher(previous_fetcher)
+            settings.cache_dir, settings.runs_dir = previous
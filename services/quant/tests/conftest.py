@@ -1,4 +1,20 @@
 import pathlib
 import sys
 
+import numpy as np
+import pandas as pd
+import pytest
+
 sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture
+def make_prices():
+    def _make(n_assets: int = 5, n_days: int = 400, seed: int = 0) -> pd.DataFrame:
+        rng = np.random.default_rng(seed)
+        index = pd.bdate_range("2015-01-01", periods=n_days)
+        returns = rng.normal(0.0003, 0.01, size=(n_days, n_assets))
+        columns = [f"T{i}" for i in range(n_assets)]
+        return pd.DataFrame(100 * np.cumprod(1 + returns, axis=0), index=index, columns=columns)
+
+    return _make
@@ -0,0 +1,262 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app.analytics import (
+    fit_factor_model,
+    historical_cvar,
+    historical_var,
+    parametric_cvar,
+    rolling,
+    rolling_analytics,
+    rolling_factor_betas,
+    simulate_tail_risk,
+    tail_risk,
+)
+from app.analytics.scenarios import _scenario_model, _simulate_chunks
+from app.config import settings
+from app.main import app
+from app.routers import risk as risk_routes
+from app.workers import ComputePool
+
+
+def test_tail_risk_matches_per_series_quantiles():
+    rng = np.random.default_rng(0)
+    returns = rng.standard_normal((500, 8)) * 0.01
+    weights = rng.dirichlet(np.ones(8), size=20)
+    alphas = [0.9, 0.95, 0.99]
+    risk = tail_risk(returns, weights, alphas)
+
+    portfolios = returns @ weights.T
+    for row in range(len(weights)):
+        series = portfolios[:, row]
+        for column, alpha in enumerate(alphas):
+            var = np.quantile(series, 1 - alpha)
+            assert np.isclose(risk.hist_var[row, column], var, rtol=0, atol=1e-15)
+            assert np.isclose(risk.hist_cvar[row, column], series[series <= var].mean())
+            assert np.isclose(
+                risk.param_cvar[row, column], parametric_cvar(pd.Series(series), alpha)
+            )
+
+
+def test_historical_cvar_includes_ties_at_var():
+    returns = pd.Series([-0.02, -0.01, -0.01, -0.01, 0.0, 0.01, 0.02, 0.03])
+    var = historical_var(returns, 0.7)
+    assert var == -0.01
+    assert np.isclose(historical_cvar(returns, 0.7), -0.0125)
+
+
+def test_risk_metrics_route_scores_user_portfolios(make_prices, monkeypatch):
+    returns = make_prices(n_assets=3, n_days=300).pct_change().dropna()
+    monkeypatch.setattr(risk_routes, "load_returns", lambda tickers, start, end: returns)
+    monkeypatch.setattr(risk_routes, "compute_pool", ComputePool(0, max_pending=4, timeout=30.0))
+    body = {
+        "tickers": ["T0", "T1", "T2"],
+        "start": "2015-01-01",
+        "end": "2016-01-01",
+        "weights": {"T0": 1.0},
+        "portfolios": {"balanced": {"T0": 0.5, "T2": 0.5}},
+        "alphas": [0.95, 0.99],
+    }
+    with TestClient(app) as client:
+        metrics = client.post("/v1/risk/metrics", json=body).json()
+        rejected = client.post("/v1/risk/metrics", json={**body, "weights": {"XX": 1.0}})
+
+    assert rejected.status_code == 422
+    assert np.isclose(metrics["hist_cvar"], historical_cvar(returns["T0"], 0.95))
+    entries = {(entry["portfolio"], entry["alpha"]): entry for entry in metrics["tail_risk"]}
+    assert set(entries) == {
+        ("portfolio", 0.95),
+        ("portfolio", 0.99),
+        ("balanced", 0.95),
+        ("balanced", 0.99),
+    }
+    balanced = 0.5 * returns["T0"] + 0.5 * returns["T2"]
+    assert np.isclose(entries["balanced", 0.99]["hist_var"], historical_var(balanced, 0.99))
+
+
+def test_scenario_engine_is_reproducible_across_workers_and_matches_models():
+    rng = np.random.default_rng(5)
+    returns = rng.standard_normal((750, 6)) * 0.01 + 0.0002
+    weights = np.vstack([np.full(6, 1 / 6), np.eye(6)[0]])
+
+    kwargs = dict(horizons=[1, 10], n_scenarios=40_000, seed=7, chunk_size=5_000)
+    single = simulate_tail_risk(returns, weights, method="normal", max_workers=1, **kwargs)
+    pooled = simulate_tail_risk(returns, weights, method="normal", max_workers=2, **kwargs)
+    np.testing.assert_array_equal(single.var, pooled.var)
+    np.testing.assert_array_equal(single.cvar, pooled.cvar)
+
+    # One-day normal scenarios reproduce the parametric measures.
+    parametric = tail_risk(returns, weights, single.alphas)
+    np.testing.assert_allclose(single.var[:, 0], parametric.param_var, rtol=0.05)
+    np.testing.assert_allclose(single.cvar[:, 0], parametric.param_cvar, rtol=0.05)
+
+    # One-day bootstrap draws resample history, so they reproduce the historical ones.
+    bootstrap = simulate_tail_risk(returns, weights, method="bootstrap", max_workers=1, **kwargs)
+    np.testing.assert_allclose(bootstrap.var[:, 0], parametric.hist_var, rtol=0.05)
+    assert (bootstrap.volatility[:, 1] > 2.5 * bootstrap.volatility[:, 0]).all()
+
+    heavy = simulate_tail_risk(returns, weights, method="student_t", dof=3, max_workers=1, **kwargs)
+    assert (heavy.cvar[:, 0, -1] < single.cvar[:, 0, -1]).all()
+
+
+def test_bootstrap_cvar_counts_draws_tied_with_var():
+    # A short history makes one-day bootstrap draws repeat, so VaR ties many of them.
+    rng = np.random.default_rng(11)
+    returns = rng.standard_normal((60, 3)) * 0.01
+    weights = np.vstack([np.full(3, 1 / 3), np.eye(3)[0]])
+    kwargs = dict(horizons=[1], n_scenarios=50_000, seed=3, chunk_size=4_000)
+    single = simulate_tail_risk(returns, weights, method="bootstrap", max_workers=1, **kwargs)
+    pooled = simulate_tail_risk(returns, weights, method="bootstrap", max_workers=2, **kwargs)
+
+    model = _scenario_model(returns, weights, np.array([1]), "bootstrap", "sample", 10.0, 5.0)
+    chunks = [
+        (chunk, min(4_000, 50_000 - first)) for chunk, first in enumerate(range(0, 50_000, 4_000))
+    ]
+    draws = _simulate_chunks(model, 3, chunks, keep=50_000).smallest[:, 0, :]
+    expected = tail_risk(draws, np.eye(len(weights)), single.alphas)
+    for risk in (single, pooled):
+        np.testing.assert_allclose(risk.var[:, 0], expected.hist_var)
+        np.testing.assert_allclose(risk.cvar[:, 0], expected.hist_cvar)
+
+
+def test_risk_scenarios_route(make_prices, monkeypatch):
+    returns = make_prices(n_assets=3, n_days=300).pct_change().dropna()
+    monkeypatch.setattr(risk_routes, "load_returns", lambda tickers, start, end: returns)
+    monkeypatch.setattr(risk_routes, "compute_pool", ComputePool(0, max_pending=4, timeout=30.0))
+    monkeypatch.setattr(settings, "scenario_workers", 1)
+    body = {
+        "tickers": ["T0", "T1", "T2"],
+        "start": "2015-01-01",
+        "end": "2016-01-01",
+        "portfolios": {"single": {"T1": 1.0}},
+        "horizons": [1, 5],
+        "alphas": [0.99],
+        "n_scenarios": 5_000,
+    }
+    with TestClient(app) as client:
+        result = client.post("/v1/risk/scenarios", json=body).json()
+        rejected = client.post("/v1/risk/scenarios", json={**body, "horizons": [0]})
+
+    assert rejected.status_code == 422
+    assert result["n_scenarios"] == 5_000
+    assert [(e["portfolio"], e["horizon"]) for e in result["entries"]] == [
+        ("portfolio", 1),
+        ("portfolio", 5),
+        ("single", 1),
+        ("single", 5),
+    ]
+    assert all(entry["cvar"] <= entry["var"] for entry in result["entries"])
+
+
+def test_rolling_analytics_matches_pandas_for_every_window():
+    rng = np.random.default_rng(2)
+    index = pd.bdate_range("2018-01-01", periods=400)
+    returns = pd.DataFrame(rng.normal(0.0004, 0.01, size=(400, 4)), index=index)
+    returns.iloc[50:55, 2] = np.nan
+    benchmark = returns[0] * 0.6 + pd.Series(rng.normal(0, 0.005, 400), index=index)
+    analytics = rolling_analytics(returns, [21, 63], benchmark=benchmark, risk_free=0.02)
+
+    excess = returns - 0.02 / 252
+    for window in (21, 63):
+        rolled = returns.rolling(window)
+        downside = np.sqrt((np.minimum(excess, 0) ** 2).rolling(window).mean())
+        expected = {
+            "mean": rolled.mean(),
+            "vol": rolled.std(),
+            "sharpe": excess.rolling(window).mean() / excess.rolling(window).std() * np.sqrt(252),
+            "downside": downside,
+            "sortino": excess.rolling(window).mean() / downside * np.sqrt(252),
+            "beta": returns.apply(lambda c: c.rolling(window).cov(benchmark))
+            / benchmark.rolling(window).var().values[:, None],
+        }
+        for name, frame in expected.items():
+            pd.testing.assert_frame_equal(analytics.frame(name, window), frame, rtol=1e-8)
+
+    equity = (1 + returns.fillna(0)).cumprod()
+    pd.testing.assert_frame_equal(analytics.frame("drawdown"), equity / equity.cummax() - 1)
+
+
+def test_rolling_sums_loop_matches_prefix_sums():
+    features = np.random.default_rng(4).standard_normal((3, 40, 5))
+    prefix = np.zeros((3, 41, 5))
+    np.cumsum(features, axis=1, out=prefix[:, 1:])
+    np.testing.assert_allclose(
+        rolling._rolling_sums_loop(features, 7), rolling._window_sums(features, prefix, 7)
+    )
+
+
+def _factor_panel(n_days: int = 600, n_assets: int = 6):
+    rng = np.random.default_rng(8)
+    index = pd.bdate_range("2016-01-01", periods=n_days)
+    factors = pd.DataFrame(
+        rng.normal(0, 0.01, size=(n_days, 3)), index=index, columns=["Mkt-RF", "SMB", "HML"]
+    )
+    factors["RF"] = 0.0001
+    loadings = rng.normal(size=(3, n_assets))
+    noise = rng.normal(0, 0.005, size=(n_days, n_assets))
+    returns = pd.DataFrame(factors.iloc[:, :3].values @ loadings + noise + 0.0001, index=index)
+    return returns, factors, loadings
+
+
+def test_factor_model_batches_assets_and_matches_single_regressions():
+    returns, factors, loadings = _factor_panel()
+    returns.iloc[:100, 4] = np.nan
+    fit = fit_factor_model(returns, factors, cov_type="hac", lags=5)
+    np.testing.assert_allclose(fit.coefficients[1:], loadings, atol=0.05)
+
+    for column in (0, 4):
+        single = fit_factor_model(returns[column].dropna(), factors, cov_type="hac", lags=5)
+        np.testing.assert_allclose(single.coefficients[:, 0], fit.coefficients[:, column])
+        np.testing.assert_allclose(single.tstats[:, 0], fit.tstats[:, column])
+    assert fit.n_obs[4] == len(returns) - 100
+
+    # With zero lags HAC is White's estimator; on the intercept-only model it is exact.
+    y = returns[0] - factors["RF"]
+    mean_only = fit_factor_model(returns[[0]], factors, factor_names=[], cov_type="hac", lags=0)
+    white = np.sqrt(((y - y.mean()) ** 2).sum()) / len(y)
+    assert np.isclose(mean_only.tstats[0, 0], y.mean() / white)
+    ols = fit_factor_model(returns[[0]], factors, factor_names=[])
+    assert np.isclose(ols.tstats[0, 0], y.mean() / (y.std(ddof=1) / np.sqrt(len(y))))
+    with pytest.raises(ValueError, match="FOO"):
+        fit_factor_model(returns, factors, factor_names=["FOO"])
+
+
+def test_rolling_factor_betas_match_window_regressions():
+    returns, factors, _ = _factor_panel(n_days=300, n_assets=3)
+    returns.iloc[150, 1] = np.nan
+    betas = rolling_factor_betas(returns, factors, window=60)
+
+    window = slice(200, 260)
+    expected = fit_factor_model(returns.iloc[window], factors).coefficients
+    actual = np.array([betas[name].iloc[259].values for name in ["const", "Mkt-RF", "SMB", "HML"]])
+    np.testing.assert_allclose(actual, expected)
+    assert betas["SMB"][1].iloc[150:210].isna().all()
+    assert betas["SMB"][1].iloc[:59].isna().all() and betas["SMB"][0].iloc[59:].notna().all()
+
+
+def test_risk_factors_route_per_asset(monkeypatch):
+    returns, factors, _ = _factor_panel(n_assets=2)
+    returns.columns = ["AAA", "BBB"]
+    monkeypatch.setattr(risk_routes, "load_returns", lambda tickers, start, end: returns)
+    monkeypatch.setattr(risk_routes, "load_french_factors", lambda start, end: factors)
+    monkeypatch.setattr(risk_routes, "compute_pool", ComputePool(0, max_pending=4, timeout=30.0))
+    body = {"tickers": ["AAA", "BBB"], "start": "2016-01-01", "end": "2018-01-01"}
+    with TestClient(app) as client:
+        default = client.post("/v1/risk/factors", json=body).json()
+        detailed = client.post(
+            "/v1/risk/factors",
+            json={**body, "per_asset": True, "cov_type": "hac", "rolling_window": 120},
+        ).json()
+        unknown = client.post("/v1/risk/factors", json={**body, "factors": ["SMB", "FOO"]})
+
+    assert set(default) >= {"coefficients", "tstats", "r2"}
+    assert default["assets"] is None
+    assert list(default["coefficients"]) == ["const", "Mkt-RF", "SMB", "HML"]
+    for name, value in default["coefficients"].items():
+        assert np.isclose(detailed["coefficients"][name], value)
+    assert set(detailed["assets"]) == {"AAA", "BBB"}
+    assert len(detailed["rolling_betas"]["Mkt-RF"]["values"]) == len(returns) - 119
+    assert unknown.status_code == 422
+    assert "FOO" in unknown.json()["detail"]
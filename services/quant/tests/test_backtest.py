@@ -0,0 +1,188 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.analytics import performance_summary
+from app.backtest import (
+    BacktestCheckpoint,
+    build_grid,
+    continue_backtest,
+    run_backtest,
+    run_backtest_grid,
+    run_resumable_backtest,
+)
+from app.backtest.continuation import EwmaVolState
+from app.backtest.engine import _simple_returns
+from app.backtest.moments import RollingMoments
+from app.models import BacktestResult, RunSummary
+from app.payload import build_backtest_result, decode_backtest_arrow, encode_backtest_arrow
+from app.workers import sweep_pool
+
+
+@pytest.mark.parametrize(
+    "strategy",
+    [
+        "buy_and_hold",
+        "equal_weight",
+        "momentum_12_1",
+        "min_variance",
+        "risk_parity",
+        "cvar_min",
+        "vol_target",
+    ],
+)
+def test_vectorized_engine_matches_loop(make_prices, strategy):
+    prices = make_prices(n_assets=4, n_days=320)
+    expected = run_backtest(prices, strategy, rebalance="ME", mode="loop")
+    actual = run_backtest(prices, strategy, rebalance="ME")
+
+    pd.testing.assert_series_equal(actual.equity_curve, expected.equity_curve)
+    pd.testing.assert_frame_equal(actual.weights, expected.weights)
+    pd.testing.assert_series_equal(actual.turnover, expected.turnover)
+    pd.testing.assert_series_equal(actual.costs, expected.costs)
+
+
+@pytest.mark.parametrize("listed_late", [False, True])
+def test_vectorized_momentum_matches_loop_over_a_full_lookback(make_prices, listed_late):
+    prices = make_prices(n_assets=6, n_days=500)
+    if listed_late:
+        prices.iloc[:40, 2] = np.nan
+    expected = run_backtest(prices, "momentum_12_1", rebalance="ME", lookback=252, mode="loop")
+    actual = run_backtest(prices, "momentum_12_1", rebalance="ME", lookback=252)
+
+    assert (actual.weights.iloc[-1] == 0).any()
+    pd.testing.assert_series_equal(actual.equity_curve, expected.equity_curve)
+    pd.testing.assert_frame_equal(actual.weights, expected.weights)
+
+
+@pytest.mark.parametrize("cov_estimator", ["ledoit_wolf", "factor"])
+def test_covariance_estimator_is_used_by_both_engines(make_prices, cov_estimator):
+    prices = make_prices(n_assets=6, n_days=320)
+    expected = run_backtest(
+        prices, "min_variance", rebalance="ME", mode="loop", cov_estimator=cov_estimator
+    )
+    actual = run_backtest(prices, "min_variance", rebalance="ME", cov_estimator=cov_estimator)
+    sample = run_backtest(prices, "min_variance", rebalance="ME")
+
+    pd.testing.assert_frame_equal(actual.weights, expected.weights, atol=1e-6)
+    assert not np.allclose(actual.weights.values, sample.weights.values, atol=1e-4)
+
+
+def test_vectorized_engine_charges_costs_on_rebalance_only(make_prices):
+    prices = make_prices(n_assets=6, n_days=500)
+    output = run_backtest(prices, "momentum_12_1", rebalance="ME", lookback=252)
+    charged = output.costs[output.costs > 0].index
+    month_ends = prices.index.to_series().resample("ME").last().index
+    assert len(charged) > 0
+    assert set(charged) <= set(month_ends)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_backtest_grid_matches_individual_runs(make_prices, max_workers):
+    prices = make_prices(n_assets=4, n_days=320)
+    cells = build_grid(
+        ["equal_weight", "min_variance"],
+        rebalances=["ME"],
+        lookbacks=[60, 120],
+        transaction_costs_bps=[0.0, 10.0],
+    )
+    grid = run_backtest_grid(prices, cells, max_workers=max_workers)
+
+    assert len(grid.summary) == len(cells) == 8
+    for cell, output in zip(grid.cells, grid.outputs):
+        expected = run_backtest(
+            prices,
+            cell.strategy,
+            rebalance=cell.rebalance,
+            transaction_cost_bps=cell.transaction_cost_bps,
+            slippage_bps=cell.slippage_bps,
+            lookback=cell.lookback,
+        )
+        pd.testing.assert_series_equal(output.equity_curve, expected.equity_curve)
+
+
+def test_backtest_grids_share_one_process_pool(make_prices):
+    prices = make_prices(n_assets=3, n_days=200)
+    cells = build_grid(["equal_weight", "min_variance"], rebalances=["ME"])
+    first = run_backtest_grid(prices, cells, max_workers=2)
+    executor = sweep_pool._executor
+    second = run_backtest_grid(prices, cells, max_workers=2)
+
+    assert executor is not None and sweep_pool._executor is executor
+    pd.testing.assert_frame_equal(first.summary, second.summary)
+
+
+@pytest.mark.parametrize(
+    ("strategy", "vol_target"),
+    [("equal_weight", None), ("min_variance", None), ("risk_parity", 0.12), ("cvar_min", None)],
+)
+def test_continued_backtest_matches_full_run(make_prices, strategy, vol_target):
+    prices = make_prices(n_assets=4, n_days=420)
+    params = {"rebalance": "ME", "lookback": 63, "max_weight": 0.6, "vol_target": vol_target}
+    expected = run_backtest(prices, strategy, **params)
+
+    # Cut mid-month, so the first run ends on a provisional rebalance.
+    output, checkpoint = run_resumable_backtest(prices.iloc[:300], strategy, **params)
+    assert checkpoint.last_rebalance < checkpoint.last_date == prices.index[299]
+    for end in (340, 341, 420):
+        checkpoint = BacktestCheckpoint.from_dict(checkpoint.to_dict())
+        tail = prices.iloc[:end].loc[checkpoint.window_start :]
+        output, checkpoint = continue_backtest(output, checkpoint, tail, strategy, **params)
+    assert len(tail) < len(prices) / 2
+
+    pd.testing.assert_series_equal(output.equity_curve, expected.equity_curve, check_names=False)
+    pd.testing.assert_series_equal(output.returns, expected.returns, check_names=False)
+    pd.testing.assert_frame_equal(output.weights, expected.weights)
+    pd.testing.assert_series_equal(output.costs, expected.costs, check_names=False)
+    assert output.rebalance_dates.equals(expected.rebalance_dates)
+    assert checkpoint.costs == pytest.approx(expected.costs.sum())
+
+
+def test_float32_prices_give_float64_returns(make_prices):
+    prices = make_prices(n_assets=3, n_days=260)
+    narrow = prices.astype("float32")
+    expected = narrow.astype(float).pct_change().iloc[1:]
+
+    returns = _simple_returns(narrow)
+    assert (returns.dtypes == "float64").all()
+    pd.testing.assert_frame_equal(returns, expected)
+
+
+def test_ewma_vol_state_matches_pandas_exactly():
+    values = np.random.default_rng(3).normal(0, 0.01, 500)
+    values[[0, 7, 8]] = np.nan
+    values[100:110] = 0.002
+    expected = pd.Series(values).ewm(alpha=1 - 0.94, adjust=False).std().to_numpy()
+    state = EwmaVolState()
+    np.testing.assert_array_equal([state.update(value) for value in values], expected)
+
+
+def test_rolling_moments_match_pandas_covariance(make_prices):
+    returns = make_prices(n_assets=4, n_days=200).pct_change().iloc[1:]
+    returns.iloc[10:40, 1] = np.nan
+    returns.iloc[150:, 3] = np.nan
+    moments = RollingMoments(returns.values)
+
+    for start, end in [(0, 60), (5, 70), (20, 120), (100, 110), (90, 199), (0, 199)]:
+        moments.move(start, end)
+        expected = returns.iloc[start:end].cov().values
+        np.testing.assert_allclose(moments.cov(), expected, rtol=1e-9, atol=1e-15)
+
+
+def test_backtest_payloads_json_and_arrow_agree(make_prices):
+    prices = make_prices(n_assets=4, n_days=320)
+    output = run_backtest(prices, "min_variance", rebalance="ME")
+    summary = RunSummary(**performance_summary(output.returns, output.equity_curve))
+
+    result = build_backtest_result(output, summary, "run", "rebalance")
+    validated = BacktestResult.model_validate_json(result.model_dump_json())
+    decoded = decode_backtest_arrow(encode_backtest_arrow(output, summary, "run", "rebalance"))
+
+    assert validated.weights.dates[0] == prices.index[0].date().isoformat()
+    assert len(validated.weights.dates) == len(output.rebalance_dates) < len(prices)
+    assert decoded["summary"] == summary.model_dump()
+    assert list(decoded["weights"].index) == list(output.rebalance_dates)
+    assert np.allclose(decoded["weights"]["T0"], validated.weights.weights["T0"])
+    equity = decoded["series"]["equity_curve"].dropna()
+    assert np.allclose(equity.values, validated.equity_curve.values)
+    assert [d.date().isoformat() for d in equity.index] == validated.equity_curve.dates
@@ -0,0 +1,47 @@
+from dataclasses import replace
+
+import pandas as pd
+
+from app.config import settings
+from app.data import market
+from benchmarks import harness, synthetic
+
+
+def test_synthetic_bars_do_not_depend_on_the_requested_range():
+    bars = synthetic.ticker_bars("S003")
+    pd.testing.assert_frame_equal(bars, synthetic.ticker_bars("S003"))
+    assert (bars["low"] <= bars[["open", "close"]].min(axis=1)).all()
+    assert (bars["high"] >= bars[["open", "close"]].max(axis=1)).all()
+
+    start, end = synthetic.window(1)
+    fetched = synthetic.SyntheticFetcher()(["S003"], start, end)["S003"]
+    pd.testing.assert_frame_equal(fetched, bars.loc[pd.Timestamp(start) :])
+
+    panel = synthetic.ohlcv(3, 1)
+    assert len(panel) == synthetic.TRADING_DAYS
+    assert list(panel.columns.get_level_values(0).unique()) == synthetic.tickers(3)
+    expected = synthetic.ticker_bars("S002").iloc[-synthetic.TRADING_DAYS :]
+    pd.testing.assert_frame_equal(panel["S002"], expected, check_freq=False)
+
+
+def test_benchmark_run_is_offline_and_compares_with_baseline(tmp_path):
+    cache_dir, fetcher = settings.cache_dir, market.get_fetcher()
+    report = harness.run("routes.risk_metrics", sizes=[(10, 1)], budget=0)
+
+    assert (settings.cache_dir, market.get_fetcher()) == (cache_dir, fetcher)
+    result = report.results["routes.risk_metrics[10x1]"]
+    assert result.repeat == 1
+    assert result.min_seconds > 0 and result.peak_bytes > 0
+
+    report.save(tmp_path / "baseline.json")
+    baseline = harness.Report.load(tmp_path / "baseline.json")
+    assert [item.verdict for item in harness.compare(report, baseline)] == ["same"]
+
+    slower = harness.Report(
+        results={
+            name: replace(value, min_seconds=3 * value.min_seconds)
+            for name, value in report.results.items()
+        }
+    )
+    comparisons = harness.compare(slower, baseline)
+    assert [item.verdict for item in harness.regressions(comparisons)] == ["slower"]
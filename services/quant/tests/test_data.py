@@ -0,0 +1,341 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.config import settings
+from app.data import cache, market, panels, shared
+from app.data.cache import store_generation
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "cache_dir", tmp_path)
+    return tmp_path
+
+
+def _bars(start: str, periods: int) -> pd.DataFrame:
+    index = pd.bdate_range(start, periods=periods)
+    close = 100 + np.arange(periods, dtype=float)
+    return pd.DataFrame({"close": close, "adj_close": close, "volume": 1e6}, index=index)
+
+
+def test_store_partitions_by_year_and_reads_ranges(cache_dir):
+    cache.append_ohlcv("SPY", _bars("2019-12-02", 60))
+
+    years = sorted(path.name for path in (cache_dir / "ohlcv" / "ticker=SPY").iterdir())
+    assert years == ["year=2019", "year=2020"]
+
+    window = cache.read_ohlcv("SPY", pd.Timestamp("2020-01-06"), pd.Timestamp("2020-01-10"))
+    assert list(window.index) == list(pd.bdate_range("2020-01-06", "2020-01-10"))
+
+    only_close = cache.read_ohlcv("SPY", columns=["adj_close"])
+    assert list(only_close.columns) == ["adj_close"]
+    assert len(only_close) == 60
+
+
+def test_store_append_only_latest_write_wins(cache_dir):
+    cache.append_ohlcv("SPY", _bars("2020-01-01", 10))
+    revised = _bars("2020-01-14", 3) * 2
+    cache.append_ohlcv("SPY", revised)
+
+    assert len(cache.ohlcv_parts("SPY")) == 2
+    stored = cache.read_ohlcv("SPY")
+    assert len(stored) == 12
+    assert stored.loc["2020-01-14", "close"] == revised.loc["2020-01-14", "close"]
+
+
+def test_store_compacts_year_partitions(cache_dir, monkeypatch):
+    monkeypatch.setattr(cache, "OHLCV_COMPACT_PARTS", 3)
+    bars = _bars("2021-03-01", 3)
+    for day in range(3):
+        cache.append_ohlcv("QQQ", bars.iloc[[day]])
+
+    assert len(cache.ohlcv_parts("QQQ")) == 1
+    pd.testing.assert_frame_equal(cache.read_ohlcv("QQQ"), bars, check_freq=False)
+
+
+class FakeFetcher:
+    """Local stand-in for yfinance that serves synthetic bars after a fixed delay."""
+
+    def __init__(self, history: pd.DataFrame, latency: float = 0.0):
+        self.history = history
+        self.latency = latency
+        self.calls = []
+
+    def __call__(self, tickers, start, end):
+        self.calls.append((tuple(tickers), pd.Timestamp(start), pd.Timestamp(end)))
+        time.sleep(self.latency)
+        index = self.history.index
+        mask = (index >= pd.Timestamp(start)) & (index < pd.Timestamp(end))
+        return {ticker: self.history.loc[mask] for ticker in tickers}
+
+
+@pytest.fixture
+def use_fetcher():
+    previous = market.get_fetcher()
+    yield market.set_fetcher
+    market.set_fetcher(previous)
+
+
+def test_load_ticker_fetches_only_missing_ranges(cache_dir, use_fetcher):
+    history = _bars("2020-01-01", 300)
+    fetcher = FakeFetcher(history)
+    use_fetcher(fetcher)
+
+    market.load_ticker_ohlcv(
+        "SPY", pd.Timestamp("2020-03-02").date(), pd.Timestamp("2020-06-01").date()
+    )
+    loaded = market.load_ticker_ohlcv(
+        "SPY", pd.Timestamp("2020-02-03").date(), pd.Timestamp("2020-09-01").date()
+    )
+
+    assert sorted(fetcher.calls[1:]) == [
+        (("SPY",), pd.Timestamp("2020-02-03"), pd.Timestamp("2020-03-02")),
+        (("SPY",), pd.Timestamp("2020-05-30"), pd.Timestamp("2020-09-01")),
+    ]
+    expected = history.loc["2020-02-03":"2020-08-31"]
+    pd.testing.assert_frame_equal(loaded, expected, check_freq=False)
+
+
+def test_load_ohlcv_bulk_fetches_cold_tickers_once(cache_dir, use_fetcher):
+    fetcher = FakeFetcher(_bars("2020-01-01", 100), latency=0.2)
+    use_fetcher(fetcher)
+    tickers = [f"T{i}" for i in range(20)]
+    start, end = pd.Timestamp("2020-01-01").date(), pd.Timestamp("2020-03-03").date()
+
+    began = time.perf_counter()
+    cold = market.load_ohlcv(tickers, start, end)
+    cold_seconds = time.perf_counter() - began
+    warm = market.load_ohlcv(tickers, start, end)
+
+    assert len(fetcher.calls) == 1
+    assert cold_seconds < 20 * fetcher.latency / 2
+    assert list(cold.columns.get_level_values(0).unique()) == tickers
+    pd.testing.assert_frame_equal(cold, warm)
+
+
+@pytest.fixture
+def fake_ohlcv(monkeypatch):
+    calls = []
+    index = pd.bdate_range("2020-01-01", periods=120)
+
+    def fake_load(tickers, start, end, field):
+        calls.append(tuple(tickers))
+        window = (index >= pd.Timestamp(start)) & (index <= pd.Timestamp(end))
+        return {
+            ticker: pd.Series(100.0 + np.arange(120) * (i + 1), index=index)[window]
+            for i, ticker in enumerate(tickers)
+        }
+
+    monkeypatch.setattr(panels, "load_field", fake_load)
+    monkeypatch.setattr(panels, "panel_cache", panels.PanelCache(max_bytes=10**7))
+    return calls
+
+
+def test_panel_cache_serves_exact_and_superset_hits(fake_ohlcv):
+    start, end = pd.Timestamp("2020-01-01"), pd.Timestamp("2020-06-01")
+    full = panels.load_prices(["A", "B", "C"], start, end)
+    again = panels.load_prices(["A", "B", "C"], start, end)
+    subset = panels.load_prices(["C", "A"], pd.Timestamp("2020-02-03"), pd.Timestamp("2020-03-02"))
+
+    assert again is full
+    assert fake_ohlcv == [("A", "B", "C")]
+    assert list(subset.columns) == ["C", "A"]
+    assert subset.index[0] == pd.Timestamp("2020-02-03")
+    stats = panels.panel_cache.stats()
+    assert (stats["hits"], stats["superset_hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_store_write_during_a_load_invalidates_the_cached_panel(fake_ohlcv, monkeypatch):
+    start, end = pd.Timestamp("2020-01-01"), pd.Timestamp("2020-06-01")
+    load = panels.load_field
+
+    def racing_load(tickers, start, end, field):
+        columns = load(tickers, start, end, field)
+        monkeypatch.setattr(cache, "_generation", cache._generation + 1)
+        return columns
+
+    monkeypatch.setattr(panels, "load_field", racing_load)
+    panels.load_returns(["A", "B"], start, end)
+    monkeypatch.setattr(panels, "load_field", load)
+    panels.load_returns(["A", "B"], start, end)
+
+    assert fake_ohlcv == [("A", "B"), ("A", "B")]
+
+
+def test_superset_hits_skip_panels_missing_a_ticker_without_bars(fake_ohlcv, monkeypatch):
+    start, end = pd.Timestamp("2020-01-01"), pd.Timestamp("2020-06-01")
+    load = panels.load_field
+
+    def load_without_z(tickers, start, end, field):
+        return {t: bars for t, bars in load(tickers, start, end, field).items() if t != "Z"}
+
+    monkeypatch.setattr(panels, "load_field", load_without_z)
+    full = panels.load_prices(["A", "B", "Z"], start, end)
+    narrower = panels.load_prices(["A", "Z"], pd.Timestamp("2020-02-03"), end)
+    subset = panels.load_prices(["B"], pd.Timestamp("2020-02-03"), end)
+
+    assert list(full.columns) == ["A", "B"]
+    assert list(narrower.columns) == ["A"]
+    assert list(subset.columns) == ["B"]
+    assert fake_ohlcv == [("A", "B", "Z"), ("A", "Z")]
+
+
+def test_superset_hits_share_the_resident_panel(fake_ohlcv):
+    start, end = pd.Timestamp("2020-01-01"), pd.Timestamp("2020-06-01")
+    full = panels.load_price_panel(["A", "B", "C", "D"], start, end)
+    window = (pd.Timestamp("2020-02-03"), pd.Timestamp("2020-03-02"))
+    spaced = panels.load_price_panel(["D", "B"], *window)
+    scattered = panels.load_price_panel(["A", "B", "D"], *window)
+
+    assert fake_ohlcv == [("A", "B", "C", "D")]
+    assert np.shares_memory(spaced.values, full.values)
+    assert not np.shares_memory(scattered.values, full.values)
+    pd.testing.assert_frame_equal(
+        scattered.frame, full.frame.loc[window[0] : window[1], ["A", "B", "D"]]
+    )
+    assert list(spaced.frame.columns) == ["D", "B"]
+    with pytest.raises(ValueError):
+        panels.load_prices(["A", "B", "C", "D"], start, end).iloc[0, 0] = 0.0
+
+
+def test_float32_panels_are_cached_separately(fake_ohlcv):
+    start, end = pd.Timestamp("2020-01-01"), pd.Timestamp("2020-06-01")
+    wide = panels.load_returns(["A", "B"], start, end)
+    compact = panels.load_returns(["A", "B"], start, end, dtype="float32")
+
+    assert compact.dtypes.unique().tolist() == [np.float32]
+    assert compact.values.nbytes == wide.values.nbytes // 2
+    np.testing.assert_allclose(compact.values, wide.values, rtol=1e-6)
+    assert len(fake_ohlcv) == 2
+
+
+def test_load_field_reads_one_column_with_close_fallback(cache_dir, monkeypatch, use_fetcher):
+    use_fetcher(lambda tickers, start, end: {})
+    cache.append_ohlcv("SPY", _bars("2020-01-01", 30))
+    cache.append_ohlcv("OLD", _bars("2020-01-08", 20).drop(columns="adj_close"))
+    reads = []
+    read_ohlcv = market.read_ohlcv
+
+    def recording_read(ticker, start=None, end=None, columns=None):
+        reads.append((ticker, columns))
+        return read_ohlcv(ticker, start, end, columns)
+
+    monkeypatch.setattr(market, "read_ohlcv", recording_read)
+    monkeypatch.setattr(panels, "panel_cache", panels.PanelCache(max_bytes=10**7))
+    start, end = pd.Timestamp("2020-01-01").date(), pd.Timestamp("2020-02-01").date()
+    prices = panels.load_prices(["SPY", "OLD"], start, end)
+
+    assert sorted(reads) == [("OLD", ["adj_close"]), ("OLD", ["close"]), ("SPY", ["adj_close"])]
+    expected = market.load_ohlcv(["SPY", "OLD"], start, end)
+    for ticker, field in (("SPY", "adj_close"), ("OLD", "close")):
+        pd.testing.assert_series_equal(
+            prices[ticker], expected[ticker][field], check_names=False, check_freq=False
+        )
+    assert prices["OLD"].first_valid_index() == pd.Timestamp("2020-01-08")
+
+
+@pytest.fixture
+def stored_universe(cache_dir, monkeypatch, use_fetcher):
+    use_fetcher(lambda tickers, start, end: {})
+    for i, ticker in enumerate("ABCD"):
+        bars = _bars("2020-01-01", 120) * (1 + i / 10)
+        cache.append_ohlcv(ticker, bars.iloc[5:] if ticker == "C" else bars)
+    monkeypatch.setattr(panels, "panel_cache", panels.PanelCache(max_bytes=10**7))
+    monkeypatch.setattr(shared, "shared_panels", shared.SharedPanels())
+    return list("ABCD"), pd.Timestamp("2020-01-01").date(), pd.Timestamp("2020-07-01").date()
+
+
+def test_panel_cache_sees_writes_from_other_processes(stored_universe, monkeypatch):
+    start, end = pd.Timestamp("2020-01-01").date(), pd.Timestamp("2020-07-01").date()
+    assert panels.load_prices(["A"], start, end).index[-1] == pd.Timestamp("2020-06-16")
+
+    # Another worker's append leaves this process's write counter alone.
+    counter = cache._generation
+    cache.append_ohlcv("A", _bars("2020-06-17", 2))
+    monkeypatch.setattr(cache, "_generation", counter)
+    assert panels.load_prices(["A"], start, end).index[-1] == pd.Timestamp("2020-06-18")
+
+
+def test_shared_panels_are_mapped_views_matching_regular_loads(stored_universe, monkeypatch):
+    tickers, start, end = stored_universe
+    window = (pd.Timestamp("2020-02-03").date(), pd.Timestamp("2020-04-01").date())
+    expected = [panels.load_prices(["B", "D"], *window), panels.load_returns(["D", "C"], *window)]
+    shared.publish_shared_panels(tickers, start, end)
+    panels.panel_cache.clear()
+
+    def no_store_reads(*args):
+        raise AssertionError("read the bar store")
+
+    monkeypatch.setattr(panels, "load_field", no_store_reads)
+    monkeypatch.setattr(settings, "shared_panels", True)
+    prices = panels.load_price_panel(["B", "D"], *window)
+    returns = panels.load_returns(["D", "C"], *window)
+
+    mapped = shared.shared_panels._current()[0]
+    assert isinstance(mapped["prices"].values, np.memmap)
+    assert np.shares_memory(prices.values, mapped["prices"].values)
+    pd.testing.assert_frame_equal(prices.frame, expected[0], check_freq=False)
+    pd.testing.assert_frame_equal(returns, expected[1], check_freq=False)
+    assert shared.shared_panels.stats()["hits"] == 2
+
+    # Outside the published window or universe, loads fall through to the store.
+    with pytest.raises(AssertionError, match="bar store"):
+        panels.load_prices(["A", "E"], *window)
+
+
+def test_shared_panel_publish_swaps_without_disturbing_readers(stored_universe):
+    tickers, start, end = stored_universe
+    lookup = (("A",), pd.Timestamp(start), pd.Timestamp("2020-06-01"))
+    shared.publish_shared_panels(tickers, start, end)
+    first = shared.shared_panels.get("prices", *lookup)
+
+    revised = _bars("2020-01-01", 120) * 3
+    cache.append_ohlcv("A", revised)
+    for _ in range(2):
+        shared.publish_shared_panels(tickers, start, end)
+    latest = shared.shared_panels.get("prices", *lookup)
+
+    versions = [path for path in shared.shared_root().iterdir() if path.is_dir()]
+    assert len(versions) == 2
+    # The first version's files are gone, but its mapping still reads.
+    assert first.values[0, 0] == 100.0
+    assert latest.values[0, 0] == revised["adj_close"].iloc[0]
+
+
+def test_shared_panels_miss_after_the_store_changes(stored_universe):
+    tickers, start, end = stored_universe
+    shared.publish_shared_panels(tickers, start, end)
+    last_bar = pd.Timestamp("2020-06-16")
+    assert shared.shared_panels.get("prices", ("A", "B"), pd.Timestamp(start), last_bar)
+
+    # Bars appended after publishing are not in the mapped panels.
+    cache.append_ohlcv("A", _bars("2020-06-17", 5))
+    assert shared.shared_panels.get("prices", ("A", "B"), pd.Timestamp(start), last_bar) is None
+    assert shared.shared_panels.get("prices", ("B",), pd.Timestamp(start), last_bar) is not None
+    # Within the published window but past its last bar misses too.
+    assert (
+        shared.shared_panels.get("prices", ("B",), pd.Timestamp(start), pd.Timestamp(end)) is None
+    )
+
+    shared.publish_shared_panels(tickers, start, end)
+    new_last_bar = pd.Timestamp("2020-06-23")
+    latest = shared.shared_panels.get("prices", ("A",), pd.Timestamp(start), new_last_bar)
+    assert latest is not None and latest.dates[-1] == new_last_bar
+
+
+def test_panel_cache_evicts_least_recently_used():
+    cache = panels.PanelCache(max_bytes=3500)
+    frame = pd.DataFrame(np.ones((100, 1)), index=pd.bdate_range("2020-01-01", periods=100))
+    panel = panels.Panel.from_frame(frame)
+    start, end = frame.index[0], frame.index[-1]
+    cache.put("prices", "adj_close", ("A",), start, end, panel, store_generation())
+    cache.put("prices", "adj_close", ("B",), start, end, panel, store_generation())
+    assert cache.get("prices", "adj_close", ("A",), start, end) is not None
+    cache.put("prices", "adj_close", ("C",), start, end, panel, store_generation())
+
+    assert cache.get("prices", "adj_close", ("B",), start, end) is None
+    assert cache.get("prices", "adj_close", ("A",), start, end) is not None
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,205 @@
+import time
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app import jobs
+from app.config import settings
+from app.data import cache, ohlcv_version
+from app.main import app
+from app.models import BacktestRequest
+from app.payload import decode_backtest_arrow
+from app.result_cache import ResultCache
+from app.routers import backtest as backtest_routes
+from app.workers import ComputePool
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch, make_prices):
+    loads = []
+
+    def fake_load_prices(tickers, start, end):
+        loads.append(tuple(tickers))
+        return make_prices(n_assets=len(tickers), n_days=300)
+
+    pool = ComputePool(workers=0, max_pending=4, timeout=30.0)
+    monkeypatch.setattr(settings, "runs_dir", tmp_path)
+    monkeypatch.setattr(settings, "cache_dir", tmp_path / "cache")
+    monkeypatch.setattr(backtest_routes, "load_prices", fake_load_prices)
+    monkeypatch.setattr(backtest_routes, "compute_pool", pool)
+    with TestClient(app) as test_client:
+        test_client.loads = loads
+        yield test_client
+    pool.shutdown()
+
+
+def _wait_for(client, job_id: str) -> dict:
+    for _ in range(200):
+        status = client.get(f"/v1/backtest/jobs/{job_id}").json()
+        if status["state"] in ("done", "failed"):
+            return status
+        time.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+
+def test_backtest_job_persists_result_and_deduplicates(client, tmp_path):
+    body = {
+        "tickers": ["T0", "T1", "T2"],
+        "start": "2015-01-01",
+        "end": "2016-03-01",
+        "strategy": "min_variance",
+        "rebalance": "ME",
+    }
+    submitted = client.post("/v1/backtest/jobs", json=body)
+    assert submitted.status_code == 202
+    job_id = submitted.json()["job_id"]
+
+    status = _wait_for(client, job_id)
+    assert status["state"] == "done"
+    assert status["completed"] == status["total"] > 1
+    assert (tmp_path / "jobs" / job_id / "result.arrow").exists()
+
+    result = client.get(f"/v1/backtest/jobs/{job_id}/result")
+    decoded = decode_backtest_arrow(result.content)
+    assert decoded["run_id"] == job_id
+    assert decoded["summary"] == status["summary"]
+
+    again = client.post("/v1/backtest/jobs", json={**body, "response_format": "arrow"})
+    assert again.json()["job_id"] == job_id
+    # The store does not cover the window, so the resubmission loads before deduplicating.
+    assert client.loads == [("T0", "T1", "T2")] * 2
+    # Nothing is stored for these tickers, so the id covers the (empty) data too.
+    assert jobs.job_id(jobs.read_request(job_id), ohlcv_version(body["tickers"])) == job_id
+
+
+def test_backtest_job_ids_follow_bars_outside_the_stored_window(client):
+    covered = {"tickers": ["T0"], "start": "2015-01-05", "end": "2015-01-07"}
+    covered["strategy"] = "equal_weight"
+    cache.append_ohlcv("T0", pd.DataFrame({"adj_close": [1.0]}, index=[pd.Timestamp("2015-01-01")]))
+    cache.append_ohlcv("T0", pd.DataFrame({"adj_close": [1.0]}, index=[pd.Timestamp("2015-01-06")]))
+    job_id = client.post("/v1/backtest/jobs", json=covered).json()["job_id"]
+    assert job_id == jobs.job_id(BacktestRequest(**covered))
+    _wait_for(client, job_id)
+    assert client.post("/v1/backtest/jobs", json=covered).json()["job_id"] == job_id
+    assert len(client.loads) == 1
+
+    # A window reaching past the stored bars gets a new job once more bars are stored.
+    current = {**covered, "end": "2015-02-01"}
+    first = client.post("/v1/backtest/jobs", json=current).json()["job_id"]
+    _wait_for(client, first)
+    assert client.post("/v1/backtest/jobs", json=current).json()["job_id"] == first
+    cache.append_ohlcv("T0", pd.DataFrame({"adj_close": [1.0]}, index=[pd.Timestamp("2015-01-07")]))
+    second = client.post("/v1/backtest/jobs", json=current).json()["job_id"]
+    assert second not in (first, job_id)
+    assert _wait_for(client, second)["state"] == "done"
+
+
+def test_backtest_job_unknown_and_pending_results(client):
+    missing = "0" * 32
+    assert client.get(f"/v1/backtest/jobs/{missing}").status_code == 404
+    assert client.get("/v1/backtest/jobs/not-a-job").status_code == 422
+
+    request = BacktestRequest(start="2015-01-01", end="2016-01-01", strategy="equal_weight")
+    jobs.create_job(missing, request)
+    assert client.get(f"/v1/backtest/jobs/{missing}/result").status_code == 409
+
+
+def test_backtest_results_are_memoized_until_bars_change(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "cache_dir", tmp_path / "cache")
+    monkeypatch.setattr(backtest_routes, "result_cache", ResultCache(10**7, 10**7))
+    computed = []
+    payload = backtest_routes._backtest_payload
+
+    def counting_payload(prices, request, run_id):
+        computed.append(run_id)
+        return payload(prices, request, run_id)
+
+    monkeypatch.setattr(backtest_routes, "_backtest_payload", counting_payload)
+    body = {"tickers": ["T0", "T1"], "start": "2015-01-01", "end": "2016-01-01"}
+    body["strategy"] = "risk_parity"
+
+    first = client.post("/v1/backtest", json=body)
+    second = client.post("/v1/backtest", json=body)
+    assert first.content == second.content
+    assert len(computed) == 1
+    assert first.json()["run_id"] == computed[0]
+
+    cache.append_ohlcv("T0", pd.DataFrame({"adj_close": [1.0]}, index=[pd.Timestamp("2016-01-04")]))
+    third = client.post("/v1/backtest", json=body)
+    assert len(computed) == 2
+    assert third.json()["run_id"] != computed[0]
+
+
+def test_result_cache_disk_tier_survives_restart_and_evicts(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "cache_dir", tmp_path)
+    results = ResultCache(memory_bytes=10**6, disk_bytes=250)
+    for key in ("a", "b", "c"):
+        results.put(key, key.encode() * 100, "application/json")
+        time.sleep(0.01)
+
+    restarted = ResultCache(memory_bytes=10**6, disk_bytes=250)
+    assert restarted.get("a") is None
+    assert restarted.get("c") == (b"c" * 100, "application/json")
+    assert restarted.stats()["disk_hits"] == 1
+
+
+def test_backtest_job_continues_over_new_bars(client, tmp_path, monkeypatch, make_prices):
+    prices = make_prices(n_assets=3, n_days=420)
+    loads = []
+
+    def load_prices(tickers, start, end):
+        loads.append((pd.Timestamp(start), pd.Timestamp(end)))
+        return prices.loc[pd.Timestamp(start) : pd.Timestamp(end)]
+
+    monkeypatch.setattr(settings, "cache_dir", tmp_path / "cache")
+    monkeypatch.setattr(backtest_routes, "load_prices", load_prices)
+    monkeypatch.setattr(backtest_routes, "result_cache", ResultCache(10**7, 10**7))
+    body = {
+        "tickers": ["T0", "T1", "T2"],
+        "start": "2015-01-01",
+        "end": "2016-02-16",
+        "strategy": "min_variance",
+        "rebalance": "ME",
+        "lookback_window": 63,
+        "weights_granularity": "rebalance",
+    }
+    job_id = client.post("/v1/backtest/jobs", json=body).json()["job_id"]
+    first = _wait_for(client, job_id)
+    assert first["last_date"] == "2016-02-16"
+    assert (tmp_path / "jobs" / job_id / "checkpoint.json").exists()
+
+    continued = client.post(f"/v1/backtest/jobs/{job_id}/continue", params={"end": "2016-08-10"})
+    assert continued.status_code == 202
+    continued_id = continued.json()["job_id"]
+    assert continued_id != job_id
+    status = _wait_for(client, continued_id)
+    assert status["state"] == "done" and status["last_date"] == "2016-08-10"
+    # Only the lookback window before the first run's last bar is reloaded.
+    assert loads[-1][0] == prices.index[prices.index.get_loc("2016-02-16") - (63 + 21)]
+    stale = client.post(f"/v1/backtest/jobs/{continued_id}/continue", params={"end": "2016-08-01"})
+    assert stale.json() == status
+
+    # The original request still maps to the original, unextended run.
+    original = client.post("/v1/backtest/jobs", json=body).json()
+    assert original["job_id"] == job_id and original["last_date"] == "2016-02-16"
+    result = decode_backtest_arrow(client.get(f"/v1/backtest/jobs/{job_id}/result").content)
+    assert result["series"].index[-1] == pd.Timestamp("2016-02-16")
+    resubmitted = client.post("/v1/backtest/jobs", json={**body, "end": "2016-08-10"}).json()
+    assert resubmitted == status
+
+    full = client.post("/v1/backtest", json={**body, "end": "2016-08-10"}).json()
+    result = decode_backtest_arrow(client.get(f"/v1/backtest/jobs/{continued_id}/result").content)
+    assert result["run_id"] == continued_id
+    equity = result["series"]["equity_curve"].tolist()
+    assert equity == pytest.approx(full["equity_curve"]["values"])
+    assert result["weights"].index.strftime("%Y-%m-%d").tolist() == full["weights"]["dates"]
+    assert status["summary"] == pytest.approx(full["summary"])
+
+
+def test_backtest_job_continue_requires_a_finished_job(client):
+    missing = "0" * 32
+    assert client.post(f"/v1/backtest/jobs/{missing}/continue").status_code == 404
+    request = BacktestRequest(start="2015-01-01", end="2016-01-01", strategy="equal_weight")
+    jobs.create_job(missing, request)
+    assert client.post(f"/v1/backtest/jobs/{missing}/continue").status_code == 409
@@ -1,12 +1,27 @@
 import numpy as np
 import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
 
+from app.analytics.covariance import FactorCovariance, estimate_covariance
+from app.main import app
 from app.optimize import (
+    CVaRSolver,
+    cvar,
     cvar_optimize,
+    efficient_frontier,
     min_variance_long_only,
+    min_variance_unconstrained,
     risk_parity_weights,
+    solve_cvar,
+    solve_risk_parity,
+    solve_risk_parity_batch,
     target_return_unconstrained,
 )
+from app.optimize.problems import problem_cache
+from app.optimize.risk_parity import risk_contributions
+from app.routers import optimize as optimize_routes
+from app.workers import ComputePool
 
 
 def test_min_variance_long_only_weights_sum_to_one():
@@ -41,3 +56,157 @@ def test_target_return_unconstrained_hits_target():
     weights = target_return_unconstrained(mu, cov, target)
     realized = float(weights @ mu)
     assert np.isclose(realized, target, atol=1e-3)
+
+
+def test_problem_cache_reuses_compiled_problem():
+    problem_cache.clear()
+    rng = np.random.default_rng(1)
+    for _ in range(3):
+        cov = np.cov(rng.normal(size=(120, 4)).T)
+        weights = min_variance_long_only(cov, max_weight=0.6)
+        expected = min_variance_unconstrained(cov)
+        assert np.isclose(weights.sum(), 1.0)
+        assert (weights <= 0.6 + 1e-6).all()
+        if (expected >= 0).all() and (expected <= 0.6).all():
+            assert np.allclose(weights, expected, atol=1e-4)
+    assert len(problem_cache._problems) == 1
+
+
+def test_efficient_frontier_unconstrained_matches_kkt_solution():
+    mu = pd.Series([0.06, 0.1, 0.14])
+    cov = pd.DataFrame([[0.04, 0.01, 0.0], [0.01, 0.09, 0.02], [0.0, 0.02, 0.16]])
+    frontier = efficient_frontier(mu, cov, points=7, long_only=False)
+
+    assert list(frontier.columns) == ["target_return", "volatility", "weights"]
+    for row in frontier.itertuples():
+        expected = target_return_unconstrained(mu.values, cov.values, row.target_return)
+        assert np.allclose(row.weights, expected)
+        assert np.isclose(row.volatility, np.sqrt(expected @ cov.values @ expected))
+
+
+def test_efficient_frontier_long_only_hits_targets():
+    mu = pd.Series([0.06, 0.1, 0.14])
+    cov = pd.DataFrame([[0.04, 0.01, 0.0], [0.01, 0.09, 0.02], [0.0, 0.02, 0.16]])
+    frontier = efficient_frontier(mu, cov, points=5)
+
+    for row in frontier.itertuples():
+        assert np.isclose(row.weights.sum(), 1.0)
+        assert row.weights @ mu.values >= row.target_return - 1e-4
+
+
+def _wide_returns(n_days: int = 60, n_assets: int = 80, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0, 0.01, size=(n_days, 1))
+    return pd.DataFrame(market + rng.normal(0, 0.005, size=(n_days, n_assets)))
+
+
+@pytest.mark.parametrize("method", ["ledoit_wolf", "oas", "ewma"])
+def test_covariance_estimators_are_well_conditioned(method):
+    returns = _wide_returns()
+    cov = estimate_covariance(returns, method)
+
+    assert cov.shape == (80, 80)
+    assert np.allclose(cov, cov.T)
+    if method != "ewma":
+        assert np.linalg.eigvalsh(cov).min() > 0
+    sample = estimate_covariance(returns, "sample")
+    assert np.allclose(np.trace(cov), np.trace(sample), rtol=0.2)
+
+
+def test_factor_covariance_solvers_match_dense_equivalent():
+    cov = estimate_covariance(_wide_returns(), "factor", n_factors=3)
+    assert isinstance(cov, FactorCovariance)
+    dense = cov.to_dense()
+    mu = np.linspace(0.02, 0.12, 80)
+
+    assert np.allclose(min_variance_unconstrained(cov), min_variance_unconstrained(dense))
+    assert np.allclose(
+        target_return_unconstrained(mu, cov, 0.08), target_return_unconstrained(mu, dense, 0.08)
+    )
+    factored = min_variance_long_only(cov, max_weight=0.05)
+    reference = min_variance_long_only(dense, max_weight=0.05)
+    assert np.isclose(factored @ dense @ factored, reference @ dense @ reference, rtol=1e-3)
+
+
+def _random_covariance(n_assets: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    loadings = rng.normal(size=(n_assets, n_assets))
+    returns = rng.normal(0, 0.01, size=(250, n_assets)) @ loadings
+    return np.cov(returns.T)
+
+
+@pytest.mark.parametrize("method", ["newton", "ccd"])
+def test_risk_parity_matches_risk_budgets(method):
+    cov = _random_covariance(12, seed=4)
+    budgets = np.linspace(1, 3, 12)
+    result = solve_risk_parity(cov, budgets=budgets, method=method)
+
+    assert result.converged
+    assert result.residual < 1e-8
+    contributions = risk_contributions(cov, result.weights)
+    assert np.allclose(contributions, budgets / budgets.sum(), atol=1e-8)
+
+
+def test_optimize_route_aligns_risk_budgets_with_loaded_tickers(monkeypatch):
+    rng = np.random.default_rng(5)
+    index = pd.bdate_range("2020-01-01", periods=300)
+    returns = pd.DataFrame(rng.normal(0, [0.01, 0.02], size=(300, 2)), index=index)
+    returns.columns = ["A", "B"]
+    monkeypatch.setattr(optimize_routes, "load_returns", lambda tickers, start, end: returns)
+    monkeypatch.setattr(optimize_routes, "compute_pool", ComputePool(0, 4, timeout=30.0))
+    body = {"start": "2020-01-01", "end": "2021-03-01", "method": "risk_parity"}
+    with TestClient(app) as client:
+        solved = client.post(
+            "/v1/optimize", json={**body, "tickers": ["B", "A"], "risk_budgets": {"B": 3, "A": 1}}
+        )
+        missing = client.post(
+            "/v1/optimize",
+            json={**body, "tickers": ["A", "B", "C"], "risk_budgets": {"A": 1, "B": 1, "C": 1}},
+        )
+
+    assert solved.status_code == 200
+    weights = solved.json()["weights"]
+    cov = returns.cov().values
+    contributions = risk_contributions(cov, np.array([weights["A"], weights["B"]]))
+    assert np.allclose(contributions, [0.25, 0.75], atol=1e-6)
+    assert missing.status_code == 422
+    assert "C" in missing.json()["detail"]
+
+
+def test_risk_parity_batch_matches_single_solves_and_warm_starts():
+    covs = np.stack([_random_covariance(8, seed) for seed in range(5)])
+    covs[2] = np.nan
+    weights, iterations, _, converged = solve_risk_parity_batch(covs)
+
+    assert converged.tolist() == [True, True, False, True, True]
+    assert np.allclose(weights[2], 1 / 8)
+    for cov, expected in zip(covs[[0, 1, 3, 4]], weights[[0, 1, 3, 4]]):
+        assert np.allclose(solve_risk_parity(cov).weights, expected, atol=1e-9)
+    warm = solve_risk_parity(covs[0], x0=weights[0])
+    assert warm.iterations < iterations[0]
+
+
+def test_cvar_scenario_generation_matches_full_lp(monkeypatch):
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range("2015-01-01", periods=800)
+    market = rng.standard_normal((len(dates), 1)) * 0.01
+    returns = pd.DataFrame(market + rng.standard_t(4, size=(len(dates), 12)) * 0.01, index=dates)
+
+    monkeypatch.setattr(cvar, "_GENERATION_HORIZON", len(dates))
+    full = solve_cvar(returns, max_weight=0.3)
+    monkeypatch.setattr(cvar, "_GENERATION_HORIZON", 100)
+    generated = solve_cvar(returns, max_weight=0.3)
+    assert full.optimal and generated.optimal
+    assert np.isclose(generated.cvar, full.cvar, rtol=1e-8)
+
+    losses = -(returns.values @ generated.weights)
+    tail = np.sort(losses)[-int(0.05 * len(losses)) :]
+    assert np.isclose(generated.cvar, tail.mean(), rtol=1e-8)
+
+    solver = CVaRSolver()
+    for start in range(0, 200, 40):
+        window = returns.iloc[start : start + 600]
+        assert np.isclose(solve_cvar(window, solver=solver).cvar, solve_cvar(window).cvar)
+
+    monkeypatch.setattr(cvar, "_load_highspy", lambda: None)
+    assert np.isclose(solve_cvar(returns, max_weight=0.3).cvar, full.cvar, rtol=1e-8)
@@ -0,0 +1,126 @@
+import pickle
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import telemetry
+from app.config import settings
+from app.main import app
+from app.result_cache import ResultCache
+from app.routers import backtest as backtest_routes
+from app.workers import ComputePool
+
+
+def test_histogram_renders_cumulative_buckets_and_escapes_labels():
+    registry = telemetry.Registry()
+    latency = registry.register(
+        telemetry.Histogram("test_seconds", "Test latency.", ("route",), buckets=(0.1, 1.0))
+    )
+    lookups = registry.register(telemetry.Counter("test_total", "Test lookups.", ("outcome",)))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, route='/a"b')
+    lookups.inc(outcome="hit")
+    lookups.inc(2, outcome="hit")
+
+    lines = registry.render().splitlines()
+    assert "# TYPE test_seconds histogram" in lines
+    assert 'test_seconds_bucket{route="/a\\"b",le="0.1"} 2' in lines
+    assert 'test_seconds_bucket{route="/a\\"b",le="1"} 3' in lines
+    assert 'test_seconds_bucket{route="/a\\"b",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{route="/a\\"b"} 4' in lines
+    assert 'test_total{outcome="hit"} 3' in lines
+    assert latency.count(route='/a"b') == 4
+
+
+def test_trace_round_trips_through_pickle_and_merges():
+    result, worker = telemetry.call_traced(sum, 0.0, [1, 2])
+    assert result == 3 and list(worker.stages) == ["queue"]
+
+    trace = telemetry.Trace()
+    token = telemetry._current.set(trace)
+    try:
+        with telemetry.stage("weights"):
+            telemetry.record_solve("HIGHS", "optimal", 0.25)
+    finally:
+        telemetry._current.reset(token)
+    copy = pickle.loads(pickle.dumps(trace))
+    copy.merge(trace)
+    assert copy.stages["weights"][1] == 2
+    assert copy.solves == [("HIGHS", "optimal", 0.25)] * 2
+
+
+@pytest.mark.parametrize("strategy", ["min_variance", "cvar_min"])
+def test_backtest_timing_header_and_metrics(strategy, tmp_path, monkeypatch, make_prices):
+    prices = make_prices(n_assets=3, n_days=300)
+    monkeypatch.setattr(settings, "cache_dir", tmp_path / "cache")
+    monkeypatch.setattr(backtest_routes, "load_prices", lambda tickers, start, end: prices)
+    monkeypatch.setattr(backtest_routes, "store_covers", lambda tickers, start, end: False)
+    monkeypatch.setattr(backtest_routes, "result_cache", ResultCache(10**7, 10**7))
+    monkeypatch.setattr(backtest_routes, "compute_pool", ComputePool(0, 4, timeout=30.0))
+    body = {
+        "tickers": ["T0", "T1", "T2"],
+        "start": "2015-01-01",
+        "end": "2016-03-01",
+        "strategy": strategy,
+        "rebalance": "ME",
+    }
+    labels = {"route": "/v1/backtest", "strategy": strategy}
+    before = telemetry.STAGE_SECONDS.count(**labels, stage="weights")
+    hits = telemetry.CACHE_LOOKUPS.value(cache="result", outcome="memory_hit")
+
+    monkeypatch.setattr(settings, "runs_dir", tmp_path / "runs")
+    with TestClient(app) as client:
+        plain = client.post("/v1/backtest", json=body)
+        timed = client.post("/v1/backtest", json=body, headers={"X-Timing": "1"})
+        assert client.get(f"/v1/backtest/jobs/{'0' * 32}").status_code == 404
+        scraped = client.get("/metrics")
+
+    assert plain.status_code == timed.status_code == 200
+    assert "X-Timing" not in plain.headers
+    stages = {part.split(";")[0]: part for part in timed.headers["X-Timing"].split(", ")}
+    # The second request is served from the result cache without computing.
+    assert stages["result"] == 'result;desc="memory_hit"'
+    assert "weights" not in stages and "total" in stages
+
+    assert telemetry.STAGE_SECONDS.count(**labels, stage="weights") == before + 1
+    assert telemetry.CACHE_LOOKUPS.value(cache="result", outcome="memory_hit") == hits + 1
+    for stage in ("queue", "compute", "align", "apply", "summary", "serialize"):
+        assert telemetry.STAGE_SECONDS.count(**labels, stage=stage) >= 1
+    solver = "HIGHS" if strategy == "cvar_min" else None
+    solves = [
+        line
+        for line in scraped.text.splitlines()
+        if line.startswith("quant_solver_duration_seconds_count")
+        and f'strategy="{strategy}"' in line
+    ]
+    assert solves and all('status="optimal' in line for line in solves)
+    if solver is not None:
+        assert any(f'solver="{solver}"' in line for line in solves)
+    assert scraped.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'quant_request_duration_seconds_count{route="/v1/backtest",method="POST"' in scraped.text
+    job_route = '{route="/v1/backtest/jobs/{job_id}",method="GET",status="404"}'
+    assert f"quant_request_duration_seconds_count{job_route}" in scraped.text
+
+
+def test_timing_header_setting_breaks_down_computed_requests(tmp_path, monkeypatch, make_prices):
+    prices = make_prices(n_assets=3, n_days=300)
+    monkeypatch.setattr(settings, "cache_dir", tmp_path / "cache")
+    monkeypatch.setattr(settings, "timing_header", True)
+    monkeypatch.setattr(backtest_routes, "load_prices", lambda tickers, start, end: prices)
+    monkeypatch.setattr(backtest_routes, "store_covers", lambda tickers, start, end: False)
+    monkeypatch.setattr(backtest_routes, "result_cache", ResultCache(10**7, 10**7))
+    monkeypatch.setattr(backtest_routes, "compute_pool", ComputePool(0, 4, timeout=30.0))
+    body = {
+        "tickers": ["T0", "T1", "T2"],
+        "start": "2015-01-01",
+        "end": "2016-03-01",
+        "strategy": "risk_parity",
+        "rebalance": "ME",
+    }
+    with TestClient(app) as client:
+        response = client.post("/v1/backtest", json=body)
+
+    stages = {part.split(";")[0]: part for part in response.headers["X-Timing"].split(", ")}
+    assert stages["result"] == 'result;desc="miss"'
+    assert stages["weights"].endswith(";count=1")
+    assert {"queue", "compute", "serialize", "total"} <= set(stages)
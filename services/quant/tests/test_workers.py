@@ -0,0 +1,92 @@
+import asyncio
+import pathlib
+import subprocess
+import sys
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.optimize.problems import load_cvxpy
+from app.warmup import SolverWarmup, warm_worker
+from app.workers import ComputePool
+
+
+def _sleep(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def test_compute_pool_rejects_when_saturated():
+    pool = ComputePool(workers=0, max_pending=2, timeout=5.0)
+
+    async def scenario():
+        running = [asyncio.ensure_future(pool.run(_sleep, 0.3)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as rejected:
+            await pool.run(_sleep, 0.0)
+        assert rejected.value.status_code == 429
+        assert await asyncio.gather(*running) == [0.3, 0.3]
+        assert await pool.run(_sleep, 0.0) == 0.0
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+
+
+def test_compute_pool_times_out_and_frees_slot_when_work_ends():
+    pool = ComputePool(workers=0, max_pending=1, timeout=0.05)
+
+    async def scenario():
+        with pytest.raises(HTTPException) as timed_out:
+            await pool.run(_sleep, 0.3)
+        assert timed_out.value.status_code == 504
+        assert pool.stats()["pending"] == 1
+        await asyncio.sleep(0.4)
+        assert pool.stats()["pending"] == 0
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+
+
+def test_service_import_defers_heavy_dependencies():
+    service_dir = pathlib.Path(__file__).resolve().parents[1]
+    heavy = ["cvxpy", "highspy", "scipy.stats", "scipy.optimize", "yfinance", "httpx"]
+    script = f"import sys, app.main; print([m for m in {heavy!r} if m in sys.modules])"
+    loaded = subprocess.run(
+        [sys.executable, "-c", script], cwd=service_dir, capture_output=True, text=True, check=True
+    )
+    assert loaded.stdout.strip() == "[]"
+
+
+def test_solver_warmup_runs_in_background():
+    warmup = SolverWarmup()
+    assert warmup.stats() == {"state": "off", "seconds": None}
+    warmup.start()
+    warmup.join(timeout=60)
+    assert warmup.stats()["state"] == "done"
+    assert warmup.stats()["seconds"] > 0
+    assert load_cvxpy() is not None
+
+
+def _solver_loaded() -> bool:
+    return "cvxpy" in sys.modules
+
+
+@pytest.mark.parametrize("initializer", [None, warm_worker])
+def test_solver_warmup_warms_compute_workers(initializer):
+    pool = ComputePool(workers=1, max_pending=2, timeout=60.0, initializer=initializer)
+    warmup = SolverWarmup()
+    try:
+        if initializer is None:
+            pool.start_workers()
+        else:
+            warmup.start(pool)
+            warmup.join(timeout=120)
+            assert warmup.stats()["state"] == "done"
+        assert asyncio.run(pool.run(_solver_loaded)) is (initializer is not None)
+    finally:
+        pool.shutdown()